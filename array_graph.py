@@ -0,0 +1,169 @@
+import numpy as np
+
+from edge_loader import load_edge_list
+
+
+class ArrayGraph:
+    """Compact graph stored as CSR arrays (offsets + neighbor indices).
+
+    Nodes are addressed by a dense index 0..n-1; `node_ids[i]` holds the
+    original id of node i. Ids are kept sorted, so sorting neighbors by dense
+    index is the same as sorting them by id.
+    """
+
+    def __init__(self, offsets, neighbors, node_ids, weights=None, directed=False):
+        self.offsets = offsets  # int64, length n + 1
+        self.neighbors = neighbors  # int32, length offsets[-1]
+        self.node_ids = node_ids  # sorted original ids
+        self.weights = weights  # optional, parallel to neighbors
+        self.directed = directed
+        self._reversed = None  # cached transpose, see reverse()
+
+    @classmethod
+    def from_edges(cls, src, dst, weights=None, directed=False):
+        src = np.asarray(src)
+        dst = np.asarray(dst)
+        node_ids, inverse = np.unique(np.concatenate([src, dst]), return_inverse=True)
+        return cls.from_indexed_edges(
+            inverse[: len(src)], inverse[len(src) :], node_ids, weights, directed
+        )
+
+    @classmethod
+    def from_file(cls, file_path, columns=2, directed=False, cache_dir=None):
+        """Build from an edge-list file ("u v" or "u v weight" per line)."""
+        edges = load_edge_list(file_path, columns=columns, cache_dir=cache_dir)
+        return cls.from_indexed_edges(
+            edges.src, edges.dst, edges.node_ids, edges.weight, directed
+        )
+
+    @classmethod
+    def from_indexed_edges(cls, u, v, node_ids, weights=None, directed=False):
+        """Build from dense endpoint indices into the sorted `node_ids`."""
+        u = np.asarray(u, dtype=np.int32)
+        v = np.asarray(v, dtype=np.int32)
+        edge = np.arange(len(u))
+        if not directed:
+            u, v = np.concatenate([u, v]), np.concatenate([v, u])
+            edge = np.concatenate([edge, edge])
+
+        # Sort by (u, v) and drop parallel edges, like nx.Graph does: the
+        # last one added wins
+        perm = np.lexsort((edge, v, u))
+        u, v, edge = u[perm], v[perm], edge[perm]
+        keep = np.ones(len(u), dtype=bool)
+        keep[:-1] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+        u, v, edge = u[keep], v[keep], edge[keep]
+        if weights is not None:
+            weights = np.asarray(weights)[edge]
+
+        offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u, minlength=len(node_ids)), out=offsets[1:])
+        return cls(offsets, v, np.asarray(node_ids), weights, directed)
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        m = len(self.neighbors)
+        if self.directed:
+            return m
+        loops = np.count_nonzero(self.neighbors == self.sources())
+        return (m + loops) // 2
+
+    @property
+    def nbytes(self):
+        total = self.offsets.nbytes + self.neighbors.nbytes + self.node_ids.nbytes
+        if self.weights is not None:
+            total += self.weights.nbytes
+        return total
+
+    def degree(self, i):
+        return int(self.offsets[i + 1] - self.offsets[i])
+
+    def neighbors_of(self, i):
+        """Sorted dense indices of the neighbors of node i (a view, no copy)."""
+        return self.neighbors[self.offsets[i] : self.offsets[i + 1]]
+
+    def sources(self):
+        """Dense source index of every CSR entry."""
+        return np.repeat(
+            np.arange(self.num_nodes, dtype=np.int32), np.diff(self.offsets)
+        )
+
+    def index_of(self, node):
+        i = int(np.searchsorted(self.node_ids, node))
+        if i == self.num_nodes or self.node_ids[i] != node:
+            raise KeyError(node)
+        return i
+
+    def reverse(self):
+        """Graph with every edge flipped (u -> v becomes v -> u).
+
+        An undirected graph is its own reverse and is returned as is. The
+        transposed CSR of a directed graph is built once and cached; both
+        graphs share node_ids.
+        """
+        if not self.directed:
+            return self
+        if self._reversed is None:
+            # Stable sort by head keeps in-neighbors sorted by tail
+            order = np.argsort(self.neighbors, kind="stable")
+            offsets = np.zeros_like(self.offsets)
+            np.cumsum(np.bincount(self.neighbors, minlength=self.num_nodes), out=offsets[1:])
+            weights = self.weights[order] if self.weights is not None else None
+            reverse = ArrayGraph(offsets, self.sources()[order], self.node_ids, weights, True)
+            reverse._reversed = self
+            self._reversed = reverse
+        return self._reversed
+
+    def edge_indices(self):
+        """Edges as (src, dst, weights) dense indices, each undirected edge once.
+
+        weights is None for an unweighted graph.
+        """
+        u = self.sources()
+        v = self.neighbors
+        w = self.weights
+        if not self.directed:
+            mask = u <= v
+            u, v = u[mask], v[mask]
+            if w is not None:
+                w = w[mask]
+        return u, v, w
+
+    def edge_arrays(self):
+        """Edges as (src_ids, dst_ids, weights), each undirected edge once.
+
+        weights is None for an unweighted graph.
+        """
+        u, v, w = self.edge_indices()
+        return self.node_ids[u], self.node_ids[v], w
+
+    @classmethod
+    def from_networkx(cls, G, weight="weight"):
+        """Build from an nx graph with sortable nodes, isolated ones included.
+
+        Edge `weight`s become graph.weights if every edge has one.
+        """
+        node_ids = np.array(sorted(G))
+        edges = list(G.edges(data=weight))
+        u = np.searchsorted(node_ids, np.array([e[0] for e in edges], dtype=node_ids.dtype))
+        v = np.searchsorted(node_ids, np.array([e[1] for e in edges], dtype=node_ids.dtype))
+        weights = [e[2] for e in edges]
+        if not edges or None in weights:
+            weights = None
+        return cls.from_indexed_edges(u, v, node_ids, weights, G.is_directed())
+
+    def to_networkx(self):
+        import networkx as nx
+
+        G = nx.DiGraph() if self.directed else nx.Graph()
+        G.add_nodes_from(self.node_ids.tolist())
+        src, dst, w = self.edge_arrays()
+        if w is None:
+            G.add_edges_from(zip(src.tolist(), dst.tolist()))
+        else:
+            G.add_weighted_edges_from(zip(src.tolist(), dst.tolist(), w.tolist()))
+        return G
@@ -0,0 +1,5 @@
+"""Benchmark and regression suite: python -m bench --help.
+
+Imports of the algorithm modules happen only when their cases are built,
+so importing this package runs nothing.
+"""
@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+from bench.cases import GROUPS
+from bench.graphs import SIZES
+from bench.runner import compare, load, run, save
+
+parser = argparse.ArgumentParser(
+    prog="python -m bench", description="Benchmark and regression suite of all algorithm modules"
+)
+parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small"])
+parser.add_argument("--groups", nargs="+", choices=list(GROUPS), default=None)
+parser.add_argument("--repeat", type=int, default=3)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--output", help="write the results as JSON to this file")
+parser.add_argument("--baseline", help="JSON results to check for regressions against")
+parser.add_argument("--save-baseline", action="store_true",
+                    help="write the results to --baseline instead of comparing")
+parser.add_argument("--threshold", type=float, default=1.25,
+                    help="slowdown factor that counts as a regression")
+args = parser.parse_args()
+
+report = run(args.sizes, args.groups, args.repeat, args.seed)
+if args.output:
+    save(report, args.output)
+if args.baseline and args.save_baseline:
+    save(report, args.baseline)
+    print(f"Baseline written to {args.baseline}")
+elif args.baseline:
+    regressions = compare(report, load(args.baseline), args.threshold)
+    for key, old, new in regressions:
+        print(f"REGRESSION {key}: {1000 * old:.2f} ms -> {1000 * new:.2f} ms ({new / old:.2f}x)")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
@@ -0,0 +1,161 @@
+import contextlib
+import io
+from collections import namedtuple
+
+import networkx as nx
+import numpy as np
+
+from bench import graphs
+
+# setup(data) runs untimed and returns the argument of run, which is timed.
+# kinds are the graphs the case runs on, max_nodes skips larger sizes.
+Case = namedtuple("Case", "group name kinds max_nodes setup run")
+
+GRAPH_KINDS = ("grid", "erdos_renyi", "power_law")
+FLOW_KINDS = ("layered_flow", "random_flow")
+
+
+def make_graph(kind, num_nodes, seed=0):
+    """The seeded synthetic input of a case: an ArrayGraph, or for flow
+    kinds a ((u, v, capacity, cost) edges, source, sink) tuple."""
+    if kind == "grid":
+        return graphs.grid(num_nodes, seed)
+    if kind == "erdos_renyi":
+        return graphs.erdos_renyi(num_nodes, seed=seed)
+    if kind == "power_law":
+        return graphs.power_law(num_nodes, seed=seed)
+    if kind == "layered_flow":
+        return graphs.layered_flow(num_nodes, seed=seed)
+    if kind == "random_flow":
+        from min_cost_flow import random_cost_network
+
+        return random_cost_network(num_nodes, 4 * num_nodes, seed=seed), 0, num_nodes - 1
+    raise ValueError(f"Unknown graph kind {kind!r}")
+
+
+def _quiet(func, *args):
+    # find_max_flow_min_cut prints its result
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def _digraph(data):
+    edges, source, sink = data
+    G = nx.DiGraph()
+    for u, v, capacity, cost in edges:
+        G.add_edge(u, v, capacity=capacity, weight=cost)
+    return G, source, sink
+
+
+def _capacities(data):
+    edges, source, sink = data
+    return [(u, v, c) for u, v, c, _ in edges], source, sink
+
+
+def _visualization(graph):
+    from main import GraphVisualization
+
+    visualization = GraphVisualization()
+    src, dst, _ = graph.edge_arrays()
+    for u, v in zip(src.tolist(), dst.tolist()):
+        visualization.add_edge(u, v)
+    visualization.graph  # build the CSR graph outside the timed run
+    return visualization, int(graph.node_ids[0])
+
+
+def _traversal_cases():
+    from multi_bfs import multi_source_bfs
+    from traversal import bfs_levels, dfs_preorder
+
+    return [
+        Case("traversal", "bfs_levels", GRAPH_KINDS, None, lambda g: g,
+             lambda g: bfs_levels(g, 0)),
+        Case("traversal", "dfs_preorder", GRAPH_KINDS, None, lambda g: g,
+             lambda g: dfs_preorder(g, 0)),
+        Case("traversal", "GraphVisualization.bfs", GRAPH_KINDS, None, _visualization,
+             lambda a: a[0].bfs(a[1])),
+        Case("traversal", "GraphVisualization.dfs", GRAPH_KINDS, None, _visualization,
+             lambda a: a[0].dfs(a[1])),
+        Case("traversal", "multi_source_bfs_64", GRAPH_KINDS, None, lambda g: g,
+             lambda g: multi_source_bfs(g, np.arange(min(64, g.num_nodes)))),
+    ]
+
+
+def _shortest_path_cases():
+    from shortest_paths import all_pairs_shortest_paths, bellman_kalaba, dijkstra
+
+    return [
+        Case("shortest_paths", "dijkstra", GRAPH_KINDS, None, lambda g: g,
+             lambda g: dijkstra(g, 0)),
+        Case("shortest_paths", "bellman_kalaba", GRAPH_KINDS, None, lambda g: g,
+             lambda g: bellman_kalaba(g, 0)),
+        Case("shortest_paths", "all_pairs", GRAPH_KINDS, 1_000, lambda g: g,
+             lambda g: all_pairs_shortest_paths(g, workers=1)),
+    ]
+
+
+def _max_flow_cases():
+    from custom_max_flow import custom_edmonds_karp
+    from flow_engine import FlowNetwork
+    from max_flow_w_edmond_karp import edmonds_karp_max_flow
+    from max_flow_w_min_cut import find_max_flow_min_cut
+
+    def solve(method):
+        return lambda a: FlowNetwork(a[0]).solve(a[1], a[2], method)
+
+    return [
+        Case("max_flow", "networkx_edmonds_karp", FLOW_KINDS, 10_000, _capacities,
+             lambda a: edmonds_karp_max_flow(*a)),
+        Case("max_flow", "custom_edmonds_karp", FLOW_KINDS, 10_000, _digraph,
+             lambda a: custom_edmonds_karp(*a)),
+        Case("max_flow", "dinic", FLOW_KINDS, None, _capacities, solve("dinic")),
+        Case("max_flow", "push_relabel", FLOW_KINDS, None, _capacities, solve("push_relabel")),
+        Case("max_flow", "min_cut", FLOW_KINDS, 10_000, _capacities,
+             lambda a: _quiet(find_max_flow_min_cut, *a)),
+    ]
+
+
+def _min_cost_cases():
+    from max_flow_min_cost_w_simplex import find_max_flow_min_cost
+    from min_cost_flow import max_flow_min_cost
+
+    def solve(method):
+        return lambda a: max_flow_min_cost(a[0], a[1], a[2], method=method)
+
+    return [
+        Case("min_cost_flow", "ssp", FLOW_KINDS, 10_000, lambda a: a, solve("ssp")),
+        Case("min_cost_flow", "cycle_cancelling", FLOW_KINDS, 1_000, lambda a: a,
+             solve("cycle_cancelling")),
+        Case("min_cost_flow", "cost_scaling", FLOW_KINDS, None, lambda a: a, solve("cost_scaling")),
+        Case("min_cost_flow", "network_simplex", FLOW_KINDS, 10_000, lambda a: a,
+             lambda a: find_max_flow_min_cost(*a, backend="network_simplex")),
+    ]
+
+
+def _coloring_cases():
+    from coloring import STRATEGIES, color_graph
+
+    def color(strategy):
+        return lambda g: color_graph(g, strategy)
+
+    return [Case("coloring", strategy, GRAPH_KINDS, None, lambda g: g, color(strategy))
+            for strategy in STRATEGIES]
+
+
+GROUPS = {
+    "traversal": _traversal_cases,
+    "shortest_paths": _shortest_path_cases,
+    "max_flow": _max_flow_cases,
+    "min_cost_flow": _min_cost_cases,
+    "coloring": _coloring_cases,
+}
+
+
+def cases(groups=None):
+    """All cases of the given groups (default all), importing only their modules."""
+    result = []
+    for group in groups or GROUPS:
+        if group not in GROUPS:
+            raise ValueError(f"Unknown group {group!r}, expected one of {sorted(GROUPS)}")
+        result.extend(GROUPS[group]())
+    return result
@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+
+from array_graph import ArrayGraph
+from shortest_paths import grid_graph, random_weighted_graph
+
+# Node counts of the size presets
+SIZES = {"small": 1_000, "medium": 10_000, "large": 100_000}
+
+
+def grid(num_nodes, seed=0):
+    """Square grid with about num_nodes nodes and random weights 1..10."""
+    side = max(2, int(round(np.sqrt(num_nodes))))
+    return grid_graph(side, side, seed=seed)
+
+
+def erdos_renyi(num_nodes, degree=8, seed=0):
+    """Connected G(n, m) with average degree `degree` and weights 1..10."""
+    return random_weighted_graph(num_nodes, degree * num_nodes // 2, seed=seed)
+
+
+def power_law(num_nodes, m=4, max_weight=10, seed=0):
+    """Barabasi-Albert graph: every new node links to m distinct older
+    nodes picked proportionally to their degree."""
+    rng = random.Random(seed)
+    ends = list(range(m))  # every node once per edge end, plus the seed nodes
+    src, dst = [], []
+    for v in range(m, num_nodes):
+        targets = set()
+        while len(targets) < m:
+            targets.add(ends[rng.randrange(len(ends))])
+        for u in targets:
+            src.append(v)
+            dst.append(u)
+            ends.append(u)
+        ends.extend([v] * m)
+    weights = np.random.default_rng(seed).integers(1, max_weight + 1, len(src))
+    return ArrayGraph.from_edges(np.array(src), np.array(dst), weights)
+
+
+def layered_flow(num_nodes, width=None, degree=3, max_capacity=100, max_cost=20, seed=0):
+    """Layered flow network as (u, v, capacity, cost) edges, source, sink.
+
+    Node 0 is the source and num_nodes - 1 the sink; the nodes in between
+    form layers of `width` (default about sqrt(n)) and every node has
+    `degree` edges to random nodes of the next layer.
+    """
+    rng = np.random.default_rng(seed)
+    inner = max(num_nodes - 2, 1)
+    width = width or max(1, int(np.sqrt(inner)))
+    layer = np.arange(inner) // width
+    last = layer[-1]
+    src = [np.zeros(width, dtype=np.int64), np.flatnonzero(layer == last) + 1]
+    dst = [np.arange(1, width + 1), np.full(np.count_nonzero(layer == last), inner + 1)]
+    tails = np.repeat(np.flatnonzero(layer < last), degree)
+    first = (layer[tails] + 1) * width
+    size = np.minimum(width, inner - first)
+    src.append(tails + 1)
+    dst.append(first + (rng.random(len(tails)) * size).astype(np.int64) + 1)
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    pairs = np.unique(np.stack([src, dst], axis=1), axis=0)
+    capacity = rng.integers(1, max_capacity + 1, len(pairs))
+    cost = rng.integers(1, max_cost + 1, len(pairs))
+    edges = list(zip(pairs[:, 0].tolist(), pairs[:, 1].tolist(), capacity.tolist(), cost.tolist()))
+    return edges, 0, inner + 1
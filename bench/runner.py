@@ -0,0 +1,94 @@
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+from bench.cases import cases, make_graph
+from bench.graphs import SIZES
+
+
+def measure(func, arg, repeat=3):
+    """(best seconds over `repeat` runs, peak traced bytes of one more run)."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    # tracemalloc slows the run down, so memory gets a run of its own
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes=("small",), groups=None, repeat=3, seed=0, log=print):
+    """Run every case on every graph kind and size it applies to.
+
+    Returns {"meta": ..., "results": {key: {"seconds", "peak_bytes"}}} with
+    keys "group/case/kind/size".
+    """
+    inputs = {}
+    results = {}
+    for case in cases(groups):
+        for size in sizes:
+            num_nodes = SIZES[size]
+            if case.max_nodes is not None and num_nodes > case.max_nodes:
+                continue
+            for kind in case.kinds:
+                if (kind, size) not in inputs:
+                    inputs[kind, size] = make_graph(kind, num_nodes, seed)
+                arg = case.setup(inputs[kind, size])
+                seconds, peak = measure(case.run, arg, repeat)
+                key = f"{case.group}/{case.name}/{kind}/{size}"
+                results[key] = {"seconds": seconds, "peak_bytes": peak}
+                if log:
+                    log(f"{key:60s} {1000 * seconds:10.2f} ms {peak / 2**20:9.1f} MiB")
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "seed": seed,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(report, baseline, threshold=1.25, min_seconds=0.005):
+    """Regressions of `report` against `baseline` as (key, old, new) seconds.
+
+    A case regresses when it got more than `threshold` times slower; cases
+    faster than `min_seconds` in both runs are timer noise and skipped, as
+    are cases missing from either side.
+    """
+    regressions = []
+    old_results = baseline["results"]
+    for key, new in report["results"].items():
+        if key not in old_results:
+            continue
+        old = old_results[key]["seconds"]
+        if max(old, new["seconds"]) < min_seconds:
+            continue
+        if new["seconds"] > threshold * old:
+            regressions.append((key, old, new["seconds"]))
+    return regressions
+
+
+def save(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,73 @@
+"""Startup cost of the algorithm modules: python -m bench.startup --help.
+
+Every module is imported in a fresh interpreter, so nothing is cached
+between runs. numpy alone is the floor for the solver modules, which must
+not pull in matplotlib, networkx or imageio.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+HEAVY = ("matplotlib", "networkx", "imageio")
+SOLVER_MODULES = (
+    "numpy", "queries", "cli", "traversal", "shortest_paths", "flow_engine", "min_cost_flow",
+    "coloring", "gomory_hu", "disk_graph", "server", "path_cache", "landmarks", "contraction",
+    "multi_bfs", "batch_paths",
+)
+EXAMPLE_MODULES = (
+    "render", "main", "shortpath", "graph_coloring", "custom_max_flow", "max_flow_w_edmond_karp",
+    "max_flow_w_min_cut", "max_flow_min_cost_w_simplex", "max_flow_min_cost_w_klein",
+)
+
+_PROBE = """\
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, *sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy})))
+"""
+
+
+def measure(module, repeat=5):
+    """(import seconds, process seconds, heavy modules loaded), best of `repeat`.
+
+    The process time includes interpreter startup and shutdown.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    best_import = best_process = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+                             env=env, capture_output=True, text=True, check=True).stdout
+        best_process = min(best_process, time.perf_counter() - start)
+        elapsed, *heavy = out.split()
+        best_import = min(best_import, float(elapsed))
+    return best_import, best_process, heavy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m bench.startup",
+                                     description="Import time of every module in a fresh interpreter")
+    parser.add_argument("--modules", nargs="+", default=SOLVER_MODULES + EXAMPLE_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'module':30s} {'import':>10s} {'process':>10s}  heavy imports")
+    for module in args.modules:
+        seconds, process, heavy = measure(module, args.repeat)
+        results[module] = {"import_ms": 1000 * seconds, "process_ms": 1000 * process, "heavy": heavy}
+        print(f"{module:30s} {1000 * seconds:7.1f} ms {1000 * process:7.1f} ms  {' '.join(heavy) or '-'}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=1)
+    # Solver-only use must stay free of the plotting stack
+    eager = [m for m in args.modules if m in SOLVER_MODULES and results[m]["heavy"]]
+    if eager:
+        print("Solver modules importing plotting libraries:", ", ".join(eager))
+        sys.exit(1)
@@ -0,0 +1,160 @@
+"""Command line entry points, one per algorithm.
+
+Each reads an edge-list file, runs one query of queries.py and prints the
+result as JSON. Only numpy and the solver module are imported unless
+--plot asks for a picture, which loads matplotlib.
+
+    python cli.py max-flow edges.txt 0 99 --directed
+    graph-coloring edges.txt --strategy dsatur --plot colors.png
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from queries import OPERATIONS, jsonable, read_graph
+
+
+def _parser(prog, description):
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    parser.add_argument("path", help="edge list, one \"u v [weight|capacity [cost]]\" per line")
+    parser.add_argument("--columns", type=int, choices=(2, 3, 4),
+                        help="values per line (default: those of the first edge)")
+    parser.add_argument("--directed", action="store_true")
+    return parser
+
+
+def _count_columns(path):
+    with open(path, "rb") as file:
+        for line in file:
+            fields = line.replace(b",", b" ").split()
+            if fields and not fields[0].startswith(b"#"):
+                return len(fields)
+    return 2
+
+
+def _add_plot(parser, what):
+    parser.add_argument("--plot", metavar="PNG", help=f"draw the graph colored by {what}")
+
+
+def _run(op, args, **params):
+    columns = args.columns or _count_columns(args.path)
+    try:
+        graph, cost = read_graph(args.path, columns, args.directed)
+        result = OPERATIONS[op](graph, cost, **params)
+    except (KeyError, ValueError) as exc:
+        sys.exit(f"{op}: {type(exc).__name__}: {exc}")
+    json.dump(result, sys.stdout, default=jsonable)
+    print()
+    return graph, result
+
+
+def _plot(graph, nodes, values, path, cmap, title):
+    from layout import array_graph_layout
+    from render import render_graph
+
+    color = np.full(graph.num_nodes, np.nan)
+    color[np.searchsorted(graph.node_ids, nodes)] = values
+    src, dst, _ = graph.edge_indices()
+    render_graph(array_graph_layout(graph), src, dst, path, node_color=color, cmap=cmap,
+                 title=title)
+
+
+def bfs(argv=None):
+    parser = _parser("graph-bfs", "Breadth-first search order and heights")
+    parser.add_argument("start", type=int)
+    _add_plot(parser, "height")
+    args = parser.parse_args(argv)
+    graph, result = _run("bfs", args, start=args.start)
+    if args.plot:
+        _plot(graph, result["nodes"], result["height"], args.plot, "viridis",
+              f"BFS from node {args.start}")
+
+
+def dfs(argv=None):
+    parser = _parser("graph-dfs", "Depth-first search preorder and depths")
+    parser.add_argument("start", type=int)
+    _add_plot(parser, "depth")
+    args = parser.parse_args(argv)
+    graph, result = _run("dfs", args, start=args.start)
+    if args.plot:
+        _plot(graph, result["nodes"], result["depth"], args.plot, "viridis",
+              f"DFS from node {args.start}")
+
+
+def shortest_paths(argv=None):
+    parser = _parser("graph-shortest-paths", "Shortest path distances from a source")
+    parser.add_argument("source", type=int)
+    parser.add_argument("--target", type=int)
+    parser.add_argument("--method", choices=("dijkstra", "bellman_ford"), default="dijkstra")
+    _add_plot(parser, "distance")
+    args = parser.parse_args(argv)
+    graph, result = _run("shortest_paths", args, source=args.source, target=args.target,
+                         method=args.method)
+    if args.plot and args.target is None:
+        _plot(graph, result["nodes"], result["distances"], args.plot, "magma",
+              f"Distances from node {args.source}")
+
+
+def _flow_parser(prog, description, methods):
+    parser = _parser(prog, description)
+    parser.add_argument("source", type=int)
+    parser.add_argument("sink", type=int)
+    parser.add_argument("--method", choices=methods, default=methods[0])
+    return parser
+
+
+def max_flow(argv=None):
+    parser = _flow_parser("graph-max-flow", "Maximum flow value", ("dinic", "push_relabel"))
+    args = parser.parse_args(argv)
+    _run("max_flow", args, source=args.source, sink=args.sink, method=args.method)
+
+
+def min_cut(argv=None):
+    parser = _flow_parser("graph-min-cut", "Minimum cut: value, source side and cut edges",
+                          ("dinic", "push_relabel"))
+    args = parser.parse_args(argv)
+    _run("min_cut", args, source=args.source, sink=args.sink, method=args.method)
+
+
+def min_cost_flow(argv=None):
+    parser = _flow_parser("graph-min-cost-flow", "Maximum flow of minimum cost",
+                          ("cost_scaling", "ssp", "cycle_cancelling"))
+    args = parser.parse_args(argv)
+    _run("min_cost_flow", args, source=args.source, sink=args.sink, method=args.method)
+
+
+def coloring(argv=None):
+    from coloring import STRATEGIES
+
+    parser = _parser("graph-coloring", "Proper vertex coloring")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="dsatur")
+    _add_plot(parser, "color")
+    args = parser.parse_args(argv)
+    graph, result = _run("coloring", args, strategy=args.strategy)
+    if args.plot:
+        _plot(graph, result["nodes"], result["colors"], args.plot, "rainbow",
+              f"{result['num_colors']} colors ({args.strategy})")
+
+
+COMMANDS = {
+    "bfs": bfs,
+    "dfs": dfs,
+    "shortest-paths": shortest_paths,
+    "max-flow": max_flow,
+    "min-cut": min_cut,
+    "min-cost-flow": min_cost_flow,
+    "coloring": coloring,
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        sys.exit(f"usage: graph-algos {{{','.join(COMMANDS)}}} ...")
+    COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    main()
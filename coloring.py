@@ -0,0 +1,303 @@
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import instrument
+from batch_paths import SharedGraph
+from traversal import gather_ranges
+
+
+def _lists(graph):
+    if graph.directed:
+        raise ValueError("Coloring needs an undirected graph")
+    return graph.offsets.tolist(), graph.neighbors.tolist()
+
+
+def greedy_by_order(graph, order, limit=None, lists=None):
+    """First-fit coloring: every node in `order` gets the smallest color not
+    used by its already colored neighbors.
+
+    With `limit`, gives up and returns None as soon as a node would need
+    color `limit` or higher.
+    """
+    offsets, neighbors = lists or _lists(graph)
+    colors = [-1] * graph.num_nodes
+    for v in order:
+        used = {colors[u] for u in neighbors[offsets[v] : offsets[v + 1]]}
+        c = 0
+        while c in used:
+            c += 1
+        if limit is not None and c >= limit:
+            return None
+        colors[v] = c
+    instrument.count("edges_scanned", offsets[-1])
+    return np.array(colors, dtype=np.int32)
+
+
+def largest_first_order(graph):
+    return np.argsort(-np.diff(graph.offsets), kind="stable").tolist()
+
+
+def smallest_last_order(graph):
+    """Degeneracy order, last removed first, by bucket queue in O(V + E).
+
+    Nodes are kept sorted by current degree in `vert` with `bins[d]` the
+    start of degree d (Batagelj-Zaversnik); removing the node of smallest
+    degree moves each remaining neighbor one bucket down with one swap.
+    """
+    offsets, neighbors = _lists(graph)
+    src = graph.sources()
+    loops = np.bincount(src[src == graph.neighbors], minlength=graph.num_nodes)
+    degree = np.diff(graph.offsets) - loops
+    vert = np.argsort(degree, kind="stable")
+    pos = np.empty_like(vert)
+    pos[vert] = np.arange(len(vert))
+    bins = np.searchsorted(degree[vert], np.arange(degree.max(initial=0) + 1)).tolist()
+    vert, pos, degree = vert.tolist(), pos.tolist(), degree.tolist()
+    for i in range(len(vert)):
+        v = vert[i]
+        dv = degree[v]
+        for u in neighbors[offsets[v] : offsets[v + 1]]:
+            du = degree[u]
+            if du > dv:
+                # Swap u with the first node of its bucket, then shrink the bucket
+                pu, pw = pos[u], bins[du]
+                w = vert[pw]
+                if u != w:
+                    pos[u], pos[w] = pw, pu
+                    vert[pu], vert[pw] = w, u
+                bins[du] += 1
+                degree[u] = du - 1
+    return vert[::-1]
+
+
+def dsatur(graph):
+    """DSATUR: always color the node with the most distinct neighbor colors.
+
+    The neighbor colors of a node are an int bitset whose bits are counted
+    as they are set, and the smallest free color is the lowest zero bit.
+    Candidates sit in a heap keyed by (saturation, degree) with stale entries
+    skipped.
+    """
+    offsets, neighbors = _lists(graph)
+    degree = np.diff(graph.offsets).tolist()
+    n = graph.num_nodes
+    colors = [-1] * n
+    masks = [0] * n
+    saturation = [0] * n  # set bits of masks
+    heap = [(0, -degree[v], v) for v in range(n)]
+    heapq.heapify(heap)
+    pushes = n
+    while heap:
+        key, _, v = heapq.heappop(heap)
+        if colors[v] >= 0 or -key != saturation[v]:
+            continue
+        mask = masks[v]
+        c = (~mask & (mask + 1)).bit_length() - 1
+        colors[v] = c
+        bit = 1 << c
+        for u in neighbors[offsets[v] : offsets[v + 1]]:
+            if colors[u] < 0 and not masks[u] & bit:
+                masks[u] |= bit
+                saturation[u] += 1
+                heapq.heappush(heap, (-saturation[u], -degree[u], u))
+                pushes += 1
+    instrument.count("edges_scanned", offsets[-1])
+    instrument.count("queue_pushes", pushes)
+    return np.array(colors, dtype=np.int32)
+
+
+def _smallest_free(graph, nodes, colors):
+    """Smallest color not used by any colored neighbor, for every node."""
+    offsets = graph.offsets
+    counts = offsets[nodes + 1] - offsets[nodes]
+    owner = np.repeat(np.arange(len(nodes)), counts)
+    used = colors[graph.neighbors[gather_ranges(offsets, nodes)]].astype(np.int64)
+    keep = used >= 0
+    span = int(used.max(initial=0)) + 1
+    key = np.unique(owner[keep] * span + used[keep])
+    owner, used = np.divmod(key, span)
+    # Inside each node's sorted distinct colors, the first color that is
+    # not equal to its rank is the gap; without a gap it is the count
+    free = np.bincount(owner, minlength=len(nodes))
+    first = np.searchsorted(owner, np.arange(len(nodes)))
+    rank = np.arange(len(owner)) - first[owner]
+    gap = used != rank
+    np.minimum.at(free, owner[gap], rank[gap])
+    return free
+
+
+# Shared graph and colors of the current worker process, see _attach_worker
+_worker_graph = None
+_worker_colors = None
+_worker_blocks = None
+
+
+def _attach_worker(spec, colors_name, n):
+    global _worker_graph, _worker_colors, _worker_blocks
+    _worker_graph, blocks = SharedGraph.attach(spec)
+    block = shared_memory.SharedMemory(name=colors_name)
+    _worker_colors = np.ndarray(n, np.int32, buffer=block.buf)
+    _worker_blocks = blocks + [block]
+
+
+def _smallest_free_worker(nodes):
+    return _smallest_free(_worker_graph, nodes, _worker_colors)
+
+
+def jones_plassmann(graph, workers=1, seed=0, min_split=20_000):
+    """Jones-Plassmann coloring in rounds of independent sets.
+
+    Every node gets a random priority. In each round the uncolored nodes
+    whose priority beats all their uncolored neighbors form an independent
+    set, so they can all take their smallest free color at once. Rounds are
+    vectorized; with workers > 1 the color choice of large sets is split
+    across processes that read the graph and colors from shared memory.
+    """
+    _lists(graph)  # undirected check
+    n = graph.num_nodes
+    priority = np.random.default_rng(seed).permutation(n)
+    colors_block = shared_memory.SharedMemory(create=True, size=max(4 * n, 1))
+    colors = np.ndarray(n, np.int32, buffer=colors_block.buf)
+    colors[:] = -1
+    shared = SharedGraph(graph) if workers > 1 else None
+    pool = None
+    if shared is not None:
+        pool = ProcessPoolExecutor(
+            workers, initializer=_attach_worker, initargs=(shared.spec, colors_block.name, n)
+        )
+    try:
+        src, dst = graph.sources(), graph.neighbors
+        src, dst = src[src != dst], dst[src != dst]  # a self-loop would block forever
+        uncolored = np.ones(n, dtype=bool)
+        while uncolored.any():
+            # Only edges between uncolored nodes can block a node
+            keep = uncolored[src] & uncolored[dst]
+            src, dst = src[keep], dst[keep]
+            best = np.full(n, -1, dtype=priority.dtype)
+            np.maximum.at(best, src, priority[dst])
+            chosen = np.flatnonzero(uncolored & (priority > best))
+            if pool is not None and len(chosen) >= min_split:
+                parts = np.array_split(chosen, workers)
+                colors[chosen] = np.concatenate(list(pool.map(_smallest_free_worker, parts)))
+            else:
+                colors[chosen] = _smallest_free(graph, chosen, colors)
+            uncolored[chosen] = False
+            instrument.count("edges_scanned", len(src))
+        return colors.copy()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+            shared.close()
+        del colors
+        colors_block.close()
+        colors_block.unlink()
+
+
+def tabucol(graph, colors, k, max_iterations=100_000, seed=0, stop=None):
+    """Try to turn `colors` into a proper k-coloring by tabu search (TabuCol).
+
+    Nodes colored k or higher first move to random colors below k. Every
+    iteration then moves one conflicting node to the color that removes the
+    most conflicts among the moves that are not tabu (or that reach a new
+    best), and forbids moving it back for L + 0.6 * conflicting nodes
+    iterations with L random in 0..9. gamma[v, c] counts the neighbors of v
+    colored c, so a move costs one row update per neighbor. Returns the
+    k-coloring, or None once `max_iterations` run out or `stop()` is true.
+    """
+    rng = np.random.default_rng(seed)
+    n = graph.num_nodes
+    src, dst = graph.sources(), graph.neighbors
+    src, dst = src[src != dst], dst[src != dst]
+    colors = colors.astype(np.int64)
+    high = colors >= k
+    colors[high] = rng.integers(0, k, np.count_nonzero(high))
+
+    gamma = np.zeros((n, k), dtype=np.int32)
+    np.add.at(gamma, (src, colors[dst]), 1)
+    tabu = np.zeros((n, k), dtype=np.int64)
+    nodes = np.arange(n)
+    conflicts = int(gamma[nodes, colors].sum()) // 2
+    best = conflicts
+    offsets, neighbors = graph.offsets, graph.neighbors
+    for it in range(max_iterations):
+        if conflicts == 0:
+            return colors.astype(np.int32)
+        if it % 64 == 0 and stop is not None and stop():
+            return None
+        bad = np.flatnonzero(gamma[nodes, colors] > 0)
+        rows = np.arange(len(bad))
+        current = colors[bad]
+        delta = gamma[bad] - gamma[bad, current][:, None]
+        allowed = (tabu[bad] <= it) | (conflicts + delta < best)
+        allowed[rows, current] = False
+        if not allowed.any():
+            continue
+        delta = np.where(allowed, delta, np.iinfo(np.int32).max)
+        moves = np.flatnonzero(delta == delta.min())
+        i, c = divmod(int(rng.choice(moves)), k)
+        v, old = int(bad[i]), int(current[i])
+        near = neighbors[offsets[v] : offsets[v + 1]]
+        near = near[near != v]
+        gamma[near, old] -= 1
+        gamma[near, c] += 1
+        colors[v] = c
+        conflicts += int(delta[i, c])
+        best = min(best, conflicts)
+        tabu[v, old] = it + rng.integers(10) + int(0.6 * len(bad))
+    return None
+
+
+STRATEGIES = ("largest_first", "smallest_last", "random_sequential", "dsatur", "jones_plassmann")
+
+
+def color_graph(graph, strategy="dsatur", seed=0, workers=1):
+    """Colors of all nodes (aligned with graph.node_ids) by `strategy`."""
+    with instrument.phase(f"coloring_{strategy}"):
+        if strategy == "largest_first":
+            return greedy_by_order(graph, largest_first_order(graph))
+        if strategy == "smallest_last":
+            return greedy_by_order(graph, smallest_last_order(graph))
+        if strategy == "random_sequential":
+            order = np.random.default_rng(seed).permutation(graph.num_nodes).tolist()
+            return greedy_by_order(graph, order)
+        if strategy in ("dsatur", "saturation_largest_first"):
+            return dsatur(graph)
+        if strategy == "jones_plassmann":
+            return jones_plassmann(graph, workers, seed)
+        raise ValueError(f"Unknown strategy {strategy!r}")
+
+
+def coloring_dict(graph, colors):
+    """{node id: color}, the format of nx.coloring.greedy_color."""
+    return dict(zip(graph.node_ids.tolist(), colors.tolist()))
+
+
+def is_proper(graph, colors):
+    src, dst = graph.sources(), graph.neighbors
+    loops = src == dst
+    return bool(np.all(colors[src[~loops]] != colors[dst[~loops]]))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from shortest_paths import random_weighted_graph
+
+    parser = argparse.ArgumentParser(description="Graph coloring benchmark")
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    graph = random_weighted_graph(args.nodes, args.edges)
+    print(f"n={graph.num_nodes}, {graph.num_edges} edges")
+    for strategy in STRATEGIES:
+        start = time.perf_counter()
+        colors = color_graph(graph, strategy, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        assert is_proper(graph, colors)
+        print(f"{strategy}: {colors.max() + 1} colors in {elapsed:.2f}s")
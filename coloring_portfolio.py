@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from batch_paths import SharedGraph
+from coloring import _lists, color_graph, dsatur, greedy_by_order, tabucol
+
+GREEDY = ("largest_first", "smallest_last", "dsatur", "jones_plassmann")
+
+# Per-worker state, see _init_worker: the shared graph and the best color
+# count found by any run so far
+_graph = None
+_blocks = None
+_best = None
+
+
+def _init_worker(spec, best):
+    global _graph, _blocks, _best
+    _graph, _blocks = SharedGraph.attach(spec)
+    _best = best
+
+
+def _publish(colors):
+    k = int(colors.max(initial=-1)) + 1
+    with _best.get_lock():
+        if k < _best.value:
+            _best.value = k
+    return k
+
+
+def _result(name, colors, start, found_at, **counters):
+    return {
+        "strategy": name,
+        "colors": colors,
+        "num_colors": None if colors is None else int(colors.max(initial=-1)) + 1,
+        "elapsed": time.time() - start,
+        "found_at": found_at,
+        **counters,
+    }
+
+
+def _run_greedy(strategy, deadline):
+    start = time.time()
+    colors = color_graph(_graph, strategy)
+    _publish(colors)
+    return _result(strategy, colors, start, time.time())
+
+
+def _run_restarts(seed, deadline):
+    """random_sequential until the deadline; a restart is dropped as soon as
+    it cannot beat the best count of the whole portfolio."""
+    start = time.time()
+    rng = np.random.default_rng(seed)
+    lists = _lists(_graph)
+    colors = found_at = None
+    restarts = stopped = 0
+    while time.time() < deadline:
+        order = rng.permutation(_graph.num_nodes).tolist()
+        result = greedy_by_order(_graph, order, limit=_best.value - 1, lists=lists)
+        restarts += 1
+        if result is None:
+            stopped += 1
+            continue
+        colors, found_at = result, time.time()
+        _publish(colors)
+    return _result("random_sequential", colors, start, found_at,
+                   restarts=restarts, stopped_early=stopped)
+
+
+def _run_tabucol(seed, deadline, iterations=20_000):
+    """DSATUR, then TabuCol for one color less than the portfolio's best,
+    retargeting whenever another run gets there first."""
+    start = time.time()
+    colors = dsatur(_graph)
+    found_at = time.time()
+    k = _publish(colors)
+    attempts = 0
+    while time.time() < deadline:
+        target = min(k, _best.value) - 1
+        if target < 1:
+            break
+        attempts += 1
+        result = tabucol(
+            _graph, colors, target, iterations, seed + attempts,
+            stop=lambda: time.time() >= deadline or _best.value <= target,
+        )
+        if result is not None:
+            colors, found_at = result, time.time()
+            k = _publish(colors)
+    return _result("tabucol", colors, start, found_at, attempts=attempts)
+
+
+def portfolio_coloring(graph, budget=10.0, workers=None, restarts=None, seed=0):
+    """Fewest-color coloring found within `budget` seconds, and telemetry.
+
+    Greedy strategies, randomized random_sequential restarts and a TabuCol
+    improver run in a process pool on the graph in shared memory. They share
+    the best color count in a multiprocessing.Value, which cuts restarts
+    short and sets TabuCol's target. Runs stop shortly before the deadline;
+    the pool is terminated at the deadline, so unfinished runs are dropped.
+
+    Returns (colors, telemetry) where telemetry has one dict per run with
+    its strategy, num_colors (None if unfinished or nothing found), elapsed
+    and found_at seconds since the start, and run specific counters.
+    """
+    workers = workers or max(2, os.cpu_count())
+    restarts = max(1, workers - 1) if restarts is None else restarts
+    start = time.time()
+    deadline = start + budget
+    stop_at = deadline - min(0.5, 0.1 * budget)  # time to send results back
+
+    tasks = [(strategy, _run_greedy, strategy) for strategy in GREEDY]
+    tasks.append(("tabucol", _run_tabucol, seed))
+    tasks += [("random_sequential", _run_restarts, seed + 1 + i) for i in range(restarts)]
+
+    best = multiprocessing.Value("i", graph.num_nodes + 1)
+    telemetry = []
+    with SharedGraph(graph) as shared:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(shared.spec, best))
+        try:
+            pending = [(name, pool.apply_async(fn, (arg, stop_at))) for name, fn, arg in tasks]
+            for name, result in pending:
+                try:
+                    telemetry.append(result.get(timeout=max(0.0, deadline - time.time())))
+                except multiprocessing.TimeoutError:
+                    telemetry.append({"strategy": name, "colors": None, "num_colors": None,
+                                      "elapsed": None, "found_at": None})
+        finally:
+            pool.terminate()
+            pool.join()
+
+    done = [run for run in telemetry if run["num_colors"] is not None]
+    if not done:
+        raise TimeoutError(f"No coloring found within {budget}s")
+    winner = min(done, key=lambda run: (run["num_colors"], run["found_at"]))
+    for run in telemetry:
+        if run["found_at"] is not None:
+            run["found_at"] -= start
+    return winner["colors"], [{k: v for k, v in run.items() if k != "colors"} for run in telemetry]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from coloring import is_proper
+    from shortest_paths import random_weighted_graph
+
+    parser = argparse.ArgumentParser(description="Graph coloring portfolio")
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--edges", type=int, default=20_000)
+    parser.add_argument("--budget", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    graph = random_weighted_graph(args.nodes, args.edges)
+    start = time.time()
+    colors, telemetry = portfolio_coloring(graph, args.budget, args.workers)
+    elapsed = time.time() - start
+    assert is_proper(graph, colors)
+    print(f"n={graph.num_nodes}, {graph.num_edges} edges: "
+          f"{colors.max() + 1} colors in {elapsed:.2f}s (budget {args.budget}s)")
+    for run in telemetry:
+        print(run)
@@ -0,0 +1,317 @@
+import heapq
+
+import numpy as np
+
+INF = float("inf")
+
+
+def _witness_search(out_edges, source, skip, limit, max_settled):
+    """Distances from `source` avoiding node `skip`, up to `limit`.
+
+    The search also gives up after `max_settled` nodes, so the distances are
+    upper bounds: a witness it finds is a real path, a missing one only
+    costs an extra shortcut.
+    """
+    dist = {source: 0}
+    heap = [(0, source)]
+    settled = 0
+    while heap and settled < max_settled:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > limit:
+            break
+        settled += 1
+        for v, (w, _) in out_edges[u].items():
+            nd = d + w
+            if v != skip and nd < dist.get(v, INF):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def _shortcuts(x, out_edges, in_edges, max_settled):
+    """Shortcuts (u, v, weight) needed to contract x from the remaining graph."""
+    shortcuts = []
+    for u, (w_in, _) in in_edges[x].items():
+        targets = {v: w_in + w_out for v, (w_out, _) in out_edges[x].items() if v != u}
+        if not targets:
+            continue
+        dist = _witness_search(out_edges, u, x, max(targets.values()), max_settled)
+        for v, weight in targets.items():
+            if dist.get(v, INF) > weight:
+                shortcuts.append((u, v, weight))
+    return shortcuts
+
+
+def _to_csr(lists):
+    counts = np.array([len(edges) for edges in lists], dtype=np.int64)
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    edges = [edge for edges in lists for edge in edges]
+    heads, weights, via = zip(*edges) if edges else ((), (), ())
+    return (
+        offsets,
+        np.array(heads, dtype=np.int32),
+        np.array(weights),
+        np.array(via, dtype=np.int32),
+    )
+
+
+class ContractionHierarchy:
+    """Contraction-hierarchy index over an ArrayGraph, and its query engine.
+
+    Nodes are contracted one by one in rank order; contracting x adds a
+    shortcut u -> v (remembering x as its middle node) for every u -> x -> v
+    that is the only shortest path between u and v in the remaining graph.
+    An s-t query is then two Dijkstra searches that only go up in rank:
+    forward from s over `up` edges, backward from t over `down` edges
+    stored at their lower endpoint.
+
+    up[x] holds (v, w, via) for x -> v and down[x] holds (u, w, via) for
+    u -> x, with rank[v] and rank[u] above rank[x]; via is the contracted
+    middle node of a shortcut and -1 for an original edge.
+    """
+
+    def __init__(self, node_ids, rank, up, down):
+        self.node_ids = node_ids
+        self.rank = rank
+        self.up = up  # CSR (offsets, heads, weights, via)
+        self.down = down
+        # Python lists for the query loops, see shortest_paths._csr_lists
+        self._up = [array.tolist() for array in up]
+        self._down = [array.tolist() for array in down]
+
+    @property
+    def num_shortcuts(self):
+        return int(np.count_nonzero(self.up[3] >= 0) + np.count_nonzero(self.down[3] >= 0))
+
+    @property
+    def nbytes(self):
+        arrays = (self.node_ids, self.rank, *self.up, *self.down)
+        return sum(array.nbytes for array in arrays)
+
+    @classmethod
+    def build(cls, graph, max_settled=100):
+        """Contract all nodes of `graph`, cheapest edge difference first.
+
+        The edge difference of x is the number of shortcuts contracting it
+        would add minus the edges it removes, plus the number of its already
+        contracted neighbors to spread contraction evenly. Priorities are
+        updated lazily: a popped node is re-evaluated and put back if it is
+        no longer the cheapest.
+        """
+        n = graph.num_nodes
+        out_edges = [{} for _ in range(n)]
+        in_edges = [{} for _ in range(n)]
+        weights = graph.weights.tolist() if graph.weights is not None else None
+        for i, (u, v) in enumerate(zip(graph.sources().tolist(), graph.neighbors.tolist())):
+            if u != v:
+                w = weights[i] if weights is not None else 1
+                out_edges[u][v] = in_edges[v][u] = (w, -1)
+
+        deleted = [0] * n
+
+        def evaluate(x):
+            shortcuts = _shortcuts(x, out_edges, in_edges, max_settled)
+            degree = len(out_edges[x]) + len(in_edges[x])
+            return len(shortcuts) - degree + deleted[x], shortcuts
+
+        heap = [(evaluate(x)[0], x) for x in range(n)]
+        heapq.heapify(heap)
+        rank = np.empty(n, dtype=np.int64)
+        up = [None] * n
+        down = [None] * n
+        for order in range(n):
+            while True:
+                _, x = heapq.heappop(heap)
+                priority, shortcuts = evaluate(x)
+                if not heap or priority <= heap[0][0]:
+                    break
+                heapq.heappush(heap, (priority, x))
+
+            rank[x] = order
+            up[x] = [(v, w, via) for v, (w, via) in out_edges[x].items()]
+            down[x] = [(u, w, via) for u, (w, via) in in_edges[x].items()]
+            for v in out_edges[x]:
+                del in_edges[v][x]
+                deleted[v] += 1
+            for u in in_edges[x]:
+                del out_edges[u][x]
+                deleted[u] += 1
+            for u, v, w in shortcuts:
+                if w < out_edges[u].get(v, (INF,))[0]:
+                    out_edges[u][v] = in_edges[v][u] = (w, x)
+            out_edges[x] = in_edges[x] = None
+        return cls(np.asarray(graph.node_ids), rank, _to_csr(up), _to_csr(down))
+
+    def save(self, path):
+        """Write the index to the binary .npz file `path`."""
+        arrays = {"node_ids": self.node_ids, "rank": self.rank}
+        for name, csr in (("up", self.up), ("down", self.down)):
+            for field, array in zip(("offsets", "heads", "weights", "via"), csr):
+                arrays[f"{name}_{field}"] = array
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+
+            def csr(name):
+                return tuple(data[f"{name}_{f}"] for f in ("offsets", "heads", "weights", "via"))
+
+            return cls(data["node_ids"], data["rank"], csr("up"), csr("down"))
+
+    def _index_of(self, node):
+        i = int(np.searchsorted(self.node_ids, node))
+        if i == len(self.node_ids) or self.node_ids[i] != node:
+            raise KeyError(node)
+        return i
+
+    def search(self, s, t):
+        """(distance, meeting node, forward parents, backward parents, settled).
+
+        s and t are dense indices. A node is stalled instead of expanded when
+        a higher-ranked node already reaches it more cheaply (stall-on-demand).
+        """
+        graphs = (self._up, self._down)
+        dist = ({s: 0}, {t: 0})
+        parent = ({s: None}, {t: None})
+        heaps = ([(0, s)], [(0, t)])
+        done = [False, False]
+        best, meet, settled = INF, -1, 0
+        side = 1
+        while not (done[0] and done[1]):
+            if not done[1 - side]:
+                side = 1 - side
+            heap = heaps[side]
+            if not heap or heap[0][0] >= best:
+                done[side] = True
+                continue
+            d, u = heapq.heappop(heap)
+            near = dist[side]
+            if d > near[u]:
+                continue
+            settled += 1
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best, meet = d + other, u
+
+            # Stall: an edge from a higher node into u in this search's direction
+            offsets, heads, weights, _ = graphs[1 - side]
+            if any(
+                near.get(heads[i], INF) + weights[i] < d
+                for i in range(offsets[u], offsets[u + 1])
+            ):
+                continue
+            offsets, heads, weights, _ = graphs[side]
+            for i in range(offsets[u], offsets[u + 1]):
+                v = heads[i]
+                nd = d + weights[i]
+                if nd < near.get(v, INF):
+                    near[v] = nd
+                    parent[side][v] = (u, i)
+                    heapq.heappush(heap, (nd, v))
+        return best, meet, parent[0], parent[1], settled
+
+    def distance(self, source, target):
+        """s -> t distance by node id, inf if there is no path."""
+        return self.search(self._index_of(source), self._index_of(target))[0]
+
+    def path(self, source, target):
+        """(distance, [node ids]) with all shortcuts unpacked; the path is
+        None if there is none."""
+        s, t = self._index_of(source), self._index_of(target)
+        best, meet, forward, backward, _ = self.search(s, t)
+        if best == INF:
+            return best, None
+
+        up_via, down_via = self._up[3], self._down[3]
+        # Edges s -> meet from the forward parents, meet -> t from the backward ones
+        edges = []
+        node = meet
+        while forward[node] is not None:
+            u, i = forward[node]
+            edges.append((u, node, up_via[i]))
+            node = u
+        edges.reverse()
+        node = meet
+        while backward[node] is not None:
+            v, i = backward[node]
+            edges.append((node, v, down_via[i]))
+            node = v
+
+        path = [s]
+        stack = edges[::-1]
+        while stack:
+            a, b, via = stack.pop()
+            if via < 0:
+                path.append(b)
+            else:
+                # a -> via is stored at via as a down edge, via -> b as an up edge
+                stack.append((via, b, self._via_of(self._up, via, b)))
+                stack.append((a, via, self._via_of(self._down, via, a)))
+        return best, self.node_ids[path].tolist()
+
+    @staticmethod
+    def _via_of(csr, x, head):
+        offsets, heads, _, via = csr
+        for i in range(offsets[x], offsets[x + 1]):
+            if heads[i] == head:
+                return via[i]
+        raise KeyError((x, head))
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+    import time
+
+    from shortest_paths import dijkstra, grid_graph, random_geometric_graph
+
+    parser = argparse.ArgumentParser(description="Contraction hierarchy benchmark")
+    parser.add_argument("--grid", type=int, nargs=2, default=(100, 100))
+    parser.add_argument("--geometric-nodes", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--check", type=int, default=50, help="queries checked against Dijkstra")
+    args = parser.parse_args()
+
+    graphs = {
+        "grid": grid_graph(*args.grid),
+        "directed grid": grid_graph(*args.grid, directed=True),
+        "random geometric": random_geometric_graph(
+            args.geometric_nodes, 1.5 / np.sqrt(args.geometric_nodes)
+        ),
+    }
+    rng = np.random.default_rng(1)
+    for name, graph in graphs.items():
+        start = time.perf_counter()
+        ch = ContractionHierarchy.build(graph)
+        build_time = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "index.npz")
+            ch.save(path)
+            file_size = os.path.getsize(path)
+            ch = ContractionHierarchy.load(path)
+        print(f"{name}: n={graph.num_nodes}, {graph.num_edges} edges, built in {build_time:.2f}s, "
+              f"{ch.num_shortcuts} shortcuts, index {file_size / 2**20:.1f} MiB")
+
+        pairs = graph.node_ids[rng.integers(graph.num_nodes, size=(args.queries, 2))].tolist()
+        for s, t in pairs[: args.check]:
+            expected = dijkstra(graph, graph.index_of(s))[graph.index_of(t)]
+            distance, path = ch.path(s, t)
+            assert distance == expected, (s, t, distance, expected)
+            length = sum(
+                graph.weights[graph.offsets[a] + np.searchsorted(graph.neighbors_of(a), b)]
+                for a, b in zip(map(graph.index_of, path), map(graph.index_of, path[1:]))
+            )
+            assert path[0] == s and path[-1] == t and length == distance
+
+        settled = 0
+        start = time.perf_counter()
+        for s, t in pairs:
+            settled += ch.search(ch._index_of(s), ch._index_of(t))[4]
+        elapsed = time.perf_counter() - start
+        print(f"  {1000 * elapsed / len(pairs):.3f} ms/query, "
+              f"{settled / len(pairs):.0f} nodes settled")
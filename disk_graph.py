@@ -0,0 +1,461 @@
+import heapq
+import json
+import mmap
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+import instrument
+from array_graph import ArrayGraph
+from edge_loader import iter_chunks
+
+PAGE_SIZE = mmap.PAGESIZE
+FORMAT_VERSION = 1
+
+
+class _Column:
+    """One memory-mapped array of a DiskGraph with page accounting.
+
+    Every read records the pages it touches: `touches` counts them per read
+    and `seen` marks every page ever read. Once more than `max_resident`
+    bytes were touched since the last release, the mapping is dropped from
+    the process with MADV_DONTNEED, so resident memory stays bounded; the
+    pages fault back in from the OS page cache when read again.
+    """
+
+    def __init__(self, name, path, dtype, length, max_resident):
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.length = length
+        self.array = (np.memmap(path, self.dtype, "r", shape=(length,)) if length
+                      else np.zeros(0, self.dtype))
+        self.per_page = max(PAGE_SIZE // self.dtype.itemsize, 1)
+        self.num_pages = -(-length // self.per_page)
+        self.max_pages = max(max_resident // PAGE_SIZE, 1)
+        self.touches = 0
+        self.seen = np.zeros(self.num_pages, dtype=bool)
+        self._resident = 0
+
+    def __len__(self):
+        return self.length
+
+    def _touch(self, pages):
+        self.touches += len(pages)
+        self.seen[pages] = True
+        instrument.count(f"pages_{self.name}", len(pages))
+        self._resident += len(pages)
+        if self._resident > self.max_pages:
+            self.release()
+
+    def release(self):
+        """Drop the mapped pages from the process's resident memory."""
+        if self.length and hasattr(mmap, "MADV_DONTNEED"):
+            self.array._mmap.madvise(mmap.MADV_DONTNEED)
+        self._resident = 0
+
+    def take(self, index):
+        """Values at the dense positions `index`, as an in-memory array."""
+        index = np.asarray(index, dtype=np.int64)
+        self._touch(np.unique(index // self.per_page))
+        return np.asarray(self.array[index])
+
+    def read(self, start, stop):
+        """Values in [start, stop) as an in-memory array."""
+        if stop > start:
+            self._touch(np.arange(start // self.per_page, (stop - 1) // self.per_page + 1))
+        return np.array(self.array[start:stop])
+
+
+class DiskGraph:
+    """CSR graph stored in a directory of raw, memory-mapped columns.
+
+    header.json describes the graph and every column: offsets (int64,
+    n + 1), neighbors (int32) and one array per value column such as
+    "weight" or "capacity", parallel to neighbors. Rows are sorted by
+    (node, neighbor) like ArrayGraph, so small graphs convert both ways.
+    Node-sized state (node ids, visited flags, distances) lives in memory;
+    edge data is only read through _Column, which counts pages and keeps
+    at most `max_resident` bytes of each column mapped in.
+    """
+
+    def __init__(self, path, max_resident=64 * 2**20):
+        self.path = path
+        with open(os.path.join(path, "header.json")) as file:
+            self.header = json.load(file)
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported disk graph version")
+        self.directed = self.header["directed"]
+        self.columns = {
+            name: _Column(name, os.path.join(path, f"{name}.bin"), dtype, length, max_resident)
+            for name, (dtype, length) in self.header["arrays"].items()
+        }
+        self.node_ids = np.fromfile(os.path.join(path, "node_ids.bin"),
+                                    self.header["node_ids_dtype"])
+        self.offsets = self.columns["offsets"]
+        self.neighbors = self.columns["neighbors"]
+
+    @classmethod
+    def build(cls, file_path, path, columns=(), directed=False, memory=256 * 2**20):
+        """Write the edge list `file_path` as a disk graph at `path`.
+
+        Lines are "u v" followed by one value per name in `columns` (e.g.
+        ("weight",) or ("capacity", "weight")). An external-memory sort
+        keeps about `memory` bytes of edges in RAM: the text is parsed in
+        chunks that become sorted runs on disk, then every range of nodes
+        whose edges fit the budget is merged from slices of all the runs
+        and appended to the CSR columns. Parallel edges are dropped like
+        ArrayGraph does, the last one wins. Only node ids are held whole.
+        """
+        width = 2 + len(columns)
+        chunk_size = max(memory // 8, 1 << 16)  # parsed int64 rows take ~3x the text
+        os.makedirs(path, exist_ok=True)
+        header_path = os.path.join(path, "header.json")
+        if os.path.exists(header_path):
+            os.remove(header_path)  # invalidate before overwriting the columns
+        runs_dir = os.path.join(path, "runs")
+        os.makedirs(runs_dir, exist_ok=True)
+        try:
+            with instrument.phase("scan_ids"):
+                node_ids = np.zeros(0, dtype=np.int64)
+                for chunk in iter_chunks(file_path, width, chunk_size):
+                    node_ids = np.union1d(node_ids, chunk[:, :2])
+            n = len(node_ids)
+            with instrument.phase("sort_runs"):
+                runs, counts = _write_runs(file_path, runs_dir, node_ids, columns, directed,
+                                           chunk_size)
+            with instrument.phase("merge_runs"):
+                length = _merge_runs(path, runs, counts, n, columns, memory // (16 + 8 * width))
+        finally:
+            shutil.rmtree(runs_dir, ignore_errors=True)
+
+        node_ids.tofile(os.path.join(path, "node_ids.bin"))
+        arrays = {"offsets": ("int64", n + 1), "neighbors": ("int32", length)}
+        arrays.update({name: ("int64", length) for name in columns})
+        header = {
+            "version": FORMAT_VERSION,
+            "num_nodes": n,
+            "num_entries": length,
+            "directed": directed,
+            "node_ids_dtype": "int64",
+            "arrays": arrays,
+        }
+        # The header is written last, so a half-built graph never opens
+        with open(header_path, "w") as file:
+            json.dump(header, file, indent=2)
+        return cls(path)
+
+    @classmethod
+    def from_array_graph(cls, graph, path, columns=None):
+        """Write an in-memory ArrayGraph; `columns` maps names to arrays
+        parallel to graph.neighbors (default its weights as "weight")."""
+        if columns is None:
+            columns = {} if graph.weights is None else {"weight": graph.weights}
+        os.makedirs(path, exist_ok=True)
+        arrays = {"offsets": graph.offsets.astype(np.int64),
+                  "neighbors": graph.neighbors.astype(np.int32)}
+        arrays.update({name: np.asarray(values) for name, values in columns.items()})
+        for name, values in arrays.items():
+            values.tofile(os.path.join(path, f"{name}.bin"))
+        node_ids = np.asarray(graph.node_ids)
+        node_ids.tofile(os.path.join(path, "node_ids.bin"))
+        header = {
+            "version": FORMAT_VERSION,
+            "num_nodes": graph.num_nodes,
+            "num_entries": len(graph.neighbors),
+            "directed": graph.directed,
+            "node_ids_dtype": node_ids.dtype.str,
+            "arrays": {name: (values.dtype.str, len(values)) for name, values in arrays.items()},
+        }
+        with open(os.path.join(path, "header.json"), "w") as file:
+            json.dump(header, file, indent=2)
+        return cls(path)
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def weights(self):
+        return self.columns.get("weight")
+
+    def column(self, name):
+        return self.columns[name]
+
+    def index_of(self, node):
+        i = int(np.searchsorted(self.node_ids, node))
+        if i == self.num_nodes or self.node_ids[i] != node:
+            raise KeyError(node)
+        return i
+
+    def _row(self, i):
+        start, stop = self.offsets.read(i, i + 2).tolist()
+        return start, stop
+
+    def degree(self, i):
+        start, stop = self._row(i)
+        return stop - start
+
+    def neighbors_of(self, i):
+        return self.neighbors.read(*self._row(i))
+
+    def to_array_graph(self):
+        """The whole graph in memory, for graphs that fit."""
+        weights = self.weights
+        return ArrayGraph(
+            self.offsets.read(0, len(self.offsets)),
+            self.neighbors.read(0, len(self.neighbors)),
+            self.node_ids,
+            None if weights is None else weights.read(0, len(weights)),
+            self.directed,
+        )
+
+    def bfs_levels(self, root, batch=1 << 20):
+        """traversal.bfs_levels over the disk graph, same visit order.
+
+        Frontiers are expanded `batch` edges at a time, so only that many
+        neighbor entries are in memory at once.
+        """
+        visited = np.zeros(self.num_nodes, dtype=bool)
+        visited[root] = True
+        frontier = np.array([root], dtype=np.int64)
+        visit = [frontier]
+        level = [np.zeros(1, dtype=np.int64)]
+        h = 0
+        while len(frontier):
+            starts = self.offsets.take(frontier)
+            counts = self.offsets.take(frontier + 1) - starts
+            ends = np.cumsum(counts)
+            found = []
+            first = 0
+            while first < len(frontier):
+                # Frontier nodes whose edges fit in one batch (at least one node)
+                last = max(int(np.searchsorted(ends, ends[first] - counts[first] + batch, "right")),
+                           first + 1)
+                c = counts[first:last]
+                shift = starts[first:last] - (np.cumsum(c) - c)
+                index = np.arange(int(c.sum()), dtype=np.int64) + np.repeat(shift, c)
+                candidates = self.neighbors.take(index)
+                instrument.count("edges_scanned", len(candidates))
+                candidates = candidates[~visited[candidates]]
+                nodes, position = np.unique(candidates, return_index=True)
+                nodes = nodes[np.argsort(position, kind="stable")].astype(np.int64)
+                visited[nodes] = True
+                found.append(nodes)
+                first = last
+            frontier = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+            h += 1
+            instrument.count("queue_pushes", len(frontier))
+            visit.append(frontier)
+            level.append(np.full(len(frontier), h, dtype=np.int64))
+        return np.concatenate(visit), np.concatenate(level)
+
+    def _block_reader(self, i, block):
+        # Neighbors of node i, read `block` entries at a time
+        start, stop = self._row(i)
+        for first in range(start, stop, block):
+            yield from self.neighbors.read(first, min(first + block, stop)).tolist()
+
+    def dfs_preorder(self, root, block=256):
+        """traversal.dfs_preorder over the disk graph, same preorder.
+
+        Each stack frame reads its neighbor list `block` entries at a time,
+        so memory grows with the DFS depth, not with the degrees.
+        """
+        visited = bytearray(self.num_nodes)
+        visited[root] = 1
+        visit = [root]
+        depth = [0]
+        stack = [self._block_reader(root, block)]
+        while stack:
+            for v in stack[-1]:
+                if not visited[v]:
+                    visited[v] = 1
+                    visit.append(v)
+                    depth.append(len(stack))
+                    stack.append(self._block_reader(v, block))
+                    break
+            else:
+                stack.pop()
+        instrument.count("queue_pushes", len(visit))
+        return np.array(visit, dtype=np.int64), np.array(depth, dtype=np.int64)
+
+    def dijkstra(self, source, weight="weight"):
+        """shortest_paths.dijkstra over the disk graph: float64 distances.
+
+        Every settled node reads its row of neighbors and weights from the
+        mapped columns; the distance array and the heap are in memory.
+        """
+        weights = self.columns.get(weight)
+        dist = array("d", [np.inf]) * self.num_nodes  # compact, and fast to index
+        dist[source] = 0
+        heap = [(0, source)]
+        pushes = 1
+        scanned = 0
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            start, stop = self._row(u)
+            heads = self.neighbors.read(start, stop).tolist()
+            costs = weights.read(start, stop).tolist() if weights is not None else [1] * len(heads)
+            scanned += len(heads)
+            for v, w in zip(heads, costs):
+                nd = d + w
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+                    pushes += 1
+        instrument.count("edges_scanned", scanned)
+        instrument.count("relaxations", pushes - 1)
+        instrument.count("queue_pushes", pushes)
+        return np.frombuffer(dist, dtype=np.float64)
+
+    def page_stats(self):
+        """{column: reads in pages, distinct pages read, pages in total}."""
+        return {
+            name: {"touches": c.touches, "distinct": int(c.seen.sum()), "pages": c.num_pages}
+            for name, c in self.columns.items()
+        }
+
+    def reset_page_stats(self):
+        for c in self.columns.values():
+            c.touches = 0
+            c.seen[:] = False
+            c.release()
+
+
+def _write_runs(file_path, runs_dir, node_ids, columns, directed, chunk_size):
+    """Sorted runs of (u, v, edge number, values...), one per parsed chunk,
+    and the number of entries of every node before deduplication."""
+    counts = np.zeros(len(node_ids), dtype=np.int64)
+    runs = []
+    seq = 0
+    for chunk in iter_chunks(file_path, 2 + len(columns), chunk_size):
+        u = np.searchsorted(node_ids, chunk[:, 0]).astype(np.int32)
+        v = np.searchsorted(node_ids, chunk[:, 1]).astype(np.int32)
+        edge = np.arange(seq, seq + len(chunk), dtype=np.int64)
+        values = [chunk[:, 2 + k] for k in range(len(columns))]
+        seq += len(chunk)
+        del chunk
+        if not directed:
+            u, v = np.concatenate([u, v]), np.concatenate([v, u])
+            edge = np.concatenate([edge, edge])
+            values = [np.concatenate([x, x]) for x in values]
+        order = np.lexsort((edge, v, u))
+        run = {"u": u[order], "v": v[order], "edge": edge[order]}
+        run.update({name: x[order] for name, x in zip(columns, values)})
+        counts += np.bincount(run["u"], minlength=len(node_ids))
+        files = {}
+        for name, values in run.items():
+            files[name] = os.path.join(runs_dir, f"{len(runs)}.{name}.bin")
+            values.tofile(files[name])
+        runs.append((len(order), {name: (files[name], run[name].dtype) for name in run}))
+    return runs, counts
+
+
+def _merge_runs(path, runs, counts, num_nodes, columns, rows):
+    """Merge the runs into the CSR columns, `rows` entries per node range.
+
+    Each run is sorted by node, so the entries of a node range are one
+    slice of every run. Returns the number of entries written.
+    """
+    maps = [{name: np.memmap(file, dtype, "r", shape=(length,)) if length else np.zeros(0, dtype)
+             for name, (file, dtype) in files.items()} for length, files in runs]
+    outputs = {name: open(os.path.join(path, f"{name}.bin"), "wb")
+               for name in ("neighbors",) + tuple(columns)}
+    degree = np.zeros(num_nodes, dtype=np.int64)
+    ends = np.cumsum(counts)
+    written = 0
+    try:
+        a = 0
+        while a < num_nodes:
+            # The next node range of about `rows` entries, at least one node
+            b = max(int(np.searchsorted(ends, ends[a] - counts[a] + rows, "right")), a + 1)
+            slices = [(run, *np.searchsorted(run["u"], [a, b])) for run in maps]
+            merged = {name: np.concatenate([run[name][lo:hi] for run, lo, hi in slices])
+                      for name in runs[0][1]} if runs else {}
+            if merged and len(merged["u"]):
+                order = np.lexsort((merged["edge"], merged["v"], merged["u"]))
+                u, v = merged["u"][order], merged["v"][order]
+                keep = np.ones(len(u), dtype=bool)
+                keep[:-1] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+                degree[a:b] = np.bincount(u[keep] - a, minlength=b - a)
+                outputs["neighbors"].write(v[keep].tobytes())
+                for name in columns:
+                    outputs[name].write(merged[name][order][keep].astype(np.int64).tobytes())
+                written += int(keep.sum())
+            a = b
+    finally:
+        for file in outputs.values():
+            file.close()
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(degree, out=offsets[1:])
+    offsets.tofile(os.path.join(path, "offsets.bin"))
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    import time
+
+    from shortest_paths import dijkstra
+    from traversal import bfs_levels, dfs_preorder
+
+    parser = argparse.ArgumentParser(description="Out-of-core graph benchmark")
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--edges", type=int, default=5_000_000)
+    parser.add_argument("--memory", type=int, default=32, help="build budget in MiB")
+    parser.add_argument("--resident", type=int, default=8, help="resident MiB per column")
+    parser.add_argument("--check-nodes", type=int, default=5000)
+    args = parser.parse_args()
+
+    def rss():
+        # Resident MiB right now (Linux)
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * PAGE_SIZE / 2**20
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as folder:
+        # Against the in-memory ArrayGraph on a small edge list
+        text = os.path.join(folder, "small.txt")
+        m = 4 * args.check_nodes
+        small = np.stack([rng.integers(0, args.check_nodes, m),
+                          rng.integers(0, args.check_nodes, m), rng.integers(1, 10, m)], axis=1)
+        np.savetxt(text, small, fmt="%d")
+        graph = ArrayGraph.from_file(text, columns=3, cache_dir=False)
+        disk = DiskGraph.build(text, os.path.join(folder, "small"), ("weight",), memory=1 << 16)
+        assert np.array_equal(disk.to_array_graph().neighbors, graph.neighbors)
+        assert np.array_equal(disk.to_array_graph().weights, graph.weights)
+        for a, b in zip(disk.bfs_levels(0, batch=100), bfs_levels(graph, 0)):
+            assert np.array_equal(a, b)
+        for a, b in zip(disk.dfs_preorder(0, block=3), dfs_preorder(graph, 0)):
+            assert np.array_equal(a, b)
+        assert np.array_equal(disk.dijkstra(0), dijkstra(graph, 0))
+
+        text = os.path.join(folder, "large.txt")
+        with open(text, "w") as file:
+            for first in range(0, args.edges, 1_000_000):
+                k = min(1_000_000, args.edges - first)
+                block = np.stack([rng.integers(0, args.nodes, k), rng.integers(0, args.nodes, k),
+                                  rng.integers(1, 100, k)], axis=1)
+                np.savetxt(file, block, fmt="%d")
+        print(f"edge list: {os.path.getsize(text) / 2**20:.0f} MiB, RSS {rss():.0f} MiB")
+        start = time.perf_counter()
+        disk = DiskGraph.build(text, os.path.join(folder, "large"), ("weight",),
+                               memory=args.memory * 2**20)
+        print(f"built in {time.perf_counter() - start:.1f}s, RSS {rss():.0f} MiB")
+        disk = DiskGraph(disk.path, max_resident=args.resident * 2**20)
+        for name, run in (("bfs", lambda: disk.bfs_levels(0, batch=1 << 18)),
+                          ("dfs", lambda: disk.dfs_preorder(0)),
+                          ("dijkstra", lambda: disk.dijkstra(0))):
+            disk.reset_page_stats()
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            stats = disk.page_stats()["neighbors"]
+            print(f"{name}: {elapsed:.1f}s, neighbor pages read {stats['touches']} "
+                  f"({stats['distinct']} of {stats['pages']} distinct), "
+                  f"RSS {rss():.0f} MiB")
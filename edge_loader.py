@@ -0,0 +1,169 @@
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+# src/dst are dense int32 indices into node_ids; weight is None for 2 columns
+EdgeList = namedtuple("EdgeList", ["src", "dst", "weight", "node_ids"])
+
+CHUNK_SIZE = 64 * 1024 * 1024
+
+_SEPARATOR = np.zeros(256, dtype=bool)
+_SEPARATOR[list(b" \t\r\n,")] = True
+_DIGIT = np.zeros(256, dtype=bool)
+_DIGIT[ord("0") : ord("9") + 1] = True
+
+
+def parse_chunk(buf, columns, first_line=1):
+    """Parse whole lines of integers into an (n, columns) int64 array.
+
+    Values are separated by commas and/or whitespace. Blank lines and lines
+    starting with '#' are skipped. `first_line` is only used in errors.
+    """
+    data = np.frombuffer(buf, dtype=np.uint8)
+    content = ~_SEPARATOR[data]
+    starts = np.flatnonzero(content & ~np.r_[False, content[:-1]])
+    ends = np.flatnonzero(content & ~np.r_[content[1:], False]) + 1
+    if not len(starts):
+        return np.empty((0, columns), dtype=np.int64)
+    line = np.searchsorted(np.flatnonzero(data == ord("\n")), starts)
+
+    # Drop comment lines: the first token of the line starts with '#'
+    first = np.r_[True, line[1:] != line[:-1]]
+    comment = line[first & (data[starts] == ord("#"))]
+    if len(comment):
+        keep = ~np.isin(line, comment)
+        starts, ends, line = starts[keep], ends[keep], line[keep]
+        if not len(starts):
+            return np.empty((0, columns), dtype=np.int64)
+        first = np.r_[True, line[1:] != line[:-1]]
+
+    # Every non-empty line must hold exactly `columns` values
+    counts = np.diff(np.r_[np.flatnonzero(first), len(line)])
+    if np.any(counts != columns):
+        bad = np.flatnonzero(counts != columns)[0]
+        raise ValueError(
+            f"Line {first_line + line[first][bad]}: expected {columns} values, "
+            f"got {counts[bad]}"
+        )
+
+    # Accumulate digits column by column, all tokens at once
+    negative = data[starts] == ord("-")
+    digits_start = starts + negative
+    length = ends - digits_start
+    bad = (length <= 0) | (length > 18)
+    values = np.zeros(len(starts), dtype=np.int64)
+    for k in range(int(length.max())):
+        active = length > k
+        c = data[np.minimum(digits_start + k, ends - 1)]
+        bad |= active & ~_DIGIT[c]
+        values = np.where(active, values * 10 + (c.astype(np.int64) - ord("0")), values)
+    if np.any(bad):
+        raise ValueError(f"Line {first_line + line[np.argmax(bad)]}: invalid integer")
+    values[negative] *= -1
+    return values.reshape(-1, columns)
+
+
+def iter_chunks(file_path, columns, chunk_size=CHUNK_SIZE):
+    """Yield parsed (n, columns) arrays, reading the file in byte chunks."""
+    first_line = 1
+    rest = b""
+    with open(file_path, "rb") as file:
+        while True:
+            block = file.read(chunk_size)
+            if not block:
+                break
+            block = rest + block
+            cut = block.rfind(b"\n") + 1
+            if cut == 0:
+                rest = block
+                continue
+            rest = block[cut:]
+            yield parse_chunk(block[:cut], columns, first_line)
+            first_line += block.count(b"\n", 0, cut)
+    if rest:
+        yield parse_chunk(rest, columns, first_line)
+
+
+def default_cache_dir(file_path):
+    """The "<file_path>.cache" directory, next to the input file."""
+    return file_path + ".cache"
+
+
+def _source_key(file_path, columns):
+    stat = os.stat(file_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "columns": columns}
+
+
+def load_edge_list(file_path, columns=2, cache_dir=None, chunk_size=CHUNK_SIZE):
+    """Load an edge list ("u v" or "u v w" per line), using a binary cache.
+
+    The first load parses the text in chunks and writes .npy files plus a
+    meta.json keyed by the source mtime and size; later loads mmap those
+    files and skip parsing entirely. The cache goes to default_cache_dir,
+    next to the input, unless `cache_dir` is given; pass cache_dir=False to
+    disable it. If the cache cannot be written (read-only directory, full
+    disk), the edges are returned uncached.
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir(file_path)
+    key = _source_key(file_path, columns)
+    if cache_dir:
+        cached = _read_cache(cache_dir, key)
+        if cached is not None:
+            return cached
+
+    parts = list(iter_chunks(file_path, columns, chunk_size))
+    values = np.concatenate(parts) if parts else np.empty((0, columns), np.int64)
+    del parts
+    node_ids, inverse = np.unique(values[:, :2], return_inverse=True)
+    inverse = inverse.reshape(-1, 2).astype(np.int32)
+    weight = np.ascontiguousarray(values[:, 2]) if columns == 3 else None
+    edges = EdgeList(
+        np.ascontiguousarray(inverse[:, 0]),
+        np.ascontiguousarray(inverse[:, 1]),
+        weight,
+        node_ids,
+    )
+    if cache_dir:
+        try:
+            _write_cache(cache_dir, key, edges)
+        except OSError:
+            pass
+    return edges
+
+
+def _read_cache(cache_dir, key):
+    try:
+        with open(os.path.join(cache_dir, "meta.json")) as file:
+            if json.load(file) != key:
+                return None
+    except (OSError, ValueError):
+        return None
+
+    def load(name):
+        return np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+
+    # A missing or truncated array (e.g. deleted by hand) means no cache
+    try:
+        weight = load("weight") if key["columns"] == 3 else None
+        return EdgeList(load("src"), load("dst"), weight, load("node_ids"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_dir, key, edges):
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = os.path.join(cache_dir, "meta.json")
+    if os.path.exists(meta):
+        os.remove(meta)  # invalidate before overwriting the arrays
+    for name, array in edges._asdict().items():
+        if array is not None:
+            np.save(os.path.join(cache_dir, f"{name}.npy"), array)
+    # meta.json is written last and renamed into place, so a half-written
+    # cache is never used
+    tmp = f"{meta}.{os.getpid()}.tmp"
+    with open(tmp, "w") as file:
+        json.dump(key, file)
+    os.replace(tmp, meta)
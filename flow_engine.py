@@ -0,0 +1,532 @@
+import math
+from collections import deque
+
+import numpy as np
+
+import instrument
+from traversal import gather_ranges
+
+
+def networkx_flow_edges(G, capacity="capacity"):
+    """(u, v, capacity, data) of every edge of nx graph G, and the infinity.
+
+    As in nx.maximum_flow, a missing capacity is infinite, and an undirected
+    edge can carry flow either way, so it comes out in both directions.
+    Infinite capacities are replaced by 3 * the sum of the finite ones,
+    which no finite cut reaches; that value is returned too (None if every
+    capacity is finite).
+    """
+    edges = []
+    for u, v, d in G.edges(data=True):
+        c = d.get(capacity, math.inf)
+        edges.append((u, v, c, d))
+        if not G.is_directed() and u != v:
+            edges.append((v, u, c, d))
+    finite = [c for _, _, c, _ in edges if c != math.inf]
+    if len(finite) == len(edges):
+        return edges, None
+    infinite = 3 * sum(finite) or 1
+    return [(u, v, infinite if c == math.inf else c, d) for u, v, c, d in edges], infinite
+
+
+class FlowNetwork:
+    """Directed flow network with array-based residual storage.
+
+    Input edge k is stored as residual edge 2k and its reverse as 2k + 1, so
+    `e ^ 1` is always the partner of residual edge e. `residual[e]` is the
+    remaining capacity of e; the flow on input edge k is
+    `capacity[2k] - residual[2k]`. Arcs of node u (both directions) are
+    `arcs[offsets[u]:offsets[u + 1]]`.
+
+    The network is stateful: after `solve`, capacity updates and edge
+    insertions/removals repair the current flow instead of starting over,
+    and `resolve` augments back to a maximum flow.
+    """
+
+    def __init__(self, edges=()):
+        self.nodes = []  # dense index -> node label
+        self.index = {}  # node label -> dense index
+        self.edge_index = {}  # (u, v) dense pair -> input edge index
+        head = []
+        capacity = []
+        for u, v, c in edges:
+            u, v = self.add_node(u), self.add_node(v)
+            self.edge_index[(u, v)] = len(head) // 2
+            head += [v, u]
+            capacity += [c, 0]
+
+        self.head = np.array(head, dtype=np.int32)
+        self.capacity = np.array(capacity)
+        self.residual = self.capacity.copy()
+        self.alive = np.ones(len(head) // 2, dtype=bool)  # False once removed
+        self.source = None
+        self.sink = None
+        self.value = 0
+        self.infinite = None  # stand-in for infinite capacities, if any
+        self._build_arcs()
+
+    @classmethod
+    def from_networkx(cls, G, capacity="capacity"):
+        """Network of an nx graph, see networkx_flow_edges."""
+        edges, infinite = networkx_flow_edges(G, capacity)
+        network = cls((u, v, c) for u, v, c, _ in edges)
+        network.infinite = infinite
+        for node in G.nodes():
+            network.add_node(node)
+        network._build_arcs()
+        return network
+
+    def check_bounded(self):
+        """Raise ValueError if the flow uses a path of infinite capacity."""
+        if self.infinite is not None and self.value >= self.infinite:
+            raise ValueError("Infinite capacity path, flow is unbounded")
+
+    def add_node(self, node):
+        if node not in self.index:
+            self.index[node] = len(self.nodes)
+            self.nodes.append(node)
+        return self.index[node]
+
+    def _build_arcs(self):
+        tail = self.head[np.arange(len(self.head)) ^ 1]
+        self.arcs = np.argsort(tail, kind="stable").astype(np.int32)
+        self.offsets = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tail, minlength=len(self.nodes)), out=self.offsets[1:])
+
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def num_edges(self):
+        return len(self.head) // 2
+
+    def reset(self):
+        self.residual = self.capacity.copy()
+        self.value = 0
+
+    def edge_flows(self):
+        return self.capacity[0::2] - self.residual[0::2]
+
+    def edges(self):
+        """(u, v) labels of the input edges, in input order."""
+        return self.path_edges(2 * np.flatnonzero(self.alive))
+
+    def path_edges(self, path):
+        """(u, v) labels of residual edges; reverse edges point backwards."""
+        nodes, head = self.nodes, self.head
+        return [(nodes[head[e ^ 1]], nodes[head[e]]) for e in path]
+
+    def flow_value(self, source):
+        """Net flow leaving `source`."""
+        flows = self.edge_flows()
+        s = self.index[source]
+        return flows[self.head[1::2] == s].sum() - flows[self.head[0::2] == s].sum()
+
+    def flow_dict(self):
+        """Flows in the nx.maximum_flow format: flow_dict[u][v]."""
+        flow_dict = {node: {} for node in self.nodes}
+        tails = self.head[1::2][self.alive].tolist()
+        heads = self.head[0::2][self.alive].tolist()
+        for u, v, f in zip(tails, heads, self.edge_flows()[self.alive].tolist()):
+            out = flow_dict[self.nodes[u]]
+            v = self.nodes[v]
+            out[v] = out.get(v, 0) + f
+        return flow_dict
+
+    def source_side(self):
+        """Bool mask of the dense nodes still reachable from the source in
+        the residual network: after `solve`, the source side of a minimum cut."""
+        s = self.index[self.source]
+        side = np.zeros(self.num_nodes, dtype=bool)
+        side[s] = True
+        frontier = np.array([s], dtype=np.int64)
+        while len(frontier):
+            edges = self.arcs[gather_ranges(self.offsets, frontier)]
+            nodes = self.head[edges[self.residual[edges] > 0]]
+            frontier = np.unique(nodes[~side[nodes]]).astype(np.int64)
+            side[frontier] = True
+        return side
+
+    def _lists(self):
+        return (
+            self.head.tolist(),
+            self.residual.tolist(),
+            self.arcs.tolist(),
+            self.offsets.tolist(),
+        )
+
+    def augmenting_path(self, source, sink):
+        """Shortest augmenting path as a list of residual edge indices."""
+        s, t = self.index[source], self.index[sink]
+        if s == t:
+            return []
+        head, residual, arcs, offsets = self.head, self.residual, self.arcs, self.offsets
+        parent = np.full(self.num_nodes, -1, dtype=np.int64)
+        parent[s] = -2
+        queue = deque([s])
+        scanned = 0
+        while queue and parent[t] == -1:
+            u = queue.popleft()
+            out = arcs[offsets[u] : offsets[u + 1]].tolist()
+            scanned += len(out)
+            for e in out:
+                v = head[e]
+                if parent[v] == -1 and residual[e] > 0:
+                    parent[v] = e
+                    queue.append(v)
+        if instrument.enabled():
+            instrument.count("edges_scanned", scanned)
+            instrument.count("queue_pushes", int(np.count_nonzero(parent != -1)))
+        if parent[t] == -1:
+            return []
+        path = []
+        v = t
+        while v != s:
+            e = parent[v]
+            path.append(int(e))
+            v = head[e ^ 1]
+        return path[::-1]
+
+    def augment(self, path):
+        """Push the bottleneck amount along `path`; returns that amount."""
+        path = np.asarray(path, dtype=np.int64)
+        flow = self.residual[path].min()
+        self.residual[path] -= flow
+        self.residual[path ^ 1] += flow
+        return flow.item()
+
+    def solve(self, source, sink, method="dinic"):
+        """Maximum flow from `source` to `sink`; remembered for updates."""
+        if (source, sink) != (self.source, self.sink):
+            self.reset()
+            self.source, self.sink = source, sink
+        return self.resolve(method)
+
+    def resolve(self, method="dinic"):
+        """Augment the current flow back to a maximum flow."""
+        solve = {"dinic": self.dinic, "push_relabel": self.push_relabel}[method]
+        self.value += solve(self.source, self.sink)
+        self.check_bounded()
+        return self.value
+
+    def update_capacity(self, u, v, capacity):
+        """Set the capacity of edge (u, v), keeping the flow valid.
+
+        If the edge now carries more than its capacity, the surplus is first
+        rerouted around it and whatever cannot be rerouted is cancelled back
+        to the source and from the sink. Call `resolve` to re-maximize.
+        """
+        k = self.edge_index[(self.index[u], self.index[v])]
+        e = 2 * k
+        flow = self.capacity[e] - self.residual[e]
+        self.capacity[e] = capacity
+        if flow <= capacity:
+            self.residual[e] = capacity - flow
+            return
+        self.residual[e] = 0
+        self.residual[e ^ 1] = capacity
+        self._cancel(self.index[u], self.index[v], (flow - capacity).item())
+
+    def add_edge(self, u, v, capacity):
+        """Add edge (u, v), or set its capacity if it already exists."""
+        if u in self.index and v in self.index:
+            if (self.index[u], self.index[v]) in self.edge_index:
+                return self.update_capacity(u, v, capacity)
+        iu, iv = self.add_node(u), self.add_node(v)
+        self.edge_index[(iu, iv)] = self.num_edges
+        self.head = np.append(self.head, np.array([iv, iu], dtype=self.head.dtype))
+        self.capacity = np.append(self.capacity, [capacity, 0])
+        self.residual = np.append(self.residual, [capacity, 0])
+        self.alive = np.append(self.alive, True)
+        self._build_arcs()
+
+    def remove_edge(self, u, v):
+        """Remove edge (u, v); its flow is rerouted or cancelled first."""
+        self.update_capacity(u, v, 0)
+        k = self.edge_index.pop((self.index[u], self.index[v]))
+        self.capacity[2 * k] = 0
+        self.residual[2 * k : 2 * k + 2] = 0
+        self.alive[k] = False
+
+    def _cancel(self, u, v, surplus):
+        """Remove `surplus` units of excess at u and deficit at v."""
+        rerouted = self._max_flow(u, v, surplus)
+        surplus -= rerouted
+        if surplus:
+            s, t = self.index[self.source], self.index[self.sink]
+            # The rest belongs to source -> u -> v -> sink paths
+            self._max_flow(u, s, surplus)
+            self._max_flow(t, v, surplus)
+            self.value -= surplus
+
+    def dinic(self, source, sink):
+        """Augment to a maximum flow with Dinic's algorithm.
+
+        Starts from the current residual state; returns the flow added.
+        """
+        return self._max_flow(self.index[source], self.index[sink])
+
+    def _max_flow(self, s, t, limit=None):
+        """Dinic between dense nodes s and t, pushing at most `limit`."""
+        if s == t:
+            return 0
+        head, residual, arcs, offsets = self._lists()
+        total = 0
+        while limit is None or total < limit:
+            level = self._levels(s, t, np.array(residual, dtype=self.capacity.dtype))
+            if level[t] < 0:
+                break
+            total += self._blocking_flow(
+                s, t, level, head, residual, arcs, offsets,
+                None if limit is None else limit - total,
+            )
+        self.residual = np.array(residual, dtype=self.capacity.dtype)
+        return total
+
+    def _levels(self, s, t, residual):
+        """BFS levels over residual edges, a whole frontier at a time."""
+        level = np.full(self.num_nodes, -1, dtype=np.int64)
+        level[s] = 0
+        frontier = np.array([s], dtype=np.int64)
+        depth = 0
+        while len(frontier) and level[t] < 0:
+            edges = self.arcs[gather_ranges(self.offsets, frontier)]
+            nodes = self.head[edges[residual[edges] > 0]]
+            frontier = np.unique(nodes[level[nodes] < 0]).astype(np.int64)
+            depth += 1
+            level[frontier] = depth
+        return level.tolist()
+
+    def _blocking_flow(self, s, t, level, head, residual, arcs, offsets, limit=None):
+        current = offsets[:-1]  # current-arc pointers
+        path = []
+        total = 0
+        u = s
+        while True:
+            if u == t:
+                flow = min(residual[e] for e in path)
+                if limit is not None:
+                    flow = min(flow, limit - total)
+                first_saturated = None
+                for j, e in enumerate(path):
+                    residual[e] -= flow
+                    residual[e ^ 1] += flow
+                    if first_saturated is None and residual[e] == 0:
+                        first_saturated = j
+                total += flow
+                if total == limit:
+                    return total
+                # Retreat to the tail of the first saturated edge
+                del path[first_saturated:]
+                u = head[path[-1]] if path else s
+                continue
+
+            i = current[u]
+            end = offsets[u + 1]
+            next_level = level[u] + 1
+            while i < end:
+                e = arcs[i]
+                if residual[e] > 0 and level[head[e]] == next_level:
+                    break
+                i += 1
+            current[u] = i
+            if i < end:
+                path.append(arcs[i])
+                u = head[arcs[i]]
+            elif u == s:
+                return total
+            else:
+                level[u] = -1  # dead end, never enter it again this phase
+                e = path.pop()
+                u = head[e ^ 1]
+                current[u] += 1
+
+    def push_relabel(self, source, sink):
+        """Augment to a maximum flow with highest-label push-relabel.
+
+        Uses an initial global relabel (exact distances to the sink) and the
+        gap heuristic. Excess that cannot reach the sink is returned to the
+        source, so the result is a valid flow. Returns the flow added.
+        """
+        s, t = self.index[source], self.index[sink]
+        if s == t:
+            return 0
+        n = self.num_nodes
+        head, residual, arcs, offsets = self._lists()
+
+        # Global relabel: BFS from the sink over reverse residual edges
+        height = [n] * n
+        height[t] = 0
+        queue = deque([t])
+        while queue:
+            v = queue.popleft()
+            for i in range(offsets[v], offsets[v + 1]):
+                e = arcs[i]
+                u = head[e]
+                if height[u] == n and u != t and residual[e ^ 1] > 0:
+                    height[u] = height[v] + 1
+                    queue.append(u)
+        height[s] = n
+
+        count = [0] * (2 * n + 1)  # number of nodes at each height
+        for h in height:
+            count[h] += 1
+        excess = [0] * n
+        buckets = [[] for _ in range(2 * n + 1)]  # active nodes by height
+        for i in range(offsets[s], offsets[s + 1]):
+            e = arcs[i]
+            flow = residual[e]
+            if flow > 0:
+                v = head[e]
+                residual[e] = 0
+                residual[e ^ 1] += flow
+                if excess[v] == 0 and v != t and v != s:
+                    buckets[height[v]].append(v)
+                excess[v] += flow
+
+        current = offsets[:-1]
+        highest = 2 * n
+        while highest >= 0:
+            bucket = buckets[highest]
+            if not bucket:
+                highest -= 1
+                continue
+            u = bucket.pop()
+            if height[u] != highest or excess[u] == 0:
+                continue  # stale entry
+
+            # Discharge u
+            end = offsets[u + 1]
+            while excess[u] > 0:
+                i = current[u]
+                if i == end:
+                    old = height[u]
+                    count[old] -= 1
+                    if count[old] == 0 and old < n:
+                        # Gap: nodes above it can no longer reach the sink
+                        for w in range(n):
+                            if old < height[w] < n:
+                                count[height[w]] -= 1
+                                height[w] = n + 1
+                                count[n + 1] += 1
+                                current[w] = offsets[w]
+                                if excess[w] > 0 and w != t:
+                                    buckets[n + 1].append(w)
+                        new = n + 1
+                    else:
+                        new = 2 * n
+                        for j in range(offsets[u], end):
+                            e = arcs[j]
+                            if residual[e] > 0 and height[head[e]] < new:
+                                new = height[head[e]]
+                        new = min(new + 1, 2 * n)
+                    height[u] = new
+                    count[new] += 1
+                    current[u] = offsets[u]
+                    highest = max(highest, new)
+                    continue
+
+                e = arcs[i]
+                v = head[e]
+                if residual[e] > 0 and height[u] == height[v] + 1:
+                    flow = min(excess[u], residual[e])
+                    residual[e] -= flow
+                    residual[e ^ 1] += flow
+                    if excess[v] == 0 and v != t and v != s:
+                        buckets[height[v]].append(v)
+                    excess[u] -= flow
+                    excess[v] += flow
+                    if residual[e] == 0:
+                        current[u] = i + 1
+                else:
+                    current[u] = i + 1
+
+        self.residual = np.array(residual, dtype=self.capacity.dtype)
+        return excess[t]
+
+
+def maximum_flow(G, source, sink, capacity="capacity", method="dinic"):
+    """Drop-in for nx.maximum_flow: returns (flow_value, flow_dict).
+
+    `G` is an nx.DiGraph or a list of (u, v, capacity) edges; `method` is
+    "dinic" or "push_relabel".
+    """
+    if isinstance(G, (list, tuple)):
+        network = FlowNetwork(G)
+    else:
+        network = FlowNetwork.from_networkx(G, capacity=capacity)
+    flow_value = network.solve(source, sink, method)
+    return flow_value, network.flow_dict()
+
+
+def random_flow_network(num_nodes, num_edges, max_capacity=100, seed=0):
+    """Random (u, v, capacity) edges; node 0 is the source, n - 1 the sink."""
+    rng = np.random.default_rng(seed)
+    src = rng.integers(0, num_nodes, num_edges)
+    dst = rng.integers(0, num_nodes, num_edges)
+    keep = src != dst
+    pairs = np.unique(np.stack([src[keep], dst[keep]], axis=1), axis=0)
+    capacity = rng.integers(1, max_capacity + 1, len(pairs))
+    return list(zip(pairs[:, 0].tolist(), pairs[:, 1].tolist(), capacity.tolist()))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import networkx as nx
+
+    parser = argparse.ArgumentParser(description="Max-flow engine benchmark")
+    parser.add_argument("--nodes", type=int, default=20_000)
+    parser.add_argument("--edges", type=int, default=150_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--updates", type=int, default=20)
+    args = parser.parse_args()
+
+    graph_edges = random_flow_network(args.nodes, args.edges, seed=args.seed)
+    source, sink = 0, args.nodes - 1
+    print(f"Network: {args.nodes} nodes, {len(graph_edges)} edges")
+
+    # Same steps as edmonds_karp_max_flow in max_flow_w_edmond_karp.py
+    t = time.perf_counter()
+    G = nx.DiGraph()
+    for u, v, capacity in graph_edges:
+        G.add_edge(u, v, capacity=capacity)
+    expected, _ = nx.maximum_flow(
+        G, source, sink, flow_func=nx.algorithms.flow.edmonds_karp
+    )
+    baseline = time.perf_counter() - t
+    print(f"nx edmonds_karp: {baseline:.2f}s (flow {expected})")
+
+    for method in ("dinic", "push_relabel"):
+        t = time.perf_counter()
+        flow_value, flow_dict = maximum_flow(graph_edges, source, sink, method=method)
+        elapsed = time.perf_counter() - t
+        assert flow_value == expected
+        print(f"{method}: {elapsed:.2f}s ({baseline / elapsed:.1f}x faster)")
+
+    # Incremental re-solve after single capacity updates vs a cold solve
+    network = FlowNetwork(graph_edges)
+    network.solve(source, sink)
+    rng = np.random.default_rng(args.seed)
+    cold = incremental = 0.0
+    for k in rng.integers(0, len(graph_edges), args.updates).tolist():
+        u, v, _ = graph_edges[k]
+        capacity = int(rng.integers(0, 101))
+        graph_edges[k] = (u, v, capacity)
+
+        t = time.perf_counter()
+        network.update_capacity(u, v, capacity)
+        value = network.resolve()
+        incremental += time.perf_counter() - t
+
+        t = time.perf_counter()
+        expected = FlowNetwork(graph_edges).solve(source, sink)
+        cold += time.perf_counter() - t
+        assert value == expected
+    print(
+        f"update + resolve: {1000 * incremental / args.updates:.1f}ms per update, "
+        f"cold solve: {1000 * cold / args.updates:.1f}ms "
+        f"({cold / incremental:.1f}x faster)"
+    )
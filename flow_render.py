@@ -0,0 +1,164 @@
+import queue
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import instrument
+from flow_engine import FlowNetwork
+
+# One augmentation of a flow solver: `path` as (u, v) labels, the amount
+# pushed, and {input edge index: new flow} for every edge on the path
+AugmentationEvent = namedtuple("AugmentationEvent", ["step", "path", "bottleneck", "changed"])
+
+_STOP = object()
+
+# Per-worker drawing state, set up once by _init_worker
+_figure = None
+_texts = None
+_title = None
+_flows = None
+
+
+def _init_worker(G, pos, edges, capacities, dtype, figsize):
+    global _figure, _texts, _title, _flows
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    _figure = plt.figure(figsize=figsize)
+    nx.draw_networkx_nodes(G, pos, node_color="lightblue", node_size=500)
+    nx.draw_networkx_edges(G, pos, edgelist=edges, width=1)
+    nx.draw_networkx_labels(G, pos, font_size=12, font_family="sans-serif")
+    labels = {edge: f"0/{c}" for edge, c in zip(edges, capacities)}
+    label_texts = nx.draw_networkx_edge_labels(G, pos, edge_labels=labels)
+    _texts = [(label_texts[edge], c) for edge, c in zip(edges, capacities)]
+    _title = plt.title("Flow After Step 0")
+    plt.axis("off")
+    _flows = np.zeros(len(edges), dtype=dtype)
+
+
+def _render_frame(step, flows):
+    # Only the labels whose flow changed since this worker's last frame
+    for k in np.flatnonzero(flows != _flows).tolist():
+        text, capacity = _texts[k]
+        text.set_text(f"{flows[k]}/{capacity}")
+    _flows[:] = flows
+    _title.set_text(f"Flow After Step {step}")
+    _figure.canvas.draw()
+    return np.asarray(_figure.canvas.buffer_rgba())[..., :3].copy()
+
+
+class FlowRenderer:
+    """Renders solver augmentation events into a GIF in the background.
+
+    The solver puts AugmentationEvents into the bounded `events` queue. A
+    consumer thread applies them to its own copy of the edge flows and sends
+    every `every`-th state (plus the final one) to a process pool. Each
+    worker keeps one figure with the shared layout and only rewrites the
+    changed edge labels; the frames are appended to the GIF in step order.
+    Edges are those of FlowNetwork.from_networkx(G), as in the solver; the
+    two arcs of an undirected edge share one label with the net flow.
+    """
+
+    def __init__(self, G, gif_path, pos=None, every=1, workers=2, queue_size=256,
+                 duration=10, figsize=(8, 6)):
+        import imageio.v2 as imageio
+        import networkx as nx
+
+        from layout import graph_layout
+
+        if pos is None:
+            pos = graph_layout(G)  # Fixed positions for all frames
+        network = FlowNetwork.from_networkx(G)
+        self.edges = network.edges()
+        capacity = network.capacity[0::2]
+        label = np.arange(len(self.edges))
+        self._sign = np.ones(len(self.edges), dtype=capacity.dtype)
+        if not G.is_directed():
+            first = {}
+            for k, (u, v) in enumerate(self.edges):
+                if (v, u) in first:
+                    label[k] = first[(v, u)]
+                    self._sign[k] = -1
+                else:
+                    first[(u, v)] = k
+        labeled, self._label = np.unique(label, return_inverse=True)
+        self._num_labels = len(labeled)
+        self.label_edges = edges = [self.edges[k] for k in labeled.tolist()]
+        capacities = ["∞" if c == network.infinite else c for c in capacity[labeled].tolist()]
+        self.every = every
+        self.frames = 0
+        self._error = None
+        self.events = queue.Queue(maxsize=queue_size)
+        self._flows = np.zeros(len(self.edges), dtype=capacity.dtype)
+        self._max_in_flight = 2 * workers
+        self._writer = imageio.get_writer(gif_path, mode="I", duration=duration)
+        self._pool = ProcessPoolExecutor(
+            workers,
+            initializer=_init_worker,
+            initargs=(G, pos, edges, capacities, capacity.dtype, figsize),
+        )
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Flush the remaining events and frames and finish the GIF."""
+        self.events.put(_STOP)
+        self._thread.join()
+        self._pool.shutdown()
+        self._writer.close()
+        if self._error is not None:
+            raise self._error
+
+    def _consume(self):
+        try:
+            self._render_events()
+        except BaseException as exc:
+            # Keep draining so a blocked solver can finish, report on close()
+            self._error = exc
+            while self.events.get() is not _STOP:
+                pass
+
+    def _render_events(self):
+        pending = deque()
+        last_step = None  # last step applied but not rendered
+        while True:
+            event = self.events.get()
+            if event is _STOP:
+                break
+            for k, flow in event.changed.items():
+                self._flows[k] = flow
+            last_step = event.step
+            if event.step % self.every == 0:
+                pending.append(self._submit(event.step))
+                last_step = None
+            while len(pending) > self._max_in_flight:
+                self._write(pending.popleft())
+        if last_step is not None:
+            pending.append(self._submit(last_step))
+        while pending:
+            self._write(pending.popleft())
+
+    def label_flows(self):
+        """Current flow shown on each edge label, in `label_edges` order."""
+        flows = np.abs(np.bincount(self._label, self._sign * self._flows, self._num_labels))
+        return flows.astype(self._flows.dtype)
+
+    def _submit(self, step):
+        return self._pool.submit(_render_frame, step, self.label_flows())
+
+    def _write(self, future):
+        with instrument.phase("render"):
+            self._writer.append_data(future.result())
+        self.frames += 1
+        instrument.count("frames_rendered")
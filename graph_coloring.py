@@ -1,5 +1,9 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+import time
+
+from array_graph import ArrayGraph
+from coloring import color_graph, coloring_dict
+from layout import graph_layout
+from render import NX_MAX_NODES, render_networkx
 
 # Define the graph based on the adjacency list
 graph_data = {
@@ -16,16 +20,21 @@ graph_data = {
 }
 
 
-# Create a NetworkX graph
-G = nx.Graph(graph_data)
+# Different strategies for greedy coloring, see coloring.py
+strategies = ["largest_first", "smallest_last", "random_sequential", "dsatur"]
 
-# Different strategies for greedy coloring
-strategies = ["largest_first", "smallest_last", "random_sequential", "independent_set"]
 
+def plot_coloring(graph, coloring, title, strategy, pos=None):
+    import matplotlib.pyplot as plt
+    import networkx as nx
 
-def plot_coloring(graph, coloring, title, strategy):
     colors = [coloring[node] for node in graph.nodes()]
-    pos = nx.spring_layout(graph, seed=42)
+    if pos is None:
+        pos = graph_layout(graph)
+    if graph.number_of_nodes() > NX_MAX_NODES:
+        render_networkx(graph, pos, f"{strategy}.png", node_color=colors, cmap="rainbow",
+                        title=title)
+        return
     plt.figure(figsize=(10, 10))
     nx.draw(
         graph,
@@ -40,16 +49,25 @@ def plot_coloring(graph, coloring, title, strategy):
     plt.savefig(f"{strategy}.png")
 
 
-colorings = {}
+if __name__ == "__main__":
+    import networkx as nx
 
-for strategy in strategies:
-    coloring = nx.coloring.greedy_color(G, strategy=strategy)
-    colorings[strategy] = coloring
-    plot_coloring(
-        G,
-        coloring,
-        f'Graph Coloring using {strategy.replace("_", " ").title()} Strategy',
-        strategy
-    )
+    # A NetworkX graph for plotting, and the array graph for coloring
+    G = nx.Graph(graph_data)
+    graph = ArrayGraph.from_edges(*zip(*G.edges()))
+    colorings = {}
+    pos = graph_layout(G)  # same layout for every plot
 
-colorings
+    for strategy in strategies:
+        start = time.perf_counter()
+        coloring = coloring_dict(graph, color_graph(graph, strategy))
+        elapsed = time.perf_counter() - start
+        print(f"{strategy}: {max(coloring.values()) + 1} colors in {1000 * elapsed:.2f} ms")
+        colorings[strategy] = coloring
+        plot_coloring(
+            G,
+            coloring,
+            f'Graph Coloring using {strategy.replace("_", " ").title()} Strategy',
+            strategy,
+            pos,
+        )
@@ -0,0 +1,182 @@
+import json
+import marshal
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Recorder of the running recording() block, None when instrumentation is off
+_recorder = None
+_OFF = nullcontext()
+
+
+class Recorder:
+    """Phase timers and operation counters of one recording() block.
+
+    A phase is a named, possibly nested, timed section; like cProfile every
+    phase keeps its call count, its own time (tottime, nested phases
+    excluded), its total time (cumtime) and per calling phase the same
+    numbers, so pstats.Stats(recorder) reads it like a profile. Counters
+    are plain named totals such as "edges_scanned" or "augmentations".
+    """
+
+    def __init__(self):
+        self.counters = defaultdict(int)
+        # name -> [calls, tottime, cumtime, {caller: [calls, tottime, cumtime]}]
+        self.phases = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def phase(self, name):
+        stack = self._stack()
+        frame = [name, 0.0]  # name, time spent in nested phases
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            caller = stack[-1][0] if stack else None
+            if stack:
+                stack[-1][1] += elapsed
+            # A phase nested in itself only counts its outermost time as total
+            total = 0.0 if any(f[0] == name for f in stack) else elapsed
+            own = elapsed - frame[1]
+            with self._lock:
+                entry = self.phases.setdefault(name, [0, 0.0, 0.0, {}])
+                entry[0] += 1
+                entry[1] += own
+                entry[2] += total
+                if caller is not None:
+                    calls = entry[3].setdefault(caller, [0, 0.0, 0.0])
+                    calls[0] += 1
+                    calls[1] += own
+                    calls[2] += elapsed
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def as_dict(self):
+        """Phases and counters as plain JSON-ready dicts."""
+        phases = {
+            name: {
+                "calls": calls,
+                "seconds": cumtime,
+                "own_seconds": tottime,
+                "callers": {caller: c[0] for caller, c in callers.items()},
+            }
+            for name, (calls, tottime, cumtime, callers) in self.phases.items()
+        }
+        return {"phases": phases, "counters": dict(self.counters)}
+
+    def to_json(self, path=None):
+        """The as_dict() report as JSON text, also written to `path` if given."""
+        text = json.dumps(self.as_dict(), indent=2, sort_keys=True)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def create_stats(self):
+        # The profiler protocol of pstats.Stats: self.stats maps function
+        # keys to (primitive calls, calls, tottime, cumtime, callers)
+        def key(name):
+            return ("<phase>", 0, name)
+
+        self.stats = {
+            key(name): (calls, calls, tottime, cumtime,
+                        {key(caller): tuple(c[:1] * 2 + c[1:]) for caller, c in callers.items()})
+            for name, (calls, tottime, cumtime, callers) in self.phases.items()
+        }
+
+    def dump_stats(self, path):
+        """Write the phases in the cProfile file format, for pstats or snakeviz."""
+        self.create_stats()
+        with open(path, "wb") as f:
+            marshal.dump(self.stats, f)
+
+    def print_stats(self, sort="cumulative", file=None):
+        """cProfile-style phase table followed by the counters."""
+        import pstats
+
+        file = file or sys.stdout
+        pstats.Stats(self, stream=file).sort_stats(sort).print_stats()
+        for name, value in sorted(self.counters.items()):
+            print(f"{value:>14,}  {name}", file=file)
+
+
+@contextmanager
+def recording(recorder=None):
+    """Turn instrumentation on inside the block; yields the Recorder.
+
+    Phases and counters of other threads are collected too, those of
+    worker processes are not.
+    """
+    global _recorder
+    previous = _recorder
+    _recorder = recorder if recorder is not None else Recorder()
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
+
+
+def enabled():
+    return _recorder is not None
+
+
+def phase(name):
+    """Context manager timing phase `name`; a shared no-op when off."""
+    if _recorder is None:
+        return _OFF
+    return _recorder.phase(name)
+
+
+def count(name, n=1):
+    """Add n to counter `name` when instrumentation is on."""
+    if _recorder is not None:
+        _recorder.count(name, n)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import runpy
+
+    # Run as a script this file is __main__; the solvers report to the
+    # importable module
+    import instrument
+
+    parser = argparse.ArgumentParser(
+        prog="python -m instrument",
+        description="Run a script with phase timers and operation counters on",
+    )
+    parser.add_argument("-o", "--json", help="write phases and counters as JSON")
+    parser.add_argument("-p", "--pstats", help="write the phases as a cProfile stats file")
+    parser.add_argument("-s", "--sort", default="cumulative", help="pstats sort key of the summary")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    sys.argv = [args.script] + args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    with instrument.recording() as recorder:
+        try:
+            with instrument.phase("<script>"):
+                runpy.run_path(args.script, run_name="__main__")
+        finally:
+            recorder.print_stats(args.sort)
+            if args.json:
+                recorder.to_json(args.json)
+            if args.pstats:
+                recorder.dump_stats(args.pstats)
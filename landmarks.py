@@ -0,0 +1,222 @@
+import heapq
+import json
+import os
+
+import numpy as np
+
+from shortest_paths import _csr_lists, dijkstra
+
+INF = float("inf")
+
+
+class LandmarkIndex:
+    """ALT index: distances between every node and a few landmark nodes.
+
+    dist_from[v, i] = d(landmark i, v) and dist_to[v, i] = d(v, landmark i),
+    node-major so a node's row is contiguous; for an undirected graph both
+    are the same array. By the triangle inequality they give lower bounds
+    on any d(u, v), which bidirectional A* uses as potentials.
+    """
+
+    def __init__(self, graph, landmarks, dist_from, dist_to):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.dist_from = dist_from
+        self.dist_to = dist_to
+        self._lists = _csr_lists(graph)
+        self._reverse_lists = _csr_lists(graph.reverse()) if graph.directed else self._lists
+
+    @classmethod
+    def build(cls, graph, num_landmarks=16, seed=0):
+        """Pick landmarks by farthest-point selection and compute their tables.
+
+        Each new landmark is the node farthest from all landmarks so far
+        (unreachable nodes first, which covers other components).
+        """
+        n = graph.num_nodes
+        lists = _csr_lists(graph)
+        reverse_lists = _csr_lists(graph.reverse()) if graph.directed else None
+        start = np.random.default_rng(seed).integers(n)
+        closest = dijkstra(graph, start, lists)
+        closest[~np.isfinite(closest)] = INF
+        landmarks, dist_from, dist_to = [], [], []
+        for _ in range(min(num_landmarks, n)):
+            landmark = int(np.argmax(closest))
+            forward = dijkstra(graph, landmark, lists)
+            landmarks.append(landmark)
+            dist_from.append(forward)
+            if graph.directed:
+                dist_to.append(dijkstra(graph.reverse(), landmark, reverse_lists))
+            closest = forward.copy() if len(landmarks) == 1 else np.minimum(closest, forward)
+            closest[landmarks] = -1
+        dist_from = _compact(np.stack(dist_from, axis=1))
+        dist_to = _compact(np.stack(dist_to, axis=1)) if graph.directed else dist_from
+        return cls(graph, np.array(landmarks, dtype=np.int64), dist_from, dist_to)
+
+    def save(self, path):
+        """Store the tables as .npy files in directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "landmarks.npy"), self.landmarks)
+        np.save(os.path.join(path, "dist_from.npy"), self.dist_from)
+        if self.graph.directed:
+            np.save(os.path.join(path, "dist_to.npy"), self.dist_to)
+        with open(os.path.join(path, "meta.json"), "w") as file:
+            json.dump({"num_nodes": self.graph.num_nodes, "directed": self.graph.directed}, file)
+
+    @classmethod
+    def load(cls, path, graph):
+        """Index saved by save() for `graph`; the tables are memory-mapped."""
+        with open(os.path.join(path, "meta.json")) as file:
+            meta = json.load(file)
+        if meta != {"num_nodes": graph.num_nodes, "directed": graph.directed}:
+            raise ValueError(f"Landmark index in {path} was built for another graph")
+
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        dist_from = load("dist_from")
+        dist_to = load("dist_to") if graph.directed else dist_from
+        return cls(graph, np.asarray(load("landmarks")), dist_from, dist_to)
+
+    def _active(self, s, t, count):
+        # The landmarks giving the best lower bound on d(s, t)
+        with np.errstate(invalid="ignore"):
+            bound = np.fmax(
+                self.dist_from[t] - self.dist_from[s], self.dist_to[s] - self.dist_to[t]
+            )
+        bound = np.nan_to_num(bound, nan=-INF)
+        return np.argsort(-bound, kind="stable")[:count]
+
+    def search(self, source, target, active=4):
+        """(distance, nodes settled) by bidirectional ALT A*.
+
+        Both searches use the average potential p(v) = (pi_t(v) - pi_s(v)) / 2
+        over the `active` landmarks best for this pair, which keeps the
+        reduced costs of the two searches equal; they can stop once the
+        smallest forward and reverse keys add up to the best path found.
+        active=0 gives plain bidirectional Dijkstra. The distance is inf if
+        there is no path.
+        """
+        graph = self.graph
+        s, t = graph.index_of(source), graph.index_of(target)
+        if s == t:
+            return 0, 1
+
+        dist_from, dist_to = self.dist_from, self.dist_to
+        # Per active landmark L: d(L, t), d(t, L), d(L, s), d(s, L)
+        ends = [row.tolist() for row in (dist_from[t], dist_to[t], dist_from[s], dist_to[s])]
+        bounds = [
+            (L,) + tuple(row[L] for row in ends) for L in self._active(s, t, active).tolist()
+        ]
+        potentials = {}
+
+        def potential(v):
+            # Plain floats are much faster than NumPy calls on a few values;
+            # inf - inf gives nan, which never wins a comparison
+            p = potentials.get(v)
+            if p is None and not bounds:
+                return 0.0
+            if p is None:
+                row_from = dist_from[v].tolist()
+                row_to = dist_to[v].tolist() if dist_to is not dist_from else row_from
+                to_t = from_s = 0.0
+                for L, from_L_t, t_to_L, from_L_s, s_to_L in bounds:
+                    f = row_from[L]
+                    b = row_to[L]
+                    if from_L_t - f > to_t:
+                        to_t = from_L_t - f
+                    if b - t_to_L > to_t:
+                        to_t = b - t_to_L
+                    if f - from_L_s > from_s:
+                        from_s = f - from_L_s
+                    if s_to_L - b > from_s:
+                        from_s = s_to_L - b
+                p = potentials[v] = (to_t - from_s) / 2
+            return p
+
+        lists = (self._lists, self._reverse_lists)
+        sign = (1, -1)
+        dist = ({s: 0}, {t: 0})
+        settled = (set(), set())
+        heaps = ([(potential(s), s)], [(-potential(t), t)])
+        best = INF
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            _, u = heapq.heappop(heaps[side])
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+            d = dist[side][u]
+            near, far = dist[side], dist[1 - side]
+            offsets, neighbors, weights = lists[side]
+            for i in range(offsets[u], offsets[u + 1]):
+                v = neighbors[i]
+                nd = d + weights[i]
+                if v in far and nd + far[v] < best:
+                    best = nd + far[v]
+                if nd < near.get(v, INF):
+                    p = potential(v)
+                    if abs(p) == INF or p != p:
+                        continue  # no s-t path can pass through v
+                    near[v] = nd
+                    heapq.heappush(heaps[side], (nd + sign[side] * p, v))
+        return best, len(settled[0]) + len(settled[1])
+
+    def distance(self, source, target, active=4):
+        return self.search(source, target, active)[0]
+
+
+def _compact(table):
+    """float32 copy of a distance table when that loses nothing."""
+    small = table.astype(np.float32)
+    return small if np.array_equal(small, table) else table
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    import time
+
+    from shortest_paths import grid_graph, random_weighted_graph
+
+    parser = argparse.ArgumentParser(description="ALT landmark index benchmark")
+    parser.add_argument("--grid", type=int, nargs=2, default=(300, 300))
+    parser.add_argument("--random-nodes", type=int, default=100_000)
+    parser.add_argument("--landmarks", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    graphs = {
+        "directed grid": grid_graph(*args.grid, directed=True),
+        "random": random_weighted_graph(args.random_nodes, 4 * args.random_nodes),
+    }
+    for name, graph in graphs.items():
+        start = time.perf_counter()
+        index = LandmarkIndex.build(graph, args.landmarks)
+        build_time = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as path:
+            index.save(path)
+            index = LandmarkIndex.load(path, graph)
+            size = index.dist_from.nbytes * (2 if graph.directed else 1)
+            print(f"{name}: n={graph.num_nodes}, {graph.num_edges} edges, "
+                  f"{args.landmarks} landmarks built in {build_time:.2f}s ({size / 2**20:.1f} MiB)")
+
+            pairs = rng.integers(graph.num_nodes, size=(args.queries, 2))
+            start = time.perf_counter()
+            expected = [dijkstra(graph, s)[t] for s, t in pairs.tolist()]
+            elapsed = time.perf_counter() - start
+            print(f"  Dijkstra: {graph.num_nodes} nodes settled, "
+                  f"{1000 * elapsed / args.queries:.2f} ms/query")
+            for label, active in (("bidirectional Dijkstra", 0), ("ALT", 4)):
+                settled = 0
+                start = time.perf_counter()
+                for (s, t), d in zip(graph.node_ids[pairs].tolist(), expected):
+                    found, count = index.search(s, t, active)
+                    assert found == d, (s, t, found, d)
+                    settled += count
+                elapsed = time.perf_counter() - start
+                print(f"  {label}: {settled / args.queries:.0f} nodes settled, "
+                      f"{1000 * elapsed / args.queries:.2f} ms/query")
@@ -0,0 +1,405 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+import instrument
+from array_graph import ArrayGraph
+from traversal import bfs_levels, gather_ranges
+
+# Exact O(n^2) repulsion up to this many nodes, the grid approximation above
+EXACT_MAX_NODES = 1000
+
+# Layouts kept in memory for repeated calls in one process, least recently
+# used first out
+MEMORY_ENTRIES = 32
+
+_memory = OrderedDict()  # fingerprint -> positions
+
+
+def _repulsion_exact(pos, k2):
+    delta = pos[:, None, :] - pos[None, :, :]
+    d2 = np.maximum(np.einsum("ijk,ijk->ij", delta, delta), 1e-8)
+    np.fill_diagonal(d2, np.inf)
+    return np.einsum("ijk,ij->ik", delta, k2 / d2)
+
+
+def _repulsion_grid(pos, k2, levels, max_pairs=64):
+    """Barnes-Hut style repulsion on a hierarchy of square grids.
+
+    At every level a node is pushed by the center of mass of each cell that
+    is not adjacent to its own cell but whose parent is adjacent to its own
+    cell's parent, so every other node is counted once, at the coarsest
+    level where it is well separated. Nodes in the same or adjacent cells of
+    the finest level push exactly, pair by pair, unless that is more than
+    `max_pairs` pairs per node (tight clusters); then they are cell centers
+    of mass too. Cell sums are bincounts and the interaction list is 27
+    fixed cell offsets per parity of the node's cell, so an iteration is
+    O(n * levels) in NumPy.
+    """
+    n = len(pos)
+    lo = pos.min(axis=0)
+    span = max(float((pos.max(axis=0) - lo).max()), 1e-12)
+    unit = (pos - lo) / span
+    disp = np.zeros_like(pos)
+    for level in range(1, levels + 1):
+        size = 1 << level
+        cell = np.minimum((unit * size).astype(np.int64), size - 1)
+        # Grids padded by 3 empty cells on each side, so no bounds checks
+        width = size + 6
+        key = (cell[:, 0] + 3) * width + cell[:, 1] + 3
+        count = np.bincount(key, minlength=width * width)
+        mass = count.astype(pos.dtype)
+        com_x = np.bincount(key, pos[:, 0], width * width)
+        com_y = np.bincount(key, pos[:, 1], width * width)
+        filled = mass > 0
+        com_x[filled] /= mass[filled]
+        com_y[filled] /= mass[filled]
+        near = False
+        if level == levels:
+            offsets = [dx * width + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+            if sum(int(count[key + offset].sum()) for offset in offsets) <= max_pairs * n:
+                _repulsion_pairs(pos, k2, key, count, offsets, disp)
+            else:
+                near = True
+        parity = (cell[:, 0] & 1) * 2 + (cell[:, 1] & 1)
+        for bx in (0, 1):
+            for by in (0, 1):
+                nodes = np.flatnonzero(parity == bx * 2 + by)
+                if not len(nodes):
+                    continue
+                own = key[nodes]
+                x, y = pos[nodes, 0], pos[nodes, 1]
+                fx = np.zeros(len(nodes))
+                fy = np.zeros(len(nodes))
+                far = [
+                    dx * width + dy
+                    for dx in range(-2 - bx, 4 - bx)
+                    for dy in range(-2 - by, 4 - by)
+                    if abs(dx) > 1 or abs(dy) > 1 or near
+                ]
+                for offset in far:
+                    other = own + offset
+                    m = mass[other]
+                    ox, oy = com_x[other], com_y[other]
+                    if offset == 0:
+                        # The rest of the own cell
+                        m = m - 1
+                        rest = np.maximum(m, 1)
+                        ox = np.where(m > 0, (ox * (m + 1) - x) / rest, x)
+                        oy = np.where(m > 0, (oy * (m + 1) - y) / rest, y)
+                    ddx, ddy = x - ox, y - oy
+                    scale = m * k2 / np.maximum(ddx * ddx + ddy * ddy, 1e-8)
+                    fx += ddx * scale
+                    fy += ddy * scale
+                disp[nodes, 0] += fx
+                disp[nodes, 1] += fy
+    return disp
+
+
+def _repulsion_pairs(pos, k2, key, count, offsets, disp):
+    # Exact repulsion between every node and the nodes of the cells at `offsets`
+    order = np.argsort(key, kind="stable")
+    start = np.zeros(len(count) + 1, dtype=np.int64)
+    np.cumsum(count, out=start[1:])
+    n = len(pos)
+    for offset in offsets:
+        cells = key + offset
+        i = np.repeat(np.arange(n), count[cells])
+        j = order[gather_ranges(start, cells)]
+        i, j = i[i != j], j[i != j]
+        delta = pos[i] - pos[j]
+        scale = k2 / np.maximum(np.einsum("ij,ij->i", delta, delta), 1e-8)
+        for axis in (0, 1):
+            disp[:, axis] += np.bincount(i, delta[:, axis] * scale, n)
+
+
+def _spring(pos, src, dst, iterations, temperature):
+    """Fruchterman-Reingold moves of `pos` (in the unit square) in place."""
+    n = len(pos)
+    k = 1 / np.sqrt(n)
+    levels = min(10, max(1, int(np.ceil(np.log(n / 4) / np.log(4)))))
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        if n <= EXACT_MAX_NODES:
+            disp = _repulsion_exact(pos, k * k)
+        else:
+            disp = _repulsion_grid(pos, k * k, levels)
+        delta = pos[src] - pos[dst]
+        pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) / k)[:, None]
+        for axis in (0, 1):
+            disp[:, axis] -= np.bincount(src, pull[:, axis], n)
+            disp[:, axis] += np.bincount(dst, pull[:, axis], n)
+        length = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-8)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+
+def _coarsen(n, src, dst, rng, rounds=3):
+    """Coarse node of every node and the coarse node count.
+
+    Adjacent nodes are merged in pairs: in each round every unmatched node
+    picks its unmatched neighbor of smallest random label, and mutual picks
+    become a pair.
+    """
+    label = rng.random(n)
+    nodes = np.arange(n)
+    mate = nodes.copy()
+    u, v = np.concatenate([src, dst]), np.concatenate([dst, src])
+    for _ in range(rounds):
+        free = (mate[u] == u) & (mate[v] == v)
+        if not free.any():
+            break
+        a, b = u[free], v[free]
+        order = np.lexsort((label[b], a))
+        a, b = a[order], b[order]
+        first = np.r_[True, a[1:] != a[:-1]]
+        pick = np.full(n, -1)
+        pick[a[first]] = b[first]
+        mutual = (pick >= 0) & (pick[pick] == nodes)
+        mate[mutual] = pick[mutual]
+    ids, mapping = np.unique(np.minimum(nodes, mate), return_inverse=True)
+    return mapping, len(ids)
+
+
+def force_layout(num_nodes, src, dst, iterations=50, seed=0, min_nodes=50):
+    """Multilevel Fruchterman-Reingold positions in [-1, 1]^2, an (n, 2) array.
+
+    Edges (src[i], dst[i]) pull their endpoints together with force d^2/k,
+    all pairs of nodes push apart with k^2/d, and moves are capped by a
+    linearly cooling temperature, as in nx.spring_layout. The graph is
+    first coarsened by merging matched pairs of adjacent nodes down to
+    about `min_nodes` nodes; the coarsest graph starts from random
+    positions and every finer one from the positions of its coarse nodes,
+    for a quarter of the iterations at a lower temperature, which avoids
+    the folds a single level gets stuck in. Repulsion is exact for small
+    graphs and approximated on a grid hierarchy (_repulsion_grid) for large
+    ones. Deterministic for a given seed.
+    """
+    n = num_nodes
+    rng = np.random.default_rng(seed)
+    if n <= 1:
+        return np.zeros((n, 2))
+    src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+    keep = src != dst
+    graphs = [(n, src[keep], dst[keep])]
+    mappings = []
+    while graphs[-1][0] > min_nodes:
+        size, a, b = graphs[-1]
+        mapping, coarse = _coarsen(size, a, b, rng)
+        if coarse > 0.9 * size:
+            break
+        edges = np.unique(np.sort(np.stack([mapping[a], mapping[b]], axis=1), axis=1), axis=0)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        mappings.append(mapping)
+        graphs.append((coarse, edges[:, 0], edges[:, 1]))
+
+    size, a, b = graphs[-1]
+    pos = rng.random((size, 2))
+    _spring(pos, a, b, iterations, 0.1)
+    refine = max(10, iterations // 4)
+    for (size, a, b), mapping in zip(graphs[-2::-1], mappings[::-1]):
+        pos = (_rescale(pos) + 1) / 2
+        # Nodes of a pair start at the pair's position, slightly apart
+        pos = pos[mapping] + rng.normal(scale=0.1 / np.sqrt(size), size=(size, 2))
+        _spring(pos, a, b, refine, 2 / np.sqrt(size))
+    return _rescale(pos)
+
+
+def layered_layout(num_nodes, src, dst, source, sink=None, sweeps=4):
+    """Left-to-right positions for a flow network, an (n, 2) array.
+
+    A node's column is its hop distance from `source` (edges taken in both
+    directions); `sink`, if given, gets a column of its own on the right.
+    Nodes in other components go to the source's column. Inside a column
+    nodes are ordered by the mean row of their neighbors in the previous
+    column, then the next one (barycenter sweeps), to reduce crossings.
+    """
+    n = num_nodes
+    src, dst = np.asarray(src), np.asarray(dst)
+    graph = ArrayGraph.from_indexed_edges(src, dst, np.arange(n))
+    visit, height = bfs_levels(graph, source)
+    level = np.zeros(n, dtype=np.int64)
+    level[visit] = height
+    if sink is not None:
+        others = np.delete(level, sink)
+        if len(others) and others.max() >= level[sink]:
+            level[sink] = others.max() + 1
+
+    # Rows inside each column, first in node order
+    u = np.concatenate([src, dst])
+    v = np.concatenate([dst, src])
+    row = _rows(level, np.arange(n, dtype=np.float64))
+    for sweep in range(2 * sweeps):
+        step = 1 if sweep % 2 == 0 else -1
+        adjacent = level[v] == level[u] - step
+        count = np.bincount(u[adjacent], minlength=n)
+        total = np.bincount(u[adjacent], row[v[adjacent]], n)
+        key = np.where(count > 0, total / np.maximum(count, 1), row)
+        row = _rows(level, key)
+
+    size = np.bincount(level)
+    columns = max(int(level.max()), 1)
+    height = max(int(size.max()) - 1, 1)
+    pos = np.empty((n, 2))
+    pos[:, 0] = 2 * level / columns - 1 if level.max() else 0
+    pos[:, 1] = -(2 * row - (size[level] - 1)) / height
+    return pos
+
+
+def _rows(level, key):
+    # Rank of every node inside its column, by key
+    order = np.lexsort((key, level))
+    first = np.searchsorted(level[order], level[order])
+    row = np.empty(len(level), dtype=np.float64)
+    row[order] = np.arange(len(level)) - first
+    return row
+
+
+def _rescale(pos):
+    # Centered and scaled into [-1, 1]^2 like nx.rescale_layout
+    pos = pos - pos.mean(axis=0)
+    extent = np.abs(pos).max()
+    return pos / extent if extent > 0 else pos
+
+
+def _fingerprint(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else np.ascontiguousarray(part).tobytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def default_cache_dir():
+    """The per-user layout cache, $XDG_CACHE_HOME/graph_algos/layouts."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "graph_algos", "layouts")
+
+
+def _read_positions(path):
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_positions(path, pos):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written under a temporary name first, so a half-written file is never read
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as file:
+        np.save(file, pos)
+    os.replace(tmp, path)
+
+
+def _cached(fingerprint, compute, cache_dir):
+    """Positions for `fingerprint` from memory, the cache_dir .npy or compute()."""
+    pos = _memory.get(fingerprint)
+    if pos is not None:
+        _memory.move_to_end(fingerprint)
+        return pos
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    path = os.path.join(cache_dir, f"{fingerprint}.npy") if cache_dir else None
+    if path is not None:
+        pos = _read_positions(path)
+    if pos is None:
+        pos = compute()
+        if path is not None:
+            try:
+                _write_positions(path, pos)
+            except OSError:
+                pass
+    _memory[fingerprint] = pos
+    if len(_memory) > MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+    return pos
+
+
+def _layout(kind, n, src, dst, identity, source, sink, seed, iterations, cache_dir):
+    if kind not in ("force", "layered"):
+        raise ValueError(f"Unknown layout {kind!r}")
+    if kind == "layered" and source is None:
+        raise ValueError("A layered layout needs a source")
+    params = {"kind": kind, "n": n}
+    if kind == "force":
+        params.update(seed=seed, iterations=iterations)
+    else:
+        params.update(source=source, sink=sink)
+    fingerprint = _fingerprint(json.dumps(params).encode(), *identity)
+
+    def compute():
+        with instrument.phase("layout"):
+            if kind == "force":
+                return force_layout(n, src, dst, iterations, seed)
+            return layered_layout(n, src, dst, source, sink)
+
+    return _cached(fingerprint, compute, cache_dir)
+
+
+def graph_layout(G, kind="force", source=None, sink=None, seed=0, iterations=50, cache_dir=None):
+    """{node: array([x, y])} for a networkx graph, computed once per graph.
+
+    kind is "force" (force_layout) or "layered" (layered_layout from
+    `source` to `sink`). Positions are keyed by a fingerprint of the nodes,
+    edges and parameters and kept in memory (the last MEMORY_ENTRIES) and
+    as .npy files in `cache_dir`, default_cache_dir unless given, so every
+    plot of the same graph gets the same picture without recomputing it.
+    Pass cache_dir=False to keep them in memory only. If the cache cannot
+    be written, the positions are returned uncached.
+    """
+    nodes = sorted(G, key=repr)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    if not G.is_directed():
+        edges.sort(axis=1)
+    edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+    identity = (repr(nodes).encode(), bytes([G.is_directed()]), edges)
+    pos = _layout(
+        kind, len(nodes), edges[:, 0], edges[:, 1], identity,
+        None if source is None else index[source],
+        None if sink is None else index[sink],
+        seed, iterations, cache_dir,
+    )
+    return dict(zip(nodes, pos))
+
+
+def array_graph_layout(graph, kind="force", source=None, sink=None, seed=0, iterations=50,
+                       cache_dir=None):
+    """(n, 2) positions of an ArrayGraph aligned with node_ids, see graph_layout.
+
+    source and sink are node ids.
+    """
+    src, dst, _ = graph.edge_indices()
+    identity = (graph.node_ids, graph.offsets, graph.neighbors, bytes([graph.directed]))
+    return _layout(
+        kind, graph.num_nodes, src, dst, identity,
+        None if source is None else graph.index_of(source),
+        None if sink is None else graph.index_of(sink),
+        seed, iterations, cache_dir,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from shortest_paths import random_weighted_graph
+
+    parser = argparse.ArgumentParser(description="Layout benchmark")
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    graph = random_weighted_graph(args.nodes, args.edges)
+    print(f"n={graph.num_nodes}, {graph.num_edges} edges")
+    for kind, source in (("force", None), ("layered", graph.node_ids[0])):
+        start = time.perf_counter()
+        pos = array_graph_layout(graph, kind, source, iterations=args.iterations)
+        elapsed = time.perf_counter() - start
+        assert pos.shape == (graph.num_nodes, 2) and np.isfinite(pos).all()
+        print(f"{kind}: {elapsed:.2f}s")
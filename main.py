@@ -1,91 +1,127 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+from array import array
+
+import numpy as np
+
+from array_graph import ArrayGraph
+from disk_graph import DiskGraph
+from edge_loader import load_edge_list
+import instrument
+from layout import array_graph_layout, graph_layout
+from multi_bfs import bfs_heights
+from render import NX_MAX_NODES, positions_array, render_graph
+from traversal import bfs_levels, dfs_preorder
 
 
 class GraphVisualization:
     def __init__(self):
-        self.graph = nx.Graph()
+        # Edges added since the last build; the CSR graph is rebuilt lazily
+        self._src = array("q")
+        self._dst = array("q")
+        self._graph = None
+
+    @property
+    def graph(self):
+        if isinstance(self._graph, DiskGraph) and len(self._src):
+            raise ValueError("Edges cannot be added to a graph read from disk")
+        if self._graph is None or len(self._src):
+            src = np.frombuffer(self._src, dtype=np.int64)
+            dst = np.frombuffer(self._dst, dtype=np.int64)
+            if self._graph is not None:
+                old_src, old_dst, _ = self._graph.edge_arrays()
+                src = np.concatenate([old_src, src])
+                dst = np.concatenate([old_dst, dst])
+            with instrument.phase("build"):
+                self._graph = ArrayGraph.from_edges(src, dst)
+            self._src = array("q")
+            self._dst = array("q")
+        return self._graph
 
     def add_edge(self, node, neighbor):
-        self.graph.add_edge(node, neighbor)
-
-    def read_from_file(self, file_path):
-        with open(file_path, "r") as file:
-            for line in file:
-                line = line.strip()
-                # Ignore comments and blank lines
-                if not line or line.startswith("#"):
-                    continue
-                # Parse the nodes and add the edge
-                node, neighbor = map(int, line.split(","))
-                # node, neighbor = line.split(",")
-                self.add_edge(node, neighbor)
+        self._src.append(node)
+        self._dst.append(neighbor)
+
+    def read_from_file(self, file_path, cache_dir=None):
+        # Comments and blank lines are ignored; the parsed edges are cached
+        # next to the file, see edge_loader.load_edge_list
+        with instrument.phase("parse"):
+            edges = load_edge_list(file_path, columns=2, cache_dir=cache_dir)
+        if self._graph is None and not len(self._src):
+            self._graph = ArrayGraph.from_indexed_edges(
+                edges.src, edges.dst, edges.node_ids
+            )
+        else:
+            self._src.extend(edges.node_ids[edges.src].tolist())
+            self._dst.extend(edges.node_ids[edges.dst].tolist())
 
-    def bfs(self, start):
-        visited = set()
-        queue = []
-        order = {}
-        height = {}  # New dictionary to keep track of heights of nodes
-
-        queue.append((start, 0))  # Queue now stores tuples of (node, height)
-        visited.add(start)
-        order[start] = 0
-        height[start] = 0  # Height of root is 0
-
-        count = 1
-        while queue:
-            current, h = queue.pop(0)
-            for neighbor in sorted(self.graph[current]):
-                if neighbor not in visited:
-                    queue.append((neighbor, h + 1))  # Increment height for child nodes
-                    visited.add(neighbor)
-                    order[neighbor] = count
-                    height[neighbor] = h + 1  # Store the height of the neighbor
-                    count += 1
+    def read_from_disk(self, path, max_resident=64 * 2**20):
+        # A graph written by DiskGraph.build: the edges stay on disk and
+        # bfs/dfs read them through mappings of bounded resident size
+        self._graph = DiskGraph(path, max_resident)
 
+    def bfs(self, start):
+        g = self.graph
+        with instrument.phase("bfs"):
+            if isinstance(g, DiskGraph):
+                visit, level = g.bfs_levels(g.index_of(start))
+            else:
+                visit, level = bfs_levels(g, g.index_of(start))
+        nodes = g.node_ids[visit].tolist()
+        order = dict(zip(nodes, range(len(nodes))))
+        height = dict(zip(nodes, level.tolist()))  # Height of root is 0
         return order, height  # Return both order and height
 
-    def dfs(self, start):
-        visited = set()
-        stack = []
-        order = {}
-        height = {}
-
-        stack.append((start, 0))
-        order[start] = 0
-        height[start] = 0
-
-        count = 1
-        while stack:
-            current, h = stack.pop()  # Pop from the stack to get the current node
-            if current not in visited:
-                visited.add(current)
-                for neighbor in sorted(self.graph[current], reverse=True):  # Use sorted to process nodes numerically
-                    if neighbor not in visited:
-                        stack.append((neighbor, h + 1))
-                order[current] = count
-                count += 1
+    def bfs_heights(self, starts):
+        # Bit-parallel BFS from all starts, 64 at a time (multi_bfs.py): one
+        # row of heights per start, columns follow self.graph.node_ids, -1
+        # where unreachable
+        g = self.graph
+        return bfs_heights(g, [g.index_of(start) for start in starts])
 
+    def dfs(self, start):
+        g = self.graph
+        with instrument.phase("dfs"):
+            if isinstance(g, DiskGraph):
+                visit, _ = g.dfs_preorder(g.index_of(start))
+            else:
+                visit, _ = dfs_preorder(g, g.index_of(start))
+        nodes = g.node_ids[visit].tolist()
+        order = dict(zip(nodes, range(1, len(nodes) + 1)))
+        height = {start: 0}
         return order, height
-    def visualize(self, start=None):
+
+    def to_networkx(self):
+        return self.graph.to_networkx()
+
+    def visualize(self, start=None, pos=None, lod="auto"):
+        # Large graphs are drawn as batched collections or a density image,
+        # see render.render_graph for the levels of detail
+        if self.graph.num_nodes > NX_MAX_NODES:
+            return self._render_large(start, pos, lod)
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
+        G = self.to_networkx()
+        if pos is None:
+            pos = graph_layout(G)  # cached, the same in every plot of this graph
         plt.figure(figsize=(10, 10))
 
         if start:
             order, _ = self.bfs(start)
             node_color = [
-                order[node] if node in order else 0 for node in self.graph.nodes()
+                order[node] if node in order else 0 for node in G.nodes()
             ]
             labels = {
                 # node: f"{node} ({order[node]})" if node in order else node
                 node: f"{node}" if node in order else node
-                for node in self.graph.nodes()
+                for node in G.nodes()
             }
         else:
             node_color = "skyblue"
-            labels = {node: node for node in self.graph.nodes()}
+            labels = {node: node for node in G.nodes()}
 
         nx.draw_networkx(
-            self.graph,
+            G,
+            pos,
             labels=labels,
             node_size=2000,
             node_color=node_color,
@@ -99,36 +135,42 @@ class GraphVisualization:
         print(order)
         # plt.show()
 
-    def visualize_bfs_tree(self, start=None):
+    def visualize_bfs_tree(self, start=None, pos=None, lod="auto"):
         if start is None:
             raise ValueError(
                 "A starting node must be provided to visualize the BFS tree."
             )
+        if self.graph.num_nodes > NX_MAX_NODES:
+            return self._render_large_tree(start, pos, lod)
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
+        G = self.to_networkx()
 
         order, height = self.bfs(start)  # Get the height info as well
 
-        # Calculate positions for nodes based on their height
-        pos = nx.spring_layout(self.graph, iterations=100)
-        for node, (x, y) in pos.items():
-            pos[node] = (x, -height[node])  # Adjust y coordinate based on height
+        # Keep the x of the shared layout, y is the height
+        if pos is None:
+            pos = graph_layout(G)
+        pos = {node: (x, -height[node]) for node, (x, _) in pos.items()}
 
         node_color = [
-            height[node] for node in self.graph.nodes()
+            height[node] for node in G.nodes()
         ]  # Color nodes based on height
 
         plt.figure(figsize=(12, 12), facecolor="white")
         # Draw nodes with varying color based on height and straight lines for edges
         nx.draw_networkx_edges(
-            self.graph, pos, edge_color="gray", alpha=0.5, arrows=False
+            G, pos, edge_color="gray", alpha=0.5, arrows=False
         )
         nx.draw_networkx_nodes(
-            self.graph, pos, node_size=1000, node_color=node_color, cmap=plt.cm.viridis
+            G, pos, node_size=1000, node_color=node_color, cmap=plt.cm.viridis
         )
-        nx.draw_networkx_labels(self.graph, pos, font_size=10, font_weight="bold")
+        nx.draw_networkx_labels(G, pos, font_size=10, font_weight="bold")
 
         # Labels to indicate the height of the nodes
         label_pos = {k: (v[0], v[1] - 0.1) for k, v in pos.items()}
-        nx.draw_networkx_labels(self.graph, label_pos, labels=order, font_color="red")
+        nx.draw_networkx_labels(G, label_pos, labels=order, font_color="red")
 
         plt.title(f"BFS Tree from node {start} with node heights")
         plt.axis("off")  # Hide the axes
@@ -137,6 +179,42 @@ class GraphVisualization:
         print("Order of nodes:", order)
         print("Height of nodes:", height)
 
+    def _render_large(self, start, pos, lod):
+        g = self.graph
+        pos = array_graph_layout(g) if pos is None else positions_array(pos, g.node_ids)
+        node_color = "skyblue"
+        if start:
+            visit, _ = bfs_levels(g, g.index_of(start))
+            node_color = np.zeros(g.num_nodes)
+            node_color[visit] = np.arange(len(visit))
+        src, dst, _ = g.edge_indices()
+        render_graph(pos, src, dst, "graph.png", lod, node_color=node_color,
+                     cmap="Blues", title=f"BFS from node {start}")
+
+    def _render_large_tree(self, start, pos, lod):
+        # Only the nodes reached from start; x from the layout, y is the height
+        g = self.graph
+        visit, height = bfs_levels(g, g.index_of(start))
+        if pos is None:
+            x = array_graph_layout(g, "layered", source=start)[:, 1]
+        else:
+            x = positions_array(pos, g.node_ids)[:, 0]
+        index = np.full(g.num_nodes, -1)
+        index[visit] = np.arange(len(visit))
+        src, dst, _ = g.edge_indices()
+        reached = (index[src] >= 0) & (index[dst] >= 0)
+        render_graph(
+            np.stack([x[visit], -height], axis=1),
+            index[src[reached]],
+            index[dst[reached]],
+            "bfs_tree_height.png",
+            lod,
+            node_color=height,
+            cmap="viridis",
+            height=height,
+            title=f"BFS Tree from node {start} with node heights",
+        )
+
 
 if __name__ == "__main__":
     graph = GraphVisualization()
@@ -146,6 +224,5 @@ if __name__ == "__main__":
 
     # TODO: add DFS
     # TODO: visualize path between 2 nodes on tree
-    # TODO: why each visualization is different? nodes are on different locations
     # TODO: visualize the graph so edges won't cross each other
     # TODO: add traversal_mode parameter to visualize method
@@ -1,78 +1,51 @@
-import networkx as nx
-import matplotlib.pyplot as plt
-
-
-def find_augmenting_path(G, source, sink, residual_capacity):
-    """Find a shortest path considering only edges with residual capacity"""
-    for path in nx.all_simple_paths(G, source, sink):
-        # Check if the path can be used for augmentation
-        if all(
-            G[u][v]["capacity"] - residual_capacity.get((u, v), 0) > 0
-            for u, v in zip(path[:-1], path[1:])
-        ):
-            return path
-    return None
-
-
-def augment_flow(G, path, residual_capacity):
-    """Augment flow along a path and update residual capacities"""
-    flow = min(
-        G[u][v]["capacity"] - residual_capacity.get((u, v), 0)
-        for u, v in zip(path[:-1], path[1:])
-    )
-    for u, v in zip(path[:-1], path[1:]):
-        if (u, v) in residual_capacity:
-            residual_capacity[(u, v)] += flow
-        else:
-            residual_capacity[(u, v)] = flow
-    return flow
-
-
-def simple_flow_algorithm(G, source, sink):
-    """A simple flow augmentation algorithm"""
-    residual_capacity = {}
-    total_flow = 0
-
-    while True:
-        path = find_augmenting_path(G, source, sink, residual_capacity)
-        if not path:
-            break  # No augmenting path
-        flow = augment_flow(G, path, residual_capacity)
-        total_flow += flow
-
-    return total_flow
-
-
-# Create and populate the graph
-G = nx.DiGraph()
-edges = [
-    ("A", "B", 10),
-    ("B", "C", 5),
-    ("A", "C", 15),
-    ("C", "D", 10),
-    ("B", "D", 10),
-    ("D", "E", 10),
-]
-for u, v, capacity in edges:
-    G.add_edge(u, v, capacity=capacity)
-
-source = "A"
-sink = "E"
-
-# Calculate the maximum flow
-max_flow = simple_flow_algorithm(G, source, sink)
-print("The maximum flow from source to sink is:", max_flow)
-
-# Drawing the graph with flow labels
-pos = nx.spring_layout(G)
-nx.draw(G, pos, with_labels=True, node_color="lightblue", node_size=700)
-labels = {
-    edge: f"{residual_capacity.get(edge, 0)}/{G[edge[0]][edge[1]]['capacity']}"
-    for edge in G.edges()
-}
-nx.draw_networkx_edge_labels(G, pos, edge_labels=labels)
-plt.title("Flow Network")
-plt.show()
-
-
-# TODO: issue with residual capacity
\ No newline at end of file
+from layout import graph_layout
+from min_cost_flow import CostFlowNetwork
+
+
+def klein_min_cost_flow(G, source, sink):
+    """Klein's algorithm: find a maximum flow, then cancel negative cycles
+
+    The residual network (reverse edges included) lives in flat arrays and
+    negative cycles are found with Bellman-Ford, see min_cost_flow.py.
+    Returns (flow_value, cost, flow_dict).
+    """
+    network = CostFlowNetwork.from_networkx(G)
+    flow_value, cost = network.cycle_cancelling(source, sink)
+    return flow_value, cost, network.flow_dict()
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    # Create and populate the graph
+    G = nx.DiGraph()
+    edges = [
+        ("A", "B", 10, 2),
+        ("B", "C", 5, 1),
+        ("A", "C", 15, 4),
+        ("C", "D", 10, 1),
+        ("B", "D", 10, 3),
+        ("D", "E", 10, 1),
+    ]
+    for u, v, capacity, cost in edges:
+        G.add_edge(u, v, capacity=capacity, weight=cost)
+
+    source = "A"
+    sink = "E"
+
+    # Calculate the maximum flow of minimum cost
+    max_flow, cost, flow_dict = klein_min_cost_flow(G, source, sink)
+    print("The maximum flow from source to sink is:", max_flow)
+    print("Its minimum cost is:", cost)
+
+    # Drawing the graph with flow labels
+    pos = graph_layout(G, "layered", source=source, sink=sink)
+    nx.draw(G, pos, with_labels=True, node_color="lightblue", node_size=700)
+    labels = {
+        (u, v): f"{flow_dict[u][v]}/{G[u][v]['capacity']}, ${G[u][v]['weight']}"
+        for u, v in G.edges()
+    }
+    nx.draw_networkx_edge_labels(G, pos, edge_labels=labels)
+    plt.title("Flow Network")
+    plt.show()
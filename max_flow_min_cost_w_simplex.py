@@ -1,25 +1,59 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+from layout import graph_layout
+from min_cost_flow import max_flow_min_cost
+from render import NX_MAX_NODES, render_networkx
+
+
+def flow_graph(graph_edges):
+    """nx.DiGraph of (u, v, capacity, cost) edges, for networkx and plotting."""
+    import networkx as nx
 
-def find_max_flow_min_cost(graph_edges, source, sink):
     G = nx.DiGraph()
     for u, v, capacity, cost in graph_edges:
         G.add_edge(u, v, capacity=capacity, weight=cost)
+    return G
+
 
-    # Prepare for the minimum cost flow calculation
-    # Set the demand for source as the sum of capacities leading from source
-    # and the demand for sink as negative of this sum
-    demand = sum(capacity for u, v, capacity, cost in graph_edges if u == source)
-    G.nodes[source]['demand'] = -demand
-    G.nodes[sink]['demand'] = demand
+def find_max_flow_min_cost(graph_edges, source, sink, backend="cost_scaling", warm_start=None):
+    """Returns the graph and the flow_dict of a maximum flow of minimum cost
 
-    # Calculate minimum cost flow
-    flow_dict = nx.min_cost_flow(G)
+    backend is "cost_scaling" (default), "ssp" or "cycle_cancelling" from
+    min_cost_flow.py, or "network_simplex" for networkx. warm_start is a
+    previous flow_dict, used by cost_scaling when costs changed slightly.
+    Only "network_simplex" needs networkx and builds the graph; the other
+    backends return None for it (see flow_graph to plot their flows).
+    """
+    G = None
+    if backend == "network_simplex":
+        import networkx as nx
+
+        G = flow_graph(graph_edges)
+        # The demand is the true maximum flow value, any larger amount
+        # would be infeasible
+        demand = nx.maximum_flow_value(G, source, sink)
+        G.nodes[source]['demand'] = -demand
+        G.nodes[sink]['demand'] = demand
+        flow_dict = nx.min_cost_flow(G)
+    else:
+        _, _, flow_dict = max_flow_min_cost(
+            graph_edges, source, sink, method=backend, warm_start=warm_start
+        )
 
     return G, flow_dict
 
-def plot_graph(G, flow_dict):
-    pos = nx.spring_layout(G)  # positions for all nodes
+
+def plot_graph(G, flow_dict, pos=None):
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    if pos is None:
+        pos = graph_layout(G)  # positions for all nodes
+
+    if G.number_of_nodes() > NX_MAX_NODES:
+        # Batched drawing without per-edge labels for large networks
+        render_networkx(G, pos, ax=plt.gca(), node_color='lightblue',
+                        title="Network Graph with Minimum Cost Flow")
+        plt.show()
+        return
     
     # Draw nodes
     nx.draw_networkx_nodes(G, pos, node_color='lightblue', node_size=700)
@@ -36,23 +70,26 @@ def plot_graph(G, flow_dict):
     plt.axis("off")
     plt.show()
 
-# Example usage
-graph_edges = [
-    ('A', 'B', 10, 2),
-    ('A', 'C', 5, 1),
-    ('B', 'C', 15, 1),
-    ('B', 'D', 9, 3),
-    ('C', 'D', 4, 1),
-    ('C', 'E', 8, 2),
-    ('D', 'E', 15, 2),
-    ('E', 'F', 10, 1),
-    ('D', 'F', 10, 4)
-]
-source = 'A'
-sink = 'F'
-
-# Get the graph and flow dictionary
-G, flow_dict = find_max_flow_min_cost(graph_edges, source, sink)
-
-# Plot the graph with minimum cost flow
-plot_graph(G, flow_dict)
+
+if __name__ == "__main__":
+    # Example usage
+    graph_edges = [
+        ('A', 'B', 10, 2),
+        ('A', 'C', 5, 1),
+        ('B', 'C', 15, 1),
+        ('B', 'D', 9, 3),
+        ('C', 'D', 4, 1),
+        ('C', 'E', 8, 2),
+        ('D', 'E', 15, 2),
+        ('E', 'F', 10, 1),
+        ('D', 'F', 10, 4)
+    ]
+    source = 'A'
+    sink = 'F'
+
+    # Get the graph and flow dictionary
+    _, flow_dict = find_max_flow_min_cost(graph_edges, source, sink)
+
+    # Plot the graph with minimum cost flow
+    G = flow_graph(graph_edges)
+    plot_graph(G, flow_dict, graph_layout(G, "layered", source=source, sink=sink))
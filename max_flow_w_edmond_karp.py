@@ -1,7 +1,9 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+from layout import graph_layout
+from render import NX_MAX_NODES, render_networkx
 
 def edmonds_karp_max_flow(graph, source, sink):
+    import networkx as nx
+
     # Create a directed graph
     G = nx.DiGraph()
     
@@ -14,9 +16,19 @@ def edmonds_karp_max_flow(graph, source, sink):
     
     return G, flow_value, flow_dict
 
-def plot_graph(G, flow_dict, source, sink):
-    # Position nodes using the spring layout
-    pos = nx.spring_layout(G)
+def plot_graph(G, flow_dict, source, sink, pos=None):
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    # Source on the left, sink on the right (cached, see layout.py)
+    if pos is None:
+        pos = graph_layout(G, "layered", source=source, sink=sink)
+
+    if G.number_of_nodes() > NX_MAX_NODES:
+        # Batched drawing without per-edge labels for large networks
+        render_networkx(G, pos, ax=plt.gca(), node_color='lightblue', title="Network Flow Visualization")
+        plt.show()
+        return
     
     # Draw the network graph nodes
     nx.draw_networkx_nodes(G, pos, node_color='lightblue', node_size=700)
@@ -32,29 +44,27 @@ def plot_graph(G, flow_dict, source, sink):
     plt.title("Network Flow Visualization")
     plt.show()
 
-# Example usage
-graph_edges = [
-    ('A', 'B', 10),
-    ('A', 'C', 5),
-    ('B', 'C', 15),
-    ('B', 'D', 9),
-    ('C', 'D', 4),
-    ('C', 'E', 8),
-    ('D', 'E', 15),
-    ('E', 'F', 10),
-    ('D', 'F', 10)
-]
-source = 'A'
-sink = 'F'
-
-# Get the maximum flow and the flow along each edge
-G, max_flow, flow_edges = edmonds_karp_max_flow(graph_edges, source, sink)
-print("Maximum Flow:", max_flow)
-print("Flow along edges:", flow_edges)
-
-# Plot the graph
-plot_graph(G, flow_edges, source, sink)
 
+if __name__ == "__main__":
+    # Example usage
+    graph_edges = [
+        ('A', 'B', 10),
+        ('A', 'C', 5),
+        ('B', 'C', 15),
+        ('B', 'D', 9),
+        ('C', 'D', 4),
+        ('C', 'E', 8),
+        ('D', 'E', 15),
+        ('E', 'F', 10),
+        ('D', 'F', 10)
+    ]
+    source = 'A'
+    sink = 'F'
 
+    # Get the maximum flow and the flow along each edge
+    G, max_flow, flow_edges = edmonds_karp_max_flow(graph_edges, source, sink)
+    print("Maximum Flow:", max_flow)
+    print("Flow along edges:", flow_edges)
 
-# TODO: plot source sink from left to right (hierarchical or layered layout of pygraphviz dot layout)
+    # Plot the graph
+    plot_graph(G, flow_edges, source, sink)
@@ -1,8 +1,21 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+from layout import graph_layout
+from render import NX_MAX_NODES, render_networkx
 
-def plot_graph_with_min_cut(G, source, sink, cut_set):
-    pos = nx.spring_layout(G)  # positions for all nodes
+def plot_graph_with_min_cut(G, source, sink, cut_set, pos=None):
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    if pos is None:
+        pos = graph_layout(G, "layered", source=source, sink=sink)  # positions for all nodes
+
+    if G.number_of_nodes() > NX_MAX_NODES:
+        # Batched drawing without labels for large networks, cut edges in red
+        cut = [u in cut_set[0] and v in cut_set[1] for u, v in G.edges()]
+        render_networkx(G, pos, ax=plt.gca(), node_color='lightblue',
+                        edge_color=['red' if c else 'gray' for c in cut],
+                        title="Network Graph with Min-Cut Highlighted")
+        plt.show()
+        return
     
     # Nodes
     nx.draw_networkx_nodes(G, pos, node_color='lightblue', node_size=700)
@@ -10,8 +23,9 @@ def plot_graph_with_min_cut(G, source, sink, cut_set):
     # Edges
     nx.draw_networkx_edges(G, pos, edgelist=G.edges(), edge_color='gray')
     
-    # Highlighting the cut edges
-    cut_edges = [(u, v) for u in cut_set[0] for v in cut_set[1] if G.has_edge(u, v)]
+    # Highlighting the cut edges, one pass over the edges
+    source_side, sink_side = map(set, cut_set)
+    cut_edges = [(u, v) for u, v in G.edges() if u in source_side and v in sink_side]
     nx.draw_networkx_edges(G, pos, edgelist=cut_edges, edge_color='red', style='dashed')
     
     # Labels
@@ -24,6 +38,8 @@ def plot_graph_with_min_cut(G, source, sink, cut_set):
     plt.show()
 
 def find_max_flow_min_cut(graph_edges, source, sink):
+    import networkx as nx
+
     G = nx.DiGraph()
     for u, v, capacity in graph_edges:
         G.add_edge(u, v, capacity=capacity)
@@ -35,23 +51,25 @@ def find_max_flow_min_cut(graph_edges, source, sink):
 
     return G, cut_set
 
-# Example usage
-graph_edges = [
-    ('A', 'B', 10),
-    ('A', 'C', 5),
-    ('B', 'C', 15),
-    ('B', 'D', 9),
-    ('C', 'D', 4),
-    ('C', 'E', 8),
-    ('D', 'E', 15),
-    ('E', 'F', 10),
-    ('D', 'F', 10)
-]
-source = 'A'
-sink = 'F'
-
-# Get the graph and min-cut
-G, cut_set = find_max_flow_min_cut(graph_edges, source, sink)
-
-# Plot the graph with min-cut highlighted
-plot_graph_with_min_cut(G, source, sink, cut_set)
+
+if __name__ == "__main__":
+    # Example usage
+    graph_edges = [
+        ('A', 'B', 10),
+        ('A', 'C', 5),
+        ('B', 'C', 15),
+        ('B', 'D', 9),
+        ('C', 'D', 4),
+        ('C', 'E', 8),
+        ('D', 'E', 15),
+        ('E', 'F', 10),
+        ('D', 'F', 10)
+    ]
+    source = 'A'
+    sink = 'F'
+
+    # Get the graph and min-cut
+    G, cut_set = find_max_flow_min_cut(graph_edges, source, sink)
+
+    # Plot the graph with min-cut highlighted
+    plot_graph_with_min_cut(G, source, sink, cut_set)
@@ -0,0 +1,405 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from flow_engine import FlowNetwork, networkx_flow_edges
+
+
+class CostFlowNetwork(FlowNetwork):
+    """FlowNetwork whose edges also carry a cost per unit of flow.
+
+    `cost[2k]` is the cost of input edge k and `cost[2k + 1] = -cost[2k]`
+    the cost of sending flow back along its reverse residual edge.
+    """
+
+    def __init__(self, edges=()):
+        edges = list(edges)
+        super().__init__((u, v, c) for u, v, c, _ in edges)
+        cost = np.array([w for _, _, _, w in edges])
+        self.cost = np.empty(2 * len(cost), dtype=cost.dtype if len(cost) else np.int64)
+        self.cost[0::2] = cost
+        self.cost[1::2] = -cost
+        self.potential = None  # node prices left by cost_scaling
+
+    @classmethod
+    def from_networkx(cls, G, capacity="capacity", weight="weight"):
+        """Network of an nx.DiGraph; a missing capacity is infinite."""
+        if not G.is_directed():
+            raise ValueError("Minimum cost flow needs a directed graph")
+        edges, infinite = networkx_flow_edges(G, capacity)
+        network = cls((u, v, c, d.get(weight, 0)) for u, v, c, d in edges)
+        network.infinite = infinite
+        for node in G.nodes():
+            network.add_node(node)
+        network._build_arcs()
+        return network
+
+    def add_edge(self, u, v, capacity, cost=0):
+        new = not (
+            u in self.index
+            and v in self.index
+            and (self.index[u], self.index[v]) in self.edge_index
+        )
+        super().add_edge(u, v, capacity)
+        if new:
+            self.cost = np.append(self.cost, [cost, -cost])
+
+    def update_cost(self, u, v, cost):
+        """Change the cost of edge (u, v); the current flow stays as is."""
+        k = self.edge_index[(self.index[u], self.index[v])]
+        self.cost[2 * k] = cost
+        self.cost[2 * k + 1] = -cost
+
+    def load_flows(self, flow_dict, source, sink):
+        """Set the flow from a flow_dict; returns False if it is not valid.
+
+        A valid flow respects the capacities and conserves flow at every
+        node other than `source` and `sink`.
+        """
+        flows = np.zeros(self.num_edges, dtype=self.capacity.dtype)
+        for (u, v), k in self.edge_index.items():
+            flows[k] = flow_dict.get(self.nodes[u], {}).get(self.nodes[v], 0)
+        capacity = self.capacity[0::2]
+        if (flows < 0).any() or (flows > capacity).any():
+            return False
+        balance = np.bincount(self.head[0::2], flows, self.num_nodes) - np.bincount(
+            self.head[1::2], flows, self.num_nodes
+        )
+        balance[[self.index[source], self.index[sink]]] = 0
+        if balance.any():
+            return False
+        self.residual = np.empty_like(self.capacity)
+        self.residual[0::2] = capacity - flows
+        self.residual[1::2] = flows
+        self.source, self.sink = source, sink
+        self.value = self.flow_value(source).item()
+        return True
+
+    def total_cost(self):
+        return (self.edge_flows() * self.cost[0::2]).sum().item()
+
+    def _tails(self):
+        return self.head[np.arange(len(self.head)) ^ 1]
+
+    def _bellman_ford(self, source=None):
+        """Vectorized Bellman-Ford over residual edges.
+
+        With source=None every node starts at distance 0 (a virtual source),
+        which finds negative cycles anywhere. Returns (dist, cycle), where
+        cycle is a list of residual edges of negative total cost, or None.
+        """
+        n = self.num_nodes
+        live = np.flatnonzero(self.residual > 0)
+        tail, head, cost = self._tails()[live], self.head[live], self.cost[live]
+        if source is None:
+            dist = np.zeros(n)
+        else:
+            dist = np.full(n, np.inf)
+            dist[self.index[source]] = 0
+        parent = np.full(n, -1, dtype=np.int64)  # residual edge into node
+
+        for _ in range(n + 1):
+            candidate = dist[tail] + cost
+            better = np.flatnonzero(candidate < dist[head])
+            if not len(better):
+                return dist, None
+            # Keep the best candidate per node
+            better = better[np.lexsort((candidate[better], head[better]))]
+            first = np.r_[True, head[better][1:] != head[better][:-1]]
+            better = better[first]
+            dist[head[better]] = candidate[better]
+            parent[head[better]] = live[better]
+            cycle = self._parent_cycle(parent)
+            if cycle is not None:
+                return dist, cycle
+        return dist, self._parent_cycle(parent)
+
+    def _parent_cycle(self, parent):
+        """A cycle in the parent-edge graph (always of negative cost)."""
+        n = len(parent)
+        # Pointer doubling: after >= n steps every walk is inside a cycle;
+        # node n is a sentinel for "no parent"
+        jump = np.append(np.where(parent >= 0, self.head[parent ^ 1], n), n)
+        steps = 1
+        while steps <= n:
+            jump = jump[jump]
+            steps *= 2
+        on_cycle = jump[:n][jump[:n] < n]
+        if not len(on_cycle):
+            return None
+        start = v = int(on_cycle[0])
+        cycle = []
+        while True:
+            e = int(parent[v])
+            cycle.append(e)
+            v = int(self.head[e ^ 1])
+            if v == start:
+                return cycle[::-1]
+
+    def cycle_cancelling(self, source, sink):
+        """Klein's algorithm: a maximum flow, then cancel negative cycles.
+
+        Each cycle is found with Bellman-Ford on the residual network and
+        saturated. Returns (flow_value, cost).
+        """
+        flow_value = self.solve(source, sink)
+        while True:
+            _, cycle = self._bellman_ford()
+            if cycle is None:
+                return flow_value, self.total_cost()
+            self._cancel_cycle(cycle)
+
+    def _cancel_cycle(self, cycle):
+        cycle = np.array(cycle, dtype=np.int64)
+        flow = self.residual[cycle].min()
+        self.residual[cycle] -= flow
+        self.residual[cycle ^ 1] += flow
+
+    def successive_shortest_paths(self, source, sink):
+        """Minimum-cost maximum flow by successive shortest paths.
+
+        Dijkstra runs on reduced costs with node potentials, then all
+        shortest augmenting paths of the round are pushed at once with a
+        blocking flow on the zero-reduced-cost edges. Starting from the zero
+        flow needs a network without negative-cost cycles; if it has one,
+        this falls back to cycle_cancelling. Returns (flow_value, cost).
+        """
+        self.reset()
+        self.source, self.sink = source, sink
+        s, t = self.index[source], self.index[sink]
+        tails = self._tails()
+        if (self.cost[0::2] < 0).any():
+            # Distances from a virtual source are valid potentials everywhere
+            dist, cycle = self._bellman_ford()
+            if cycle is not None:
+                return self.cycle_cancelling(source, sink)
+            potential = dist.astype(self.cost.dtype)
+        else:
+            potential = np.zeros(self.num_nodes, dtype=self.cost.dtype)
+
+        head, _, arcs, offsets = self._lists()
+        tolerance = 1e-9 if self.cost.dtype.kind == "f" else 0
+        while s != t:
+            reduced = self.cost + potential[tails] - potential[self.head]
+            dist = self._dijkstra(s, t, reduced.tolist(), head, arcs, offsets)
+            if dist[t] == float("inf"):
+                break
+            potential += np.minimum(np.array(dist), dist[t]).astype(potential.dtype)
+
+            # Push along every shortest path: edges with zero reduced cost
+            reduced = self.cost + potential[tails] - potential[self.head]
+            admissible = np.where(np.abs(reduced) <= tolerance, self.residual, 0)
+            residual = self.residual
+            self.residual = admissible.copy()
+            self.value += self._max_flow(s, t)
+            self.residual = residual + (self.residual - admissible)
+
+        return self.value, self.total_cost()
+
+    def cost_scaling(self, source, sink, warm_start=None, alpha=8, max_cancel=64):
+        """Minimum-cost maximum flow by cost-scaling push-relabel.
+
+        First a maximum flow is found (Dinic), so the flow value is always
+        the true maximum. Then the cost is minimized without changing it:
+        costs are scaled by n + 1 and each refine phase makes the flow
+        eps-optimal for a smaller eps, until eps = 1 proves optimality.
+
+        `warm_start` is a previous flow_dict (e.g. before some costs
+        changed). If it is still a valid flow it is augmented to a maximum
+        flow; slightly changed costs only leave a few negative cycles, so
+        up to `max_cancel` of them are cancelled directly. The Bellman-Ford
+        distances then serve as prices and refining starts from the eps
+        they actually violate (none once no negative cycle is left).
+        Costs must be integers.
+        Returns (flow_value, cost).
+        """
+        if self.cost.dtype.kind not in "iu":
+            raise ValueError("cost scaling needs integer costs")
+        n = self.num_nodes
+        cost = self.cost.astype(np.int64) * (n + 1)
+        if warm_start is not None and self.load_flows(warm_start, source, sink):
+            self.resolve()
+            for cancelled in range(max_cancel + 1):
+                dist, cycle = self._bellman_ford()
+                if cycle is None or cancelled == max_cancel:
+                    break
+                self._cancel_cycle(cycle)
+            self.potential = (dist * (n + 1)).astype(np.int64)
+        else:
+            self.reset()
+            self.source, self.sink = source, sink
+            self.resolve()
+            self.potential = np.zeros(n, dtype=np.int64)
+
+        tails = self._tails()
+        reduced = cost + self.potential[tails] - self.potential[self.head]
+        eps = max(0, -int(reduced[self.residual > 0].min(initial=0)))
+        while eps > 1:
+            eps = max(1, eps // alpha)
+            self._refine(eps, cost, tails)
+        return self.value, self.total_cost()
+
+    def _refine(self, eps, cost, tails):
+        """Turn the current flow into an eps-optimal one (same value)."""
+        n = self.num_nodes
+        potential = self.potential
+        residual = self.residual
+
+        # Saturate every residual edge with negative reduced cost
+        reduced = cost + potential[tails] - potential[self.head]
+        saturate = np.flatnonzero((residual > 0) & (reduced < 0))
+        amount = residual[saturate]
+        residual[saturate] = 0
+        residual[saturate ^ 1] += amount
+        excess = np.bincount(self.head[saturate], amount, n) - np.bincount(
+            tails[saturate], amount, n
+        )
+
+        head, residual, arcs, offsets = self._lists()
+        cost = cost.tolist()
+        potential = potential.tolist()
+        excess = excess.astype(self.capacity.dtype).tolist()
+        current = offsets[:-1]
+        queue = deque(u for u in range(n) if excess[u] > 0)
+        while queue:
+            u = queue.popleft()
+            pu = potential[u]
+            i = current[u]
+            end = offsets[u + 1]
+            while excess[u] > 0:
+                if i == end:
+                    # Relabel: lower the price just enough for one edge to
+                    # become admissible, keeping every edge eps-optimal
+                    best = None
+                    for j in range(offsets[u], end):
+                        e = arcs[j]
+                        if residual[e] > 0:
+                            value = potential[head[e]] - cost[e]
+                            if best is None or value > best:
+                                best = value
+                    potential[u] = pu = best - eps
+                    i = offsets[u]
+                    continue
+                e = arcs[i]
+                v = head[e]
+                if residual[e] > 0 and cost[e] + pu - potential[v] < 0:
+                    flow = min(excess[u], residual[e])
+                    residual[e] -= flow
+                    residual[e ^ 1] += flow
+                    excess[u] -= flow
+                    if excess[v] <= 0 < excess[v] + flow:
+                        queue.append(v)
+                    excess[v] += flow
+                    if residual[e] == 0:
+                        i += 1
+                else:
+                    i += 1
+            current[u] = i
+
+        self.residual = np.array(residual, dtype=self.capacity.dtype)
+        self.potential = np.array(potential, dtype=np.int64)
+
+    def _dijkstra(self, s, t, reduced, head, arcs, offsets):
+        residual = self.residual.tolist()
+        dist = [float("inf")] * self.num_nodes
+        dist[s] = 0
+        heap = [(0, s)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if u == t:
+                break  # farther nodes are capped at dist[t] anyway
+            for i in range(offsets[u], offsets[u + 1]):
+                e = arcs[i]
+                if residual[e] > 0:
+                    v = head[e]
+                    nd = d + reduced[e]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+        return dist
+
+
+def max_flow_min_cost(G, source, sink, method="ssp", capacity="capacity",
+                      weight="weight", warm_start=None):
+    """Maximum flow of minimum cost: returns (flow_value, cost, flow_dict).
+
+    `G` is an nx.DiGraph or a list of (u, v, capacity, cost) edges; `method`
+    is "ssp" (successive shortest paths), "cycle_cancelling" (Klein) or
+    "cost_scaling", which also accepts a previous flow_dict as `warm_start`.
+    """
+    if isinstance(G, (list, tuple)):
+        network = CostFlowNetwork(G)
+    else:
+        network = CostFlowNetwork.from_networkx(G, capacity=capacity, weight=weight)
+    if method == "cost_scaling":
+        flow_value, cost = network.cost_scaling(source, sink, warm_start)
+    else:
+        solve = {
+            "ssp": network.successive_shortest_paths,
+            "cycle_cancelling": network.cycle_cancelling,
+        }[method]
+        flow_value, cost = solve(source, sink)
+    network.check_bounded()
+    return flow_value, cost, network.flow_dict()
+
+
+def random_cost_network(num_nodes, num_edges, max_capacity=100, max_cost=20, seed=0):
+    """Random (u, v, capacity, cost) edges; node 0 is the source, n - 1 the sink."""
+    from flow_engine import random_flow_network
+
+    edges = random_flow_network(num_nodes, num_edges, max_capacity, seed)
+    cost = np.random.default_rng(seed + 1).integers(1, max_cost + 1, len(edges))
+    return [(u, v, c, w) for (u, v, c), w in zip(edges, cost.tolist())]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import networkx as nx
+
+    parser = argparse.ArgumentParser(description="Min-cost flow scaling benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000])
+    parser.add_argument("--degree", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    previous = None
+    for n in args.sizes:
+        graph_edges = random_cost_network(n, args.degree * n, seed=args.seed)
+        G = nx.DiGraph()
+        for u, v, capacity, cost in graph_edges:
+            G.add_edge(u, v, capacity=capacity, weight=cost)
+
+        t = time.perf_counter()
+        expected = nx.cost_of_flow(G, nx.max_flow_min_cost(G, 0, n - 1))
+        times = {"nx": time.perf_counter() - t}
+        for method in ("ssp", "cycle_cancelling", "cost_scaling"):
+            t = time.perf_counter()
+            _, cost, _ = max_flow_min_cost(graph_edges, 0, n - 1, method=method)
+            times[method] = time.perf_counter() - t
+            assert cost == expected
+
+        # Warm start after changing 1% of the costs
+        _, _, flow_dict = max_flow_min_cost(graph_edges, 0, n - 1, method="cost_scaling")
+        rng = np.random.default_rng(args.seed)
+        for k in rng.integers(0, len(graph_edges), len(graph_edges) // 100).tolist():
+            u, v, capacity, cost = graph_edges[k]
+            graph_edges[k] = (u, v, capacity, max(1, cost + int(rng.integers(-3, 4))))
+        t = time.perf_counter()
+        _, warm_cost, _ = max_flow_min_cost(
+            graph_edges, 0, n - 1, method="cost_scaling", warm_start=flow_dict
+        )
+        times["warm"] = time.perf_counter() - t
+        assert warm_cost == max_flow_min_cost(graph_edges, 0, n - 1)[1]
+
+        line = ", ".join(f"{name} {elapsed:.2f}s" for name, elapsed in times.items())
+        if previous is not None:
+            # Growth exponent of the running time between consecutive sizes
+            growth = {k: np.log(times[k] / previous[1][k]) / np.log(n / previous[0]) for k in times}
+            line += " | exponent " + ", ".join(f"{k} {g:.1f}" for k, g in growth.items())
+        print(f"n={n}, m={len(graph_edges)}: {line}")
+        previous = (n, times)
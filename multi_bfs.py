@@ -0,0 +1,191 @@
+import numpy as np
+
+from traversal import bfs_levels, gather_ranges
+
+BATCH = 64  # sources per traversal, one bit each in a uint64
+
+
+def _bits(values, k):
+    # (len(values), k) bools: bit b of every value
+    return ((values[:, None] >> np.arange(k, dtype=np.uint64)) & np.uint64(1)).astype(bool)
+
+
+def _batch(graph, sources, heights):
+    """One bit-parallel BFS from up to 64 sources (MS-BFS).
+
+    seen[v] and the frontier values hold one bit per source, so a level is
+    a single pass over the out-edges of the frontier nodes for all sources
+    together: every edge ORs its tail's frontier bits into its head. A
+    head whose OR has bits not yet seen joins the next frontier with those
+    bits. Returns (eccentricity, reached, heights or None) per source.
+    """
+    n = graph.num_nodes
+    k = len(sources)
+    offsets, neighbors = graph.offsets, graph.neighbors
+    bit = np.uint64(1) << np.arange(k, dtype=np.uint64)
+    seen = np.zeros(n, dtype=np.uint64)
+    np.bitwise_or.at(seen, sources, bit)
+    active = np.unique(sources)
+    frontier = seen[active]
+    reach = np.zeros(n, dtype=np.uint64)  # scratch, zero between levels
+    owner = np.empty(n, dtype=np.int64)  # scratch to drop repeated heads
+    ecc = np.zeros(k, dtype=np.int64)
+    dist = None
+    if heights:
+        dist = np.full((k, n), -1, dtype=np.int32)
+        dist[np.arange(k), sources] = 0
+
+    level = 0
+    while len(active):
+        level += 1
+        counts = offsets[active + 1] - offsets[active]
+        heads = neighbors[gather_ranges(offsets, active)]
+        np.bitwise_or.at(reach, heads, np.repeat(frontier, counts))
+        # Each head once: the position that wrote its owner entry last
+        position = np.arange(len(heads))
+        owner[heads] = position
+        touched = heads[owner[heads] == position]
+        new = reach[touched] & ~seen[touched]
+        reach[touched] = 0
+        keep = new != 0
+        active, frontier = touched[keep], new[keep]
+        if not len(active):
+            break
+        seen[active] |= frontier
+        ecc[_bits(np.bitwise_or.reduce(frontier, keepdims=True), k)[0]] = level
+        if heights:
+            node, source = np.nonzero(_bits(frontier, k))
+            dist[source, active[node]] = level
+
+    reached = np.zeros(k, dtype=np.int64)
+    for start in range(0, n, 1 << 16):
+        reached += _bits(seen[start : start + (1 << 16)], k).sum(axis=0)
+    return ecc, reached, dist
+
+
+def multi_source_bfs(graph, sources, heights=False):
+    """Unweighted BFS from every dense index in `sources`, 64 at a time.
+
+    Returns (eccentricity, reached, heights): the largest hop distance to a
+    node reachable from each source, the number of nodes it reaches (itself
+    included), and with heights=True an int32 (len(sources), n) array of
+    hop distances, -1 where unreachable. Edges are followed from tail to
+    head, so on a directed graph these are out-distances.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    ecc, reached, dist = [], [], []
+    for start in range(0, len(sources), BATCH):
+        e, r, d = _batch(graph, sources[start : start + BATCH], heights)
+        ecc.append(e)
+        reached.append(r)
+        dist.append(d)
+    if not len(sources):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros((0, graph.num_nodes), np.int32) if heights else None
+    return (
+        np.concatenate(ecc),
+        np.concatenate(reached),
+        np.concatenate(dist) if heights else None,
+    )
+
+
+def bfs_heights(graph, sources):
+    """int32 (len(sources), n) hop distances from each source, -1 if unreachable."""
+    return multi_source_bfs(graph, sources, heights=True)[2]
+
+
+def eccentricities(graph, sources=None):
+    """Eccentricity of every source (default all nodes) inside what it reaches."""
+    if sources is None:
+        sources = np.arange(graph.num_nodes)
+    return multi_source_bfs(graph, sources)[0]
+
+
+def diameter_bounds(graph, start=None, max_sources=None):
+    """(lower, upper) bounds on the diameter of the component of `start`.
+
+    iFUB: with the levels of a BFS from `start` (default a node of highest
+    degree), the eccentricities of the nodes on the deepest levels are
+    computed first, 64 at a time. Once a whole level i is done and the
+    largest eccentricity found is at least 2 * (i - 1), no node above can do
+    better, and lower == upper is the exact diameter. max_sources caps the
+    eccentricities computed; the bounds may then differ. Undirected graphs
+    only.
+    """
+    if graph.directed:
+        raise ValueError("diameter_bounds needs an undirected graph")
+    if start is None:
+        start = int(np.argmax(np.diff(graph.offsets)))
+    visit, level = bfs_levels(graph, start)
+    depth = int(level[-1])
+    # Double sweep: the farthest node from start gives a good first bound
+    lower = max(depth, int(eccentricities(graph, visit[-1:])[0]))
+    # Once every level below i is done, a farther pair than 2 * i would need
+    # an end below i, whose eccentricity is already in lower
+    upper = max(lower, 2 * depth)
+    done = 0
+    i = depth
+    while lower < upper:
+        fringe = visit[level == i]
+        for batch in range(0, len(fringe), BATCH):
+            if max_sources is not None and done >= max_sources:
+                return lower, max(lower, 2 * i)
+            sources = fringe[batch : batch + BATCH]
+            lower = max(lower, int(eccentricities(graph, sources).max()))
+            done += len(sources)
+        i -= 1
+        upper = max(lower, 2 * i)
+    return lower, upper
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import networkx as nx
+
+    from array_graph import ArrayGraph
+    from shortest_paths import grid_graph
+
+    parser = argparse.ArgumentParser(description="Multi-source BFS benchmark")
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--sources", type=int, default=256)
+    parser.add_argument("--check-nodes", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Against networkx on a small graph
+    G = nx.gnm_random_graph(args.check_nodes, 2 * args.check_nodes, seed=0)
+    small = ArrayGraph.from_edges(*zip(*G.edges()))
+    core = max(nx.connected_components(G), key=len)
+    lower, upper = diameter_bounds(small, small.index_of(next(iter(core))))
+    assert lower == upper == nx.diameter(G.subgraph(core))
+    ecc, reached, dist = multi_source_bfs(small, np.arange(200), heights=True)
+    for i in range(200):
+        lengths = nx.single_source_shortest_path_length(G, int(small.node_ids[i]))
+        assert ecc[i] == max(lengths.values()) and reached[i] == len(lengths)
+        assert all(dist[i, small.index_of(v)] == d for v, d in lengths.items())
+
+    rng = np.random.default_rng(0)
+    m = args.nodes * args.degree // 2
+    graphs = {
+        "random": ArrayGraph.from_edges(
+            rng.integers(0, args.nodes, m), rng.integers(0, args.nodes, m)
+        ),
+        "grid": grid_graph(300, 300),
+    }
+    for name, graph in graphs.items():
+        print(f"{name}: n={graph.num_nodes}, {graph.num_edges} edges")
+        sources = rng.choice(graph.num_nodes, args.sources, replace=False)
+        start = time.perf_counter()
+        for s in sources[:BATCH]:
+            bfs_levels(graph, s)
+        single = (time.perf_counter() - start) / BATCH
+        start = time.perf_counter()
+        ecc, reached, _ = multi_source_bfs(graph, sources)
+        elapsed = time.perf_counter() - start
+        print(f"  one BFS per source {1000 * single:.1f} ms/source, "
+              f"MS-BFS {1000 * elapsed / len(sources):.1f} ms/source")
+        start = time.perf_counter()
+        lower, upper = diameter_bounds(graph, max_sources=10 * BATCH)
+        print(f"  diameter in [{lower}, {upper}] in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,204 @@
+import heapq
+from collections import OrderedDict
+
+INF = float("inf")
+
+
+class ShortestPathCache:
+    """Memoized shortest-path distances on a slowly changing weighted graph.
+
+    One LRU entry per source, bounded by `max_size` stored distances in
+    total. A single-source query stores the full distance tree. A
+    point-to-point query stops Dijkstra once the target is settled and
+    stores the partial tree: every settled distance is exact, so it also
+    answers later queries for any settled target, and it is enough to decide
+    whether an edge update can change those answers.
+
+    Edge updates go through add_edge / remove_edge. An entry is dropped only
+    if the update touches its shortest-path DAG: a cheaper edge that would
+    shorten a settled distance, or a dearer / removed edge that is tight
+    (d[u] + w == d[v]) in it. Weights must be non-negative (Dijkstra).
+    """
+
+    def __init__(self, G, max_size=1_000_000, weight="weight"):
+        self.G = G
+        self.weight = weight
+        self.max_size = max_size
+        self.size = 0
+        # source -> (distances in settled order, bound); nodes not settled
+        # are at least bound away, bound is inf for a full tree
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "size": self.size,
+        }
+
+    def single_source(self, source):
+        """{node: distance} for every node reachable from `source`."""
+        entry = self._lookup(source, lambda dist, bound: bound == INF)
+        if entry is None:
+            entry = self._store(source, self._dijkstra(source), INF)
+        return dict(entry[0])
+
+    def distance(self, source, target):
+        """Distance from `source` to `target`; raises nx.NetworkXNoPath."""
+        entry = self._lookup(source, lambda dist, bound: target in dist or bound == INF)
+        if entry is None:
+            dist = self._dijkstra(source, target)
+            # Without target the search ran to completion: a full tree
+            entry = self._store(source, dist, dist.get(target, INF))
+        if target not in entry[0]:
+            import networkx as nx
+
+            raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+        return entry[0][target]
+
+    def add_edge(self, u, v, weight):
+        """Add edge (u, v) or change its weight."""
+        if weight < 0:
+            raise ValueError("Negative edge weights are not supported")
+        old = self.G[u][v][self.weight] if self.G.has_edge(u, v) else None
+        self.G.add_edge(u, v, **{self.weight: weight})
+        if old is None or weight < old:
+            self._invalidate(self._shortens, u, v, weight)
+        elif weight > old:
+            self._invalidate(self._is_tight, u, v, old)
+
+    def remove_edge(self, u, v):
+        old = self.G[u][v][self.weight]
+        self.G.remove_edge(u, v)
+        self._invalidate(self._is_tight, u, v, old)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _lookup(self, source, answers):
+        entry = self._entries.get(source)
+        if entry is not None and answers(*entry):
+            self._entries.move_to_end(source)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def _store(self, source, dist, bound):
+        # Replaces a smaller partial tree of the same source
+        old = self._entries.pop(source, None)
+        if old is not None:
+            self.size -= len(old[0])
+        entry = (dist, bound)
+        self._entries[source] = entry
+        self.size += len(dist)
+        while self.size > self.max_size and self._entries:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+        return entry
+
+    def _arcs(self, u, v):
+        return [(u, v)] if self.G.is_directed() else [(u, v), (v, u)]
+
+    @staticmethod
+    def _shortens(dist, bound, u, v, w):
+        # Settled distances are exact and unsettled ones are at least bound
+        return u in dist and dist[u] + w < min(dist.get(v, INF), bound)
+
+    @staticmethod
+    def _is_tight(dist, bound, u, v, w):
+        return u in dist and v in dist and dist[u] + w == dist[v]
+
+    def _invalidate(self, affected, u, v, w):
+        arcs = self._arcs(u, v)
+        stale = [
+            source
+            for source, (dist, bound) in self._entries.items()
+            if any(affected(dist, bound, a, b, w) for a, b in arcs)
+        ]
+        for source in stale:
+            dist, _ = self._entries.pop(source)
+            self.size -= len(dist)
+        self.invalidations += len(stale)
+
+    def _dijkstra(self, source, target=None):
+        """Settled distances from `source`, stopping once `target` is settled."""
+        adj = self.G.adj
+        weight = self.weight
+        dist = {}
+        seen = {source: 0}
+        heap = [(0, 0, source)]
+        count = 1  # tie breaker, nodes need not be comparable
+        while heap:
+            d, _, u = heapq.heappop(heap)
+            if u in dist:
+                continue
+            dist[u] = d
+            if u == target:
+                break
+            for v, data in adj[u].items():
+                nd = d + data.get(weight, 1)
+                if v not in dist and nd < seen.get(v, INF):
+                    seen[v] = nd
+                    heapq.heappush(heap, (nd, count, v))
+                    count += 1
+        return dist
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    import networkx as nx
+
+    parser = argparse.ArgumentParser(description="Shortest-path cache benchmark")
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--hot", type=int, default=20, help="distinct sources queried")
+    parser.add_argument("--update-every", type=int, default=50)
+    parser.add_argument("--max-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    G = nx.gnm_random_graph(args.nodes, args.degree * args.nodes, seed=0)
+    for u, v in G.edges():
+        G[u][v]["weight"] = rng.randint(1, 10)
+    cache = ShortestPathCache(G.copy(), max_size=args.max_size)
+
+    hot = rng.sample(range(args.nodes), args.hot)
+    cached_time = plain_time = 0.0
+    for q in range(1, args.queries + 1):
+        s = rng.choice(hot)
+        t = rng.randrange(args.nodes)
+        start = time.perf_counter()
+        try:
+            answer = cache.distance(s, t) if q % 2 else cache.single_source(s).get(t)
+        except nx.NetworkXNoPath:
+            answer = None
+        cached_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = nx.single_source_dijkstra_path_length(G, s).get(t)
+        plain_time += time.perf_counter() - start
+        assert answer == expected, (s, t, answer, expected)
+
+        if q % args.update_every == 0:
+            u, v = rng.sample(range(args.nodes), 2)
+            w = rng.randint(1, 10)
+            G.add_edge(u, v, weight=w)
+            cache.add_edge(u, v, w)
+
+    print(f"{args.queries} queries: cached {cached_time:.2f}s, recomputed {plain_time:.2f}s")
+    print(cache.stats)
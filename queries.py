@@ -0,0 +1,120 @@
+"""Graph queries on an ArrayGraph, shared by server.py and cli.py.
+
+OPERATIONS maps a query name to a function of (graph, cost, **params)
+returning a dict of plain values and arrays; each imports its algorithm
+module on first use, so loading this module stays cheap.
+"""
+import numpy as np
+
+from array_graph import ArrayGraph
+from edge_loader import iter_chunks
+
+
+def jsonable(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _bfs(graph, cost, start):
+    from traversal import bfs_levels
+
+    visit, level = bfs_levels(graph, graph.index_of(start))
+    return {"nodes": graph.node_ids[visit], "height": level}
+
+
+def _dfs(graph, cost, start):
+    from traversal import dfs_preorder
+
+    visit, depth = dfs_preorder(graph, graph.index_of(start))
+    return {"nodes": graph.node_ids[visit], "depth": depth}
+
+
+def _shortest_paths(graph, cost, source, target=None, method="dijkstra"):
+    from shortest_paths import dijkstra, relax_rows
+
+    s = graph.index_of(source)
+    if method == "dijkstra":
+        dist = dijkstra(graph, s)
+    elif method == "bellman_ford":
+        dist = relax_rows(graph, [s], dtype=np.float64)[0]
+    else:
+        raise ValueError(f"Unknown method {method!r}")
+    if target is not None:
+        return {"distance": dist[graph.index_of(target)].item()}
+    reachable = np.flatnonzero(np.isfinite(dist))
+    return {"nodes": graph.node_ids[reachable], "distances": dist[reachable]}
+
+
+def _flow_edges(graph, cost=None):
+    # Every CSR entry is an arc, so an undirected edge carries flow both ways
+    if graph.weights is None:
+        raise ValueError("Flows need a graph with capacities (3 or 4 columns)")
+    tails = graph.node_ids[graph.sources()].tolist()
+    heads = graph.node_ids[graph.neighbors].tolist()
+    columns = [graph.weights.tolist()] + ([] if cost is None else [cost.tolist()])
+    return list(zip(tails, heads, *columns))
+
+
+def _max_flow(graph, cost, source, sink, method="dinic", cut=False):
+    from flow_engine import FlowNetwork
+
+    network = FlowNetwork(_flow_edges(graph))
+    result = {"value": network.solve(source, sink, method)}
+    if cut:
+        side = network.source_side()
+        tails, heads = network.head[1::2], network.head[0::2]
+        crossing = side[tails] & ~side[heads]
+        nodes = np.array(network.nodes)
+        result["source_side"] = nodes[side]
+        result["cut_edges"] = np.stack([nodes[tails[crossing]], nodes[heads[crossing]]], axis=1)
+    return result
+
+
+def _min_cost_flow(graph, cost, source, sink, method="cost_scaling"):
+    from min_cost_flow import max_flow_min_cost
+
+    if cost is None:
+        raise ValueError("Min-cost flow needs a graph with costs (4 columns)")
+    value, total, flow_dict = max_flow_min_cost(_flow_edges(graph, cost), source, sink, method)
+    flows = [(u, v, f) for u, out in flow_dict.items() for v, f in out.items() if f]
+    return {"value": value, "cost": total, "flows": flows}
+
+
+def _coloring(graph, cost, strategy="dsatur"):
+    from coloring import color_graph
+
+    colors = color_graph(graph, strategy)
+    return {"num_colors": int(colors.max(initial=-1)) + 1, "nodes": graph.node_ids, "colors": colors}
+
+
+OPERATIONS = {
+    "bfs": _bfs,
+    "dfs": _dfs,
+    "shortest_paths": _shortest_paths,
+    "max_flow": _max_flow,
+    "min_cut": lambda graph, cost, **params: _max_flow(graph, cost, cut=True, **params),
+    "min_cost_flow": _min_cost_flow,
+    "coloring": _coloring,
+}
+
+
+def read_graph(path, columns=2, directed=False):
+    """ArrayGraph and cost array of an edge-list file.
+
+    Lines are "u v", "u v weight" or "u v capacity cost"; the third column
+    becomes graph.weights (edge weights and capacities alike) and the
+    fourth a cost array parallel to graph.neighbors.
+    """
+    if columns < 4:
+        return ArrayGraph.from_file(path, columns, directed), None
+    values = np.concatenate(list(iter_chunks(path, 4)) or [np.empty((0, 4), np.int64)])
+    # Carry the edge number through the CSR build to permute both columns
+    graph = ArrayGraph.from_edges(values[:, 0], values[:, 1], np.arange(len(values)), directed)
+    edge = graph.weights
+    graph.weights = values[edge, 2]
+    return graph, values[edge, 3]
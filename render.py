@@ -0,0 +1,212 @@
+import numpy as np
+
+import instrument
+
+# Plot functions switch from nx.draw_networkx* to render_graph above this
+NX_MAX_NODES = 500
+# Node labels are only drawn up to this many nodes
+LABEL_MAX_NODES = 200
+# lod="auto" draws every edge up to this many, a density image above
+COLLECTION_MAX_EDGES = 200_000
+
+
+def positions_array(pos, node_ids):
+    """(n, 2) positions aligned with node_ids from a {node: (x, y)} dict."""
+    if isinstance(pos, dict):
+        return np.array([pos[node] for node in np.asarray(node_ids).tolist()], dtype=np.float64)
+    return np.asarray(pos, dtype=np.float64)
+
+
+def draw_collections(ax, pos, src, dst, node_color="skyblue", node_size=None, cmap=None,
+                     edge_color="gray", edge_width=None, labels=None):
+    """Nodes as one PathCollection and edges as one LineCollection.
+
+    node_color and edge_color are one color or one value per node / edge,
+    node_size and edge_width likewise. labels ({node index: text}) are
+    drawn only up to LABEL_MAX_NODES nodes.
+    """
+    from matplotlib.collections import LineCollection
+
+    n = len(pos)
+    if node_size is None:
+        node_size = float(np.clip(2e5 / max(n, 1), 1, 300))
+    segments = np.stack([pos[src], pos[dst]], axis=1)
+    edges = LineCollection(
+        segments, colors=edge_color, linewidths=1 if edge_width is None else edge_width,
+        alpha=0.5 if len(segments) > 1000 else 1, zorder=1, rasterized=True,
+    )
+    ax.add_collection(edges)
+    ax.scatter(pos[:, 0], pos[:, 1], s=node_size, c=node_color, cmap=cmap, zorder=2,
+               linewidths=0, rasterized=True)
+    if labels is not None and n <= LABEL_MAX_NODES:
+        for i, text in labels.items():
+            ax.annotate(str(text), pos[i], ha="center", va="center", zorder=3)
+    ax.autoscale_view()
+
+
+def sample_nodes(num_nodes, src, dst, max_nodes, seed=0):
+    """(nodes, edge mask): `max_nodes` random nodes and the edges between them."""
+    if num_nodes <= max_nodes:
+        return np.arange(num_nodes), np.ones(len(src), dtype=bool)
+    keep = np.zeros(num_nodes, dtype=bool)
+    keep[np.random.default_rng(seed).choice(num_nodes, max_nodes, replace=False)] = True
+    return np.flatnonzero(keep), keep[src] & keep[dst]
+
+
+def aggregate_by_height(pos, src, dst, height, bins=64):
+    """Graph of node groups: every height level split into up to `bins`
+    groups of consecutive x.
+
+    Returns (group positions, group src, group dst, group sizes, edge
+    counts, group heights); positions are group means and parallel edges
+    between two groups become one edge with a count.
+    """
+    n = len(pos)
+    order = np.lexsort((pos[:, 0], height))
+    level = height[order]
+    first = np.searchsorted(level, level)
+    size = np.bincount(height)[level]
+    rank = np.arange(n) - first
+    group = np.empty(n, dtype=np.int64)
+    group[order] = level * bins + rank * np.minimum(size, bins) // size
+    ids, group = np.unique(group, return_inverse=True)
+    sizes = np.bincount(group)
+    center = np.stack([np.bincount(group, pos[:, axis]) for axis in (0, 1)], axis=1)
+    center /= sizes[:, None]
+    a, b = group[src], group[dst]
+    pairs, counts = np.unique((a * len(ids) + b)[a != b], return_counts=True)
+    a, b = np.divmod(pairs, len(ids))
+    return center, a, b, sizes, counts, ids // bins
+
+
+def density_image(pos, src, dst, resolution=1024, max_samples=16, chunk=1 << 18):
+    """(resolution, resolution) image of edge ink plus node counts.
+
+    Each axis spans the image. Every edge is sampled at up to `max_samples`
+    points spread over its length in pixels, each weighted by its share of
+    the length, and the samples are binned with bincount, datashader style.
+    Returns (image, extent) for imshow(origin="lower").
+    """
+    lo, hi = pos.min(axis=0), pos.max(axis=0)
+    span = np.maximum(hi - lo, 1e-12)
+    pixels = (pos - lo) * ((resolution - 1) / span)
+    image = np.bincount(_pixel_index(pixels, resolution), minlength=resolution**2)
+    image = image.astype(np.float64)
+    for start in range(0, len(src), chunk):
+        a = pixels[src[start : start + chunk]]
+        b = pixels[dst[start : start + chunk]]
+        length = np.hypot(*(b - a).T)
+        steps = np.clip(np.ceil(length), 1, max_samples).astype(np.int64)
+        edge = np.repeat(np.arange(len(a)), steps)
+        t = (np.arange(len(edge)) - np.repeat(np.cumsum(steps) - steps, steps) + 0.5) / steps[edge]
+        points = a[edge] + (b - a)[edge] * t[:, None]
+        weight = (np.maximum(length, 1) / steps)[edge]
+        image += np.bincount(_pixel_index(points, resolution), weight, resolution**2)
+    extent = (lo[0], hi[0], lo[1], hi[1])
+    return image.reshape(resolution, resolution), extent
+
+
+def _pixel_index(points, resolution):
+    xy = np.clip(np.rint(points).astype(np.int64), 0, resolution - 1)
+    return xy[:, 1] * resolution + xy[:, 0]
+
+
+def render_graph(pos, src, dst, path=None, lod="auto", ax=None, node_color="skyblue",
+                 cmap=None, edge_color="gray", height=None, labels=None, max_nodes=20_000,
+                 bins=64, resolution=1024, title=None, figsize=(12, 12), dpi=100):
+    """Draw a graph given as (n, 2) positions and edge index arrays.
+
+    lod picks the level of detail:
+      "full"    every node and edge, see draw_collections
+      "sample"  `max_nodes` random nodes and the edges between them
+      "height"  nodes grouped per `height` level, see aggregate_by_height
+      "density" an edge and node density image, see density_image
+      "auto"    "full" up to COLLECTION_MAX_EDGES edges, else "density"
+    Draws on `ax` (a new figure if None) and saves it to `path` if given.
+    """
+    import matplotlib.pyplot as plt
+
+    with instrument.phase("plot"):
+        own = ax is None
+        if own:
+            fig, ax = plt.subplots(figsize=figsize)
+        pos = np.asarray(pos, dtype=np.float64)
+        src, dst = np.asarray(src), np.asarray(dst)
+        if lod == "auto":
+            lod = "full" if len(src) <= COLLECTION_MAX_EDGES else "density"
+        per_node = not isinstance(node_color, str) and np.ndim(node_color) == 1
+        if lod == "full":
+            draw_collections(ax, pos, src, dst, node_color, cmap=cmap, edge_color=edge_color,
+                             labels=labels)
+        elif lod == "sample":
+            nodes, mask = sample_nodes(len(pos), src, dst, max_nodes)
+            index = np.full(len(pos), -1)
+            index[nodes] = np.arange(len(nodes))
+            color = np.asarray(node_color)[nodes] if per_node else node_color
+            if not isinstance(edge_color, str) and np.ndim(edge_color) == 1:
+                edge_color = np.asarray(edge_color)[mask]
+            draw_collections(ax, pos[nodes], index[src[mask]], index[dst[mask]], color, cmap=cmap,
+                             edge_color=edge_color)
+        elif lod == "height":
+            if height is None:
+                raise ValueError('lod="height" needs the height of every node')
+            center, a, b, sizes, counts, level = aggregate_by_height(pos, src, dst, height, bins)
+            draw_collections(ax, center, a, b, level, node_size=10 + 200 * sizes / sizes.max(),
+                             cmap=cmap or "viridis", edge_color=edge_color,
+                             edge_width=0.5 + 2 * np.log1p(counts) / np.log1p(counts.max()))
+        elif lod == "density":
+            image, extent = density_image(pos, src, dst, resolution)
+            ax.imshow(np.log1p(image), origin="lower", extent=extent, cmap=cmap or "inferno",
+                      interpolation="nearest", aspect="auto")
+        else:
+            raise ValueError(f"Unknown level of detail {lod!r}")
+        if title is not None:
+            ax.set_title(title)
+        ax.set_axis_off()
+        if path is not None:
+            ax.figure.savefig(path, dpi=dpi)
+        if own:
+            plt.close(fig)
+        return ax
+
+
+def render_networkx(G, pos, path=None, **kwargs):
+    """render_graph for a networkx graph and a {node: (x, y)} layout.
+
+    Per-node or per-edge colors follow G.nodes() and G.edges() order.
+    """
+    nodes = list(G)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    return render_graph(positions_array(pos, nodes), edges[:, 0], edges[:, 1], path, **kwargs)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+    import time
+
+    from shortest_paths import random_weighted_graph
+    from traversal import bfs_levels
+
+    parser = argparse.ArgumentParser(description="Large graph rendering benchmark")
+    parser.add_argument("--nodes", type=int, default=200_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    graph = random_weighted_graph(args.nodes, args.edges)
+    src, dst, _ = graph.edge_indices()
+    visit, level = bfs_levels(graph, 0)
+    height = np.zeros(graph.num_nodes, dtype=np.int64)
+    height[visit] = level
+    # A BFS-tree like picture: x random inside a level, y the height
+    pos = np.stack([np.random.default_rng(0).random(graph.num_nodes), -height], axis=1)
+    print(f"n={graph.num_nodes}, {len(src)} edges")
+    with tempfile.TemporaryDirectory() as folder:
+        for lod in ("density", "sample", "height"):
+            start = time.perf_counter()
+            render_graph(pos, src, dst, os.path.join(folder, f"{lod}.png"), lod, height=height,
+                         node_color=height.astype(np.float64), title=lod)
+            elapsed = time.perf_counter() - start
+            print(f"{lod}: {elapsed:.2f}s")
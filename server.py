@@ -0,0 +1,411 @@
+import asyncio
+import json
+import math
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch_paths import SharedGraph
+from queries import OPERATIONS, jsonable, read_graph
+
+# Longest request or response line, in bytes
+LINE_LIMIT = 1 << 28
+
+
+class LatencyHistogram:
+    """Latencies counted in power-of-two microsecond buckets."""
+
+    BUCKETS = 40
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        k = math.ceil(math.log2(max(seconds * 1e6, 1)))
+        self.counts[min(k, self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound in seconds of the bucket holding quantile q."""
+        rank = q * self.count
+        seen = 0
+        for k, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return 2**k / 1e6
+        return 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * self.total / max(self.count, 1),
+            "max_ms": 1000 * self.max,
+            **{f"p{round(100 * q)}_ms": 1000 * self.quantile(q) for q in (0.5, 0.9, 0.99)},
+            "buckets": {f"<={2**k / 1000:g}ms": n for k, n in enumerate(self.counts) if n},
+        }
+
+
+def encode(message):
+    return json.dumps(message, default=jsonable).encode() + b"\n"
+
+
+def _spec_key(spec):
+    """Name of the offsets block, unique to one loaded graph."""
+    return spec[0][0]["offsets"][0]
+
+
+# Graphs attached by the current worker process: name -> (spec key, graph,
+# cost, blocks), only the latest version of each name
+_worker_graphs = {}
+
+
+def _detach(name):
+    _, graph, cost, blocks = _worker_graphs.pop(name)
+    graph._reversed = None  # break the graph <-> reverse cycle
+    del graph, cost
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            pass  # still viewed somewhere, unmapped once collected
+
+
+def _attach(name, spec):
+    graph_spec, cost_spec = spec
+    key = _spec_key(spec)
+    if name in _worker_graphs and _worker_graphs[name][0] != key:
+        _detach(name)  # replaced by a reload
+    if name not in _worker_graphs:
+        graph, blocks = SharedGraph.attach(graph_spec)
+        cost = None
+        if cost_spec is not None:
+            block = shared_memory.SharedMemory(name=cost_spec[0])
+            blocks.append(block)
+            cost = np.ndarray(cost_spec[1], np.dtype(cost_spec[2]), buffer=block.buf)
+        _worker_graphs[name] = (key, graph, cost, blocks)
+    return _worker_graphs[name][1:3]
+
+
+def _run(op, name, spec, params):
+    graph, cost = _attach(name, spec)
+    return OPERATIONS[op](graph, cost, **params)
+
+
+def _free(entry):
+    shared, cost_block, _, _ = entry
+    shared.close()
+    if cost_block is not None:
+        cost_block.close()
+        cost_block.unlink()
+
+
+class GraphServer:
+    """Long-lived graph query server speaking JSON lines over a socket.
+
+    Each request line is {"id", "op", "graph", "params"} and gets a response
+    line {"id", "ok", "result"} or {"id", "ok": false, "error"}; requests on
+    one connection may be answered out of order. Graph operations (see
+    OPERATIONS) run on a process pool whose workers attach the graphs from
+    shared memory once. Identical requests in flight at the same time share
+    one computation, and every op keeps a latency histogram. "load",
+    "graphs" and "stats" are answered by the server itself.
+    """
+
+    def __init__(self, workers=None):
+        self.graphs = {}  # name -> (SharedGraph, cost block, spec, info)
+        self.latency = defaultdict(LatencyHistogram)
+        self.coalesced = 0
+        self._inflight = {}
+        self._retired = []  # replaced graphs still used by running requests
+        self._running = defaultdict(int)  # spec key -> pool tasks using it
+        # Forked workers would inherit the open client sockets and keep them
+        # from closing, so they are started by a fork server instead
+        self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("forkserver"))
+        self._server = None
+        self._connections = set()
+
+    def add_graph(self, name, graph, cost=None):
+        """Make `graph` (with an optional cost array) queryable as `name`."""
+        shared = SharedGraph(graph)
+        cost_block, cost_spec = None, None
+        if cost is not None:
+            cost = np.ascontiguousarray(cost)
+            cost_block = shared_memory.SharedMemory(create=True, size=max(cost.nbytes, 1))
+            np.ndarray(cost.shape, cost.dtype, buffer=cost_block.buf)[:] = cost
+            cost_spec = (cost_block.name, cost.shape, cost.dtype.str)
+        info = {
+            "nodes": graph.num_nodes,
+            "edges": graph.num_edges,
+            "directed": graph.directed,
+            "weighted": graph.weights is not None,
+            "costs": cost is not None,
+        }
+        if name in self.graphs:
+            self._retired.append(self.graphs[name])
+        self.graphs[name] = (shared, cost_block, (shared.spec, cost_spec), info)
+        self._free_retired()
+        return info
+
+    def _free_retired(self):
+        """Free the replaced graphs no pool task uses any more."""
+        busy = []
+        for entry in self._retired:
+            if _spec_key(entry[2]) in self._running:
+                busy.append(entry)
+            else:
+                _free(entry)
+        self._retired = busy
+
+    def _finished(self, key):
+        if key not in self._running:
+            return  # closed meanwhile
+        self._running[key] -= 1
+        if not self._running[key]:
+            del self._running[key]
+            self._free_retired()
+
+    def load_graph(self, name, path, columns=2, directed=False):
+        return self.add_graph(name, *read_graph(path, columns, directed))
+
+    async def start_unix(self, path):
+        self._server = await asyncio.start_unix_server(self._client, path, limit=LINE_LIMIT)
+        return self._server
+
+    async def start_tcp(self, host="127.0.0.1", port=0):
+        """Listen on host:port (0 picks a free port); returns the asyncio server."""
+        self._server = await asyncio.start_server(self._client, host, port, limit=LINE_LIMIT)
+        return self._server
+
+    async def drain(self):
+        """Stop listening and wait until every client has disconnected."""
+        if self._server is not None:
+            self._server.close()
+        await asyncio.gather(*self._connections)
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self._pool.shutdown(cancel_futures=True)
+        for entry in list(self.graphs.values()) + self._retired:
+            _free(entry)
+        self.graphs = {}
+        self._retired = []
+        self._running.clear()
+
+    async def _client(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+
+        async def answer(line):
+            response = await self.handle_line(line)
+            async with lock:
+                writer.write(encode(response))
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            self._connections.discard(connection)
+
+    async def handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as exc:
+            return {"id": None, "ok": False, "error": f"Invalid JSON: {exc}"}
+        start = time.perf_counter()
+        op = request.get("op")
+        try:
+            result = await self.handle(op, request.get("graph"), request.get("params") or {})
+            response = {"id": request.get("id"), "ok": True, "result": result}
+        except Exception as exc:
+            response = {"id": request.get("id"), "ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        if op in OPERATIONS or op in ("load", "graphs", "stats"):
+            self.latency[op].record(time.perf_counter() - start)
+        return response
+
+    async def handle(self, op, graph, params):
+        if op == "graphs":
+            return {name: entry[3] for name, entry in self.graphs.items()}
+        if op == "stats":
+            return {
+                "latency": {name: h.as_dict() for name, h in sorted(self.latency.items())},
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
+        if op == "load":
+            loop = asyncio.get_running_loop()
+            read = await loop.run_in_executor(
+                None, read_graph, params["path"], params.get("columns", 2), params.get("directed", False)
+            )
+            return self.add_graph(graph, *read)
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown op {op!r}")
+        if graph not in self.graphs:
+            raise KeyError(f"No graph named {graph!r}")
+        spec = self.graphs[graph][2]
+        # The spec changes when a graph is reloaded, so it is part of the key
+        key = json.dumps([op, spec, params], sort_keys=True, default=jsonable)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, _run, op, graph, spec, params)
+        # A replaced graph stays allocated until its last task is done, even
+        # if the requests waiting on it were cancelled
+        block = _spec_key(spec)
+        self._running[block] += 1
+        future.add_done_callback(lambda _: self._finished(block))
+        self._inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+
+class GraphClient:
+    """asyncio client of a GraphServer; requests may be sent concurrently."""
+
+    def __init__(self, reader, writer):
+        self._reader, self._writer = reader, writer
+        self._next_id = 0
+        self._waiting = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect_unix(cls, path):
+        return cls(*await asyncio.open_unix_connection(path, limit=LINE_LIMIT))
+
+    @classmethod
+    async def connect_tcp(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port, limit=LINE_LIMIT))
+
+    async def _receive(self):
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                future = self._waiting.pop(response["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Server closed the connection"))
+
+    async def request(self, op, graph=None, **params):
+        """Result of one request; raises RuntimeError with the server's error."""
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        self._writer.write(encode({"id": self._next_id, "op": op, "graph": graph, "params": params}))
+        await self._writer.drain()
+        response = await future
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Graph query server")
+    parser.add_argument("--graph", action="append", default=[], metavar="NAME=PATH[:COLUMNS]",
+                        help="edge list to load at startup, repeatable")
+    parser.add_argument("--directed", action="store_true")
+    parser.add_argument("--unix", help="listen on this Unix socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--bench", action="store_true",
+                        help="serve a generated graph on localhost and load-test it")
+    parser.add_argument("--nodes", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=32)
+    args = parser.parse_args()
+
+    async def serve():
+        server = GraphServer(args.workers)
+        for entry in args.graph:
+            name, _, path = entry.partition("=")
+            path, _, columns = path.partition(":")
+            print(name, server.load_graph(name, path, int(columns or 2), args.directed))
+        listener = await (server.start_unix(args.unix) if args.unix
+                          else server.start_tcp(args.host, args.port))
+        print("Listening on", ", ".join(str(s.getsockname()) for s in listener.sockets))
+        try:
+            await listener.serve_forever()
+        finally:
+            server.close()
+
+    async def bench():
+        from min_cost_flow import random_cost_network
+
+        server = GraphServer(args.workers)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "graph.sock")
+            edge_path = os.path.join(folder, "edges.txt")
+            np.savetxt(edge_path, random_cost_network(args.nodes, 4 * args.nodes), fmt="%d")
+            await server.start_unix(path)
+            clients = [await GraphClient.connect_unix(path) for _ in range(args.clients)]
+            try:
+                await clients[0].request("load", "random", path=edge_path, columns=4)
+                await clients[0].request("load", "flow", path=edge_path, columns=4, directed=True)
+                start = time.perf_counter()
+                sink = args.nodes - 1
+                calls = [
+                    asyncio.create_task(c.request(op, name, **params))
+                    for i, c in enumerate(clients)
+                    for op, name, params in (
+                        ("bfs", "random", {"start": i}),
+                        ("dfs", "random", {"start": i}),
+                        ("shortest_paths", "random", {"source": i % 4, "target": sink}),
+                        ("coloring", "random", {"strategy": "dsatur"}),
+                        ("max_flow", "flow", {"source": 0, "sink": sink}),
+                        ("min_cut", "flow", {"source": 0, "sink": sink}),
+                        ("min_cost_flow", "flow", {"source": 0, "sink": sink}),
+                    )
+                ]
+                # A ping while the pool is busy shows the event loop stays free
+                ping = time.perf_counter()
+                await clients[0].request("graphs")
+                ping = time.perf_counter() - ping
+                results = await asyncio.gather(*calls)
+                elapsed = time.perf_counter() - start
+                stats = await clients[0].request("stats")
+            finally:
+                for c in clients:
+                    await c.close()
+                await server.drain()
+                server.close()
+        print(f"{len(results)} requests from {args.clients} clients in {elapsed:.2f}s, "
+              f"{stats['coalesced']} coalesced, 'graphs' answered in {1000 * ping:.1f} ms meanwhile")
+        for op, h in stats["latency"].items():
+            print(f"  {op:15s} n={h['count']:4d} mean {h['mean_ms']:8.1f} ms  "
+                  f"p50 <= {h['p50_ms']:g} ms  p99 <= {h['p99_ms']:g} ms")
+
+    asyncio.run(bench() if args.bench else serve())
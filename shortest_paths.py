@@ -0,0 +1,336 @@
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import instrument
+from array_graph import ArrayGraph
+from traversal import gather_ranges
+
+
+def distance_matrix(graph, dtype=np.float32):
+    """Dense matrix of edge weights: 0 on the diagonal, inf for no edge."""
+    n = graph.num_nodes
+    D = np.full((n, n), np.inf, dtype=dtype)
+    weights = graph.weights if graph.weights is not None else 1
+    # Parallel edges were merged when the graph was built
+    D[graph.sources(), graph.neighbors] = weights
+    np.fill_diagonal(D, np.minimum(D.diagonal(), 0))
+    return D
+
+
+def floyd_warshall(D, block=32, rows=16):
+    """Blocked Floyd-Warshall, in place on the dense matrix D.
+
+    For every block K of intermediate nodes, the rows and columns of K are
+    first closed over K one k at a time; every other row then only needs a
+    min-plus product with the final K panel, done a tile of rows at a time.
+    Raises ValueError on a negative cycle.
+    """
+    n = len(D)
+    instrument.count("relaxations", n**3)
+    for start in range(0, n, block):
+        K = slice(start, min(start + block, n))
+        for k in range(K.start, K.stop):
+            np.minimum(D[K, :], D[K, k, None] + D[None, k, :], out=D[K, :])
+            np.minimum(D[:, K], D[:, k, None] + D[None, k, K], out=D[:, K])
+        panel = D[K]
+        for first in range(0, n, rows):
+            R = slice(first, min(first + rows, n))
+            np.minimum(D[R], (D[R, K, None] + panel[None]).min(axis=1), out=D[R])
+    if (D.diagonal() < 0).any():
+        raise ValueError("Graph contains a negative cycle")
+    return D
+
+
+def _csr_lists(graph):
+    weights = graph.weights if graph.weights is not None else np.ones(len(graph.neighbors))
+    return graph.offsets.tolist(), graph.neighbors.tolist(), weights.tolist()
+
+
+def dijkstra(graph, source, lists=None):
+    """Distances from dense node `source` as a float64 array (inf if unreachable)."""
+    offsets, neighbors, weights = lists or _csr_lists(graph)
+    dist = [float("inf")] * graph.num_nodes
+    dist[source] = 0
+    heap = [(0, source)]
+    pushes = 1
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for i in range(offsets[u], offsets[u + 1]):
+            v = neighbors[i]
+            nd = d + weights[i]
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+                pushes += 1
+    dist = np.array(dist, dtype=np.float64)
+    if instrument.enabled():
+        # Every settled node scanned its out-edges once
+        settled = np.flatnonzero(np.isfinite(dist))
+        scanned = graph.offsets[settled + 1] - graph.offsets[settled]
+        instrument.count("edges_scanned", int(scanned.sum()))
+        instrument.count("relaxations", pushes - 1)
+        instrument.count("queue_pushes", pushes)
+    return dist
+
+
+def relax_rows(graph, sources, dtype=np.float32):
+    """Distance rows from all `sources` at once (label-correcting search).
+
+    Every round relaxes the out-edges of all (source, node) pairs whose
+    distance improved in the previous round, as flat NumPy gathers over the
+    CSR arrays; it stops when nothing improves. Negative weights are fine,
+    a negative cycle raises ValueError once n rounds did not settle.
+    """
+    return _relax(graph, sources, dtype)[0]
+
+
+def bellman_kalaba(graph, target, dtype=np.float64):
+    """Distances from every node to dense node `target`, and the rounds taken.
+
+    Bellman-Kalaba iteration d(u) = min(w(u, v) + d(v)) run as an SPFA-style
+    search on graph.reverse(): a round only relaxes the in-edges of the
+    nodes whose distance changed in the previous one, and the search ends as
+    soon as a round changes nothing. Raises ValueError on a negative cycle.
+    """
+    with instrument.phase("bellman_kalaba"):
+        D, rounds = _relax(graph.reverse(), [target], dtype)
+    return D[0], rounds
+
+
+def _relax(graph, sources, dtype):
+    n = graph.num_nodes
+    offsets = graph.offsets
+    neighbors = graph.neighbors.astype(np.int64)
+    weights = graph.weights if graph.weights is not None else np.ones(len(neighbors))
+    weights = weights.astype(dtype)
+    sources = np.asarray(sources, dtype=np.int64)
+    D = np.full(len(sources) * n, np.inf, dtype=dtype)
+    active = np.arange(len(sources)) * n + sources  # flat (row, node) indices
+    D[active] = 0
+    improved = np.zeros(len(D), dtype=bool)
+    rounds = 0
+    while len(active):
+        if rounds == n:
+            raise ValueError("Graph contains a negative cycle")
+        rounds += 1
+        rows, u = np.divmod(active, n)
+        edges = gather_ranges(offsets, u)
+        counts = offsets[u + 1] - offsets[u]
+        target = np.repeat(rows * n, counts) + neighbors[edges]
+        candidate = np.repeat(D[active], counts) + weights[edges]
+        better = candidate < D[target]
+        target = target[better]
+        np.minimum.at(D, target, candidate[better])
+        # Marking beats np.unique for deduplicating the next round
+        improved[target] = True
+        active = np.flatnonzero(improved)
+        improved[active] = False
+        instrument.count("edges_scanned", len(edges))
+        instrument.count("relaxations", len(target))
+        instrument.count("queue_pushes", len(active))
+    return D.reshape(len(sources), n), rounds
+
+
+# Graph of the current worker process and its CSR lists, see _init_rows
+_worker_graph = None
+_worker_lists = None
+
+
+def _init_rows(graph):
+    global _worker_graph, _worker_lists
+    _worker_graph = graph
+    _worker_lists = _csr_lists(graph)
+
+
+def _dijkstra_rows(sources):
+    return np.stack([dijkstra(_worker_graph, s, _worker_lists) for s in sources])
+
+
+def _relax_rows(sources):
+    return relax_rows(_worker_graph, sources, dtype=np.float64)
+
+
+def all_pairs_rows(graph, workers=None, batch=256):
+    """Float64 distance matrix from batches of rows, split across processes.
+
+    Rows are Dijkstra searches, or relax_rows if some weight is negative.
+    """
+    n = graph.num_nodes
+    D = np.empty((n, n), dtype=np.float64)
+    negative = graph.weights is not None and (graph.weights < 0).any()
+    rows = _relax_rows if negative else _dijkstra_rows
+    batches = [range(s, min(s + batch, n)) for s in range(0, n, batch)]
+    with ProcessPoolExecutor(workers, initializer=_init_rows, initargs=(graph,)) as pool:
+        for sources, block in zip(batches, pool.map(rows, batches)):
+            D[sources.start : sources.stop] = block
+    return D
+
+
+def all_pairs_shortest_paths(graph, method="auto", workers=None, dtype=np.float64):
+    """Dense all-pairs distance matrix of an ArrayGraph (inf = no path).
+
+    method is "floyd", "rows" or "auto": Floyd-Warshall for dense or small
+    graphs and graphs with negative weights, per-source Dijkstra on a
+    process pool (see all_pairs_rows) for large sparse ones. Floyd-Warshall
+    works in `dtype`; float32 halves its memory traffic but rounds large
+    distances. Rows are always float64.
+    """
+    if method == "auto":
+        n = graph.num_nodes
+        negative = graph.weights is not None and (graph.weights < 0).any()
+        dense = len(graph.neighbors) > n * n // 64
+        method = "floyd" if negative or dense or n <= 500 else "rows"
+    with instrument.phase(f"all_pairs_{method}"):
+        if method == "floyd":
+            return floyd_warshall(distance_matrix(graph, dtype))
+        return all_pairs_rows(graph, workers)
+
+
+def distance_dict(graph, D):
+    """{u: {v: distance}} for every reachable pair, like nx all-pairs output."""
+    ids = graph.node_ids.tolist()
+    integral = graph.weights is None or graph.weights.dtype.kind in "iu"
+    lengths = {}
+    for i, row in enumerate(D):
+        reachable = np.flatnonzero(np.isfinite(row))
+        values = row[reachable]
+        values = values.astype(np.int64) if integral else values.astype(np.float64)
+        lengths[ids[i]] = dict(zip((ids[j] for j in reachable.tolist()), values.tolist()))
+    return lengths
+
+
+def eccentricity_metrics(graph, D):
+    """Eccentricities, radius, diameter, center and periphery from D.
+
+    Raises ValueError if the graph is not connected, like nx.eccentricity.
+    """
+    eccentricity = D.max(axis=1)
+    if not np.isfinite(eccentricity).all():
+        raise ValueError("Found infinite path length because the graph is not connected")
+    if graph.weights is None or graph.weights.dtype.kind in "iu":
+        eccentricity = eccentricity.astype(np.int64)
+    radius = eccentricity.min()
+    diameter = eccentricity.max()
+    ids = graph.node_ids
+    return {
+        "eccentricity": dict(zip(ids.tolist(), eccentricity.tolist())),
+        "radius": radius.item(),
+        "diameter": diameter.item(),
+        "center": ids[eccentricity == radius].tolist(),
+        "periphery": ids[eccentricity == diameter].tolist(),
+    }
+
+
+def random_weighted_graph(num_nodes, num_edges, max_weight=10, seed=0):
+    """Connected random weighted ArrayGraph: a random spanning tree plus extra edges."""
+    rng = np.random.default_rng(seed)
+    tree_dst = np.arange(1, num_nodes)
+    tree_src = (rng.random(num_nodes - 1) * tree_dst).astype(np.int64)
+    extra = max(0, num_edges - (num_nodes - 1))
+    src = np.concatenate([tree_src, rng.integers(0, num_nodes, extra)])
+    dst = np.concatenate([tree_dst, rng.integers(0, num_nodes, extra)])
+    weights = rng.integers(1, max_weight + 1, len(src))
+    return ArrayGraph.from_edges(src, dst, weights)
+
+
+def grid_graph(rows, cols, max_weight=10, directed=False, seed=0):
+    """Road-style rows x cols grid with random integer weights.
+
+    A directed grid gets both directions of every street with independent
+    weights.
+    """
+    rng = np.random.default_rng(seed)
+    node = np.arange(rows * cols).reshape(rows, cols)
+    src = np.concatenate([node[:, :-1].ravel(), node[:-1, :].ravel()])
+    dst = np.concatenate([node[:, 1:].ravel(), node[1:, :].ravel()])
+    if directed:
+        src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+    weights = rng.integers(1, max_weight + 1, len(src))
+    return ArrayGraph.from_edges(src, dst, weights, directed)
+
+
+def random_geometric_graph(num_nodes, radius, scale=1000, seed=0):
+    """Random points in the unit square joined when closer than `radius`.
+
+    Weights are the distances times `scale`, rounded up to integers. Pairs
+    are only looked for in the same and adjacent grid cells of side radius.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.random((num_nodes, 2))
+    cells = max(1, int(1 / radius))
+    cx, cy = np.minimum((points * cells).astype(np.int64), cells - 1).T
+    order = np.argsort(cx * cells + cy, kind="stable")
+    cell_offsets = np.zeros(cells * cells + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cx * cells + cy, minlength=cells * cells), out=cell_offsets[1:])
+
+    src, dst = [], []
+    # Half of the 3x3 neighborhood, so every pair of cells is visited once
+    for dx, dy in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+        x, y = cx + dx, cy + dy
+        point = np.flatnonzero((x < cells) & (y >= 0) & (y < cells))
+        cell = x[point] * cells + y[point]
+        counts = cell_offsets[cell + 1] - cell_offsets[cell]
+        a = np.repeat(point, counts)
+        b = order[gather_ranges(cell_offsets, cell)]
+        keep = np.hypot(*(points[a] - points[b]).T) < radius
+        if (dx, dy) == (0, 0):
+            keep &= a < b
+        src.append(a[keep])
+        dst.append(b[keep])
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    weights = np.ceil(np.hypot(*(points[src] - points[dst]).T) * scale).astype(np.int64)
+    return ArrayGraph.from_edges(src, dst, np.maximum(weights, 1))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import networkx as nx
+
+    parser = argparse.ArgumentParser(description="All-pairs shortest paths benchmark")
+    parser.add_argument("--floyd-nodes", type=int, default=1000)
+    parser.add_argument("--rows-nodes", type=int, default=10_000)
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--check-nodes", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--grid", type=int, nargs=2, default=(500, 500))
+    args = parser.parse_args()
+
+    # Distances to one target on a directed road-style grid
+    graph = grid_graph(*args.grid, directed=True)
+    G = graph.reverse().to_networkx()
+    t = time.perf_counter()
+    dist, rounds = bellman_kalaba(graph, 0)
+    elapsed = time.perf_counter() - t
+    expected = nx.single_source_dijkstra_path_length(G, 0)
+    assert np.array_equal(dist, [expected[v] for v in range(graph.num_nodes)])
+    print(f"Bellman-Kalaba, {graph.num_edges} edges: {elapsed:.2f}s, {rounds} rounds")
+
+    # Correctness and speed against networkx on a small graph
+    graph = random_weighted_graph(args.check_nodes, args.degree * args.check_nodes)
+    G = graph.to_networkx()
+    t = time.perf_counter()
+    expected = dict(nx.all_pairs_bellman_ford_path_length(G))
+    nx_time = time.perf_counter() - t
+    for method in ("floyd", "rows"):
+        t = time.perf_counter()
+        D = all_pairs_shortest_paths(graph, method, args.workers)
+        elapsed = time.perf_counter() - t
+        assert distance_dict(graph, D) == expected
+        print(f"n={args.check_nodes} {method}: {elapsed:.2f}s (networkx {nx_time:.2f}s)")
+
+    for n, method in ((args.floyd_nodes, "floyd"), (args.rows_nodes, "rows")):
+        graph = random_weighted_graph(n, args.degree * n, seed=1)
+        t = time.perf_counter()
+        D = all_pairs_shortest_paths(graph, method, args.workers)
+        metrics = eccentricity_metrics(graph, D)
+        elapsed = time.perf_counter() - t
+        print(
+            f"n={n} {method}: {elapsed:.2f}s "
+            f"(radius {metrics['radius']}, diameter {metrics['diameter']})"
+        )
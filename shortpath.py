@@ -14,97 +14,127 @@ Using the Bellman-Kalaba Algorithm:
 Find shortest paths to vertex 4 from all other vertices.
 """
 
-import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
+
+from array_graph import ArrayGraph
+from edge_loader import load_edge_list
+import instrument
+from layout import graph_layout
+from shortest_paths import (
+    all_pairs_shortest_paths,
+    bellman_kalaba,
+    distance_dict,
+    eccentricity_metrics,
+)
 
 
 # Function to read the graph from a file
-def read_graph_from_file(file_path):
-    G = nx.Graph()
-    with open(file_path, "r") as file:
-        for line in file:
-            parts = line.strip().split()
-            if len(parts) == 3:
-                u, v, w = map(int, parts)
-                G.add_edge(u, v, weight=w)
-            else:
-                raise ValueError("Line format should be: vertex1 vertex2 weight")
+# Line format: vertex1 vertex2 weight; parsed edges are cached next to the file
+def read_graph_from_file(file_path, cache_dir=None):
+    import networkx as nx
+
+    with instrument.phase("parse"):
+        edges = load_edge_list(file_path, columns=3, cache_dir=cache_dir)
+    src = edges.node_ids[edges.src].tolist()
+    dst = edges.node_ids[edges.dst].tolist()
+    with instrument.phase("build"):
+        G = nx.Graph()
+        G.add_weighted_edges_from(zip(src, dst, edges.weight.tolist()))
     return G
 
 
-def calculate_shortest_paths_to(graph, target):
-    # Initialize a graph to store reversed edges with same weights
-    reversed_graph = nx.Graph()
-    for u, v, data in graph.edges(data=True):
-        weight = data["weight"]
-        reversed_graph.add_edge(v, u, weight=weight)  # Reverse the edge direction
-
-    # Calculate shortest paths from all nodes to the 'target' by running
-    # Bellman-Ford on the reversed graph from 'target'
-    distances = nx.single_source_bellman_ford_path_length(reversed_graph, target)
-    return distances
-
-
-# Read the graph
-file_path = "data/graph_7.txt"
-G = read_graph_from_file(file_path)
-
-# edges = [(1, 2, 3), (2, 3, 4), (1, 3, 7), (3, 4, 2), (4, 2, 5), (1, 4, 1), (4, 1, 6)]
-# G.add_weighted_edges_from(edges)
-
-# Plot the graph
-pos = nx.spring_layout(G)
-nx.draw(
-    G,
-    pos,
-    with_labels=True,
-    node_color="skyblue",
-    node_size=700,
-    edge_color="k",
-    font_size=15,
-    font_color="darkred",
-)
-edge_labels = dict(
-    [
-        (
-            (
-                u,
-                v,
-            ),
-            d["weight"],
+def calculate_shortest_paths_to(graph, target, return_rounds=False):
+    """{node: distance to target} by Bellman-Kalaba.
+
+    `graph` is an ArrayGraph or a weighted nx graph such as the one
+    read_graph_from_file returns. Edges are relaxed backwards from 'target'
+    over graph.reverse(), which is the graph itself when undirected. With
+    return_rounds, returns (distances, number of relaxation rounds).
+    """
+    if not isinstance(graph, ArrayGraph):
+        graph = ArrayGraph.from_networkx(graph)
+    distances, rounds = bellman_kalaba(graph, graph.index_of(target))
+    reachable = np.flatnonzero(np.isfinite(distances))
+    values = distances[reachable]
+    if graph.weights is None or graph.weights.dtype.kind in "iu":
+        values = values.astype(np.int64)
+    distances = dict(zip(graph.node_ids[reachable].tolist(), values.tolist()))
+    return (distances, rounds) if return_rounds else distances
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    # Read the graph
+    file_path = "data/graph_7.txt"
+    G = read_graph_from_file(file_path)
+
+    # edges = [(1, 2, 3), (2, 3, 4), (1, 3, 7), (3, 4, 2), (4, 2, 5), (1, 4, 1), (4, 1, 6)]
+    # G.add_weighted_edges_from(edges)
+
+    # Plot the graph
+    with instrument.phase("plot"):
+        pos = graph_layout(G)
+        nx.draw(
+            G,
+            pos,
+            with_labels=True,
+            node_color="skyblue",
+            node_size=700,
+            edge_color="k",
+            font_size=15,
+            font_color="darkred",
         )
-        for u, v, d in G.edges(data=True)
-    ]
-)
-nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels)
-plt.savefig("graph.png")
-
-lengths = dict(nx.all_pairs_bellman_ford_path_length(G))
-
-# Compute eccentricities, radius, and diameter
-eccentricities = nx.eccentricity(G, sp=lengths)
-radius = nx.radius(G, e=eccentricities)
-diameter = nx.diameter(G, e=eccentricities)
-center = nx.center(G, e=eccentricities)
-periphery = nx.periphery(G, e=eccentricities)
-
-print("Shortest paths between all pairs using Floyd:", lengths)
-print("Eccentricities:", eccentricities)
-print("Radius:", radius)
-print("Diameter:", diameter)
-print("Center:", center)
-print("Periphery:", periphery)
-
-paths_from_4 = nx.single_source_dijkstra_path_length(G, 4)
-print("Shortest paths from vertex 4 using Djikstra:", paths_from_4)
-
-paths_from_4_bf = nx.single_source_bellman_ford_path_length(G, 4)
-print("Shortest paths from vertex 4 using Bellman-Ford:", paths_from_4_bf)
-
-# Calculate shortest paths to vertex 4 from all other vertices
-target_vertex = 4
-distances_to_target = calculate_shortest_paths_to(G, target_vertex)
-print(
-    f"Shortest paths to vertex {target_vertex} using Bellman-Kalaba:",
-    distances_to_target,
-)
+        edge_labels = dict(
+            [
+                (
+                    (
+                        u,
+                        v,
+                    ),
+                    d["weight"],
+                )
+                for u, v, d in G.edges(data=True)
+            ]
+        )
+        nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels)
+        plt.savefig("graph.png")
+
+    # All-pairs distances as a dense matrix (blocked Floyd-Warshall, or
+    # row-parallel Dijkstra for large sparse graphs), see shortest_paths.py
+    graph = ArrayGraph.from_file(file_path, columns=3)
+    D = all_pairs_shortest_paths(graph)
+    lengths = distance_dict(graph, D)
+
+    # Compute eccentricities, radius, and diameter from the matrix
+    metrics = eccentricity_metrics(graph, D)
+    eccentricities = metrics["eccentricity"]
+    radius = metrics["radius"]
+    diameter = metrics["diameter"]
+    center = metrics["center"]
+    periphery = metrics["periphery"]
+
+    print("Shortest paths between all pairs using Floyd:", lengths)
+    print("Eccentricities:", eccentricities)
+    print("Radius:", radius)
+    print("Diameter:", diameter)
+    print("Center:", center)
+    print("Periphery:", periphery)
+
+    paths_from_4 = nx.single_source_dijkstra_path_length(G, 4)
+    print("Shortest paths from vertex 4 using Djikstra:", paths_from_4)
+
+    paths_from_4_bf = nx.single_source_bellman_ford_path_length(G, 4)
+    print("Shortest paths from vertex 4 using Bellman-Ford:", paths_from_4_bf)
+
+    # Calculate shortest paths to vertex 4 from all other vertices
+    target_vertex = 4
+    distances_to_target, rounds = calculate_shortest_paths_to(
+        graph, target_vertex, return_rounds=True
+    )
+    print(
+        f"Shortest paths to vertex {target_vertex} using Bellman-Kalaba "
+        f"({rounds} rounds):",
+        distances_to_target,
+    )
@@ -0,0 +1,42 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from array_graph import ArrayGraph
+from batch_paths import BatchShortestPaths, batch_shortest_paths
+
+
+def _expected(graph, source):
+    lengths = nx.single_source_bellman_ford_path_length(graph.to_networkx(), source)
+    row = np.full(graph.num_nodes, np.inf)
+    row[[graph.index_of(v) for v in lengths]] = list(lengths.values())
+    return row
+
+
+@pytest.mark.parametrize("method", ["dijkstra", "bellman-ford"])
+@pytest.mark.parametrize("directed", [False, True])
+def test_batch_matches_networkx(directed, method):
+    rng = np.random.default_rng(7)
+    # Sparse ids, so rows must be aligned with node_ids and not with indices
+    src, dst = 10 * rng.integers(50, size=(2, 150))
+    graph = ArrayGraph.from_edges(src, dst, rng.integers(0, 10, size=150), directed=directed)
+    sources = graph.node_ids[::3].tolist()
+    result = batch_shortest_paths(graph, sources, method, workers=2, chunk=4)
+    assert sorted(result) == sorted(sources)
+    for source, row in result.items():
+        assert np.array_equal(row, _expected(graph, source))
+
+
+def test_negative_weights_with_bellman_ford():
+    graph = ArrayGraph.from_edges([1, 2, 1], [2, 3, 3], np.array([4, -3, 2]), directed=True)
+    result = batch_shortest_paths(graph, [1], "bellman-ford", workers=1)
+    assert result[1].tolist() == [0, 4, 1]
+
+
+def test_throughput_and_unknown_method():
+    graph = ArrayGraph.from_edges([0, 1], [1, 2])
+    with BatchShortestPaths(graph, workers=1) as batch:
+        assert len(list(batch.run([0, 1, 2], chunk=2))) == 3
+        assert batch.sources_done == 3 and batch.throughput > 0
+        with pytest.raises(ValueError):
+            list(batch.run([0], method="astar"))
@@ -0,0 +1,94 @@
+import json
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import cli
+from queries import read_graph
+
+EDGES = [(0, 1, 4, 2), (0, 2, 3, 1), (2, 1, 2, 1), (1, 3, 5, 3), (2, 3, 2, 6), (9, 0, 1, 1)]
+
+
+@pytest.fixture
+def edge_file(tmp_path):
+    path = tmp_path / "edges.txt"
+    # Shuffled, so the CSR build has to permute both value columns
+    rows = np.array(EDGES)[[4, 1, 5, 0, 3, 2]]
+    np.savetxt(path, rows, fmt="%d")
+    return str(path)
+
+
+def _digraph():
+    G = nx.DiGraph()
+    for u, v, capacity, cost in EDGES:
+        G.add_edge(u, v, capacity=capacity, weight=cost)
+    return G
+
+
+def _run(capsys, *argv):
+    cli.main(list(argv))
+    return json.loads(capsys.readouterr().out)
+
+
+def test_read_graph_keeps_capacity_and_cost_together(edge_file):
+    graph, cost = read_graph(edge_file, 4, directed=True)
+    values = {(u, v): (c, w) for u, v, c, w in EDGES}
+    tails = graph.node_ids[graph.sources()].tolist()
+    heads = graph.node_ids[graph.neighbors].tolist()
+    rows = zip(tails, heads, graph.weights.tolist(), cost.tolist())
+    assert {(u, v): (c, w) for u, v, c, w in rows} == values
+
+
+def test_max_flow_and_min_cut(capsys, edge_file):
+    G = _digraph()
+    assert _run(capsys, "max-flow", edge_file, "0", "3", "--directed") == {
+        "value": nx.maximum_flow_value(G, 0, 3)}
+    result = _run(
+        capsys, "min-cut", edge_file, "0", "3", "--directed", "--method", "push_relabel"
+    )
+    value, _ = nx.minimum_cut(G, 0, 3)
+    assert result["value"] == value
+    assert sum(G[u][v]["capacity"] for u, v in result["cut_edges"]) == value
+    assert 0 in result["source_side"] and 3 not in result["source_side"]
+
+
+@pytest.mark.parametrize("method", ["cost_scaling", "ssp", "cycle_cancelling"])
+def test_min_cost_flow(capsys, edge_file, method):
+    G = _digraph()
+    result = _run(capsys, "min-cost-flow", edge_file, "0", "3", "--directed", "--method", method)
+    flow_dict = nx.max_flow_min_cost(G, 0, 3)
+    assert result["value"] == nx.maximum_flow_value(G, 0, 3)
+    assert result["cost"] == nx.cost_of_flow(G, flow_dict)
+
+
+def test_traversals_and_shortest_paths(capsys, tmp_path):
+    path = tmp_path / "weighted.txt"
+    np.savetxt(path, [(u, v, w) for u, v, _, w in EDGES], fmt="%d")
+    G = nx.Graph()
+    G.add_weighted_edges_from((u, v, w) for u, v, _, w in EDGES)
+    bfs = _run(capsys, "bfs", str(path), "0")
+    assert dict(zip(bfs["nodes"], bfs["height"])) == nx.single_source_shortest_path_length(G, 0)
+    dfs = _run(capsys, "dfs", str(path), "0")
+    assert dfs["nodes"] == list(nx.dfs_preorder_nodes(G, 0)) and dfs["depth"][0] == 0
+    paths = _run(capsys, "shortest-paths", str(path), "9", "--method", "bellman_ford")
+    distances = dict(zip(paths["nodes"], paths["distances"]))
+    assert distances == nx.single_source_dijkstra_path_length(G, 9)
+    result = _run(capsys, "shortest-paths", str(path), "9", "--target", "3")
+    assert result == {"distance": nx.dijkstra_path_length(G, 9, 3)}
+
+
+def test_coloring_with_plot(capsys, edge_file, tmp_path):
+    png = tmp_path / "colors.png"
+    result = _run(capsys, "coloring", edge_file, "--columns", "4", "--plot", str(png))
+    colors = dict(zip(result["nodes"], result["colors"]))
+    assert all(colors[u] != colors[v] for u, v, _, _ in EDGES)
+    assert result["num_colors"] == max(result["colors"]) + 1
+    assert png.stat().st_size > 0
+
+
+def test_errors_exit_with_a_message(capsys, edge_file):
+    with pytest.raises(SystemExit, match="KeyError"):
+        cli.main(["bfs", edge_file, "42"])
+    with pytest.raises(SystemExit, match="usage"):
+        cli.main(["nope"])
@@ -0,0 +1,21 @@
+import networkx as nx
+import pytest
+
+from array_graph import ArrayGraph
+from coloring import STRATEGIES, color_graph, dsatur, is_proper
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("seed", range(5))
+def test_colorings_are_proper(seed, strategy):
+    G = nx.gnm_random_graph(150, 900, seed=seed)
+    graph = ArrayGraph.from_edges(*zip(*G.edges()))
+    assert is_proper(graph, color_graph(graph, strategy, seed=seed))
+
+
+def test_dsatur_colors_bipartite_graph_with_two_colors():
+    # DSATUR is exact on bipartite graphs, even crown graphs
+    n = 8
+    edges = [(i, n + j) for i in range(n) for j in range(n) if i != j]
+    graph = ArrayGraph.from_edges(*zip(*edges))
+    assert dsatur(graph).max() == 1
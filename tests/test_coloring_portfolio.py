@@ -0,0 +1,30 @@
+import time
+
+import networkx as nx
+
+from array_graph import ArrayGraph
+from coloring import color_graph, is_proper
+from coloring_portfolio import GREEDY, portfolio_coloring
+
+
+def test_portfolio_beats_every_greedy_run_within_budget():
+    G = nx.gnm_random_graph(300, 3000, seed=1)
+    graph = ArrayGraph.from_edges(*zip(*G.edges()))
+    start = time.perf_counter()
+    colors, telemetry = portfolio_coloring(graph, budget=2.0, workers=2, restarts=1)
+    assert time.perf_counter() - start < 5.0  # budget plus pool start-up
+    assert is_proper(graph, colors)
+    k = int(colors.max()) + 1
+    assert all(k <= int(color_graph(graph, s).max()) + 1 for s in GREEDY)
+    runs = {run["strategy"]: run for run in telemetry}
+    assert set(runs) == set(GREEDY) | {"tabucol", "random_sequential"}
+    assert all("colors" not in run for run in telemetry)
+    finished = [run for run in telemetry if run["num_colors"] is not None]
+    assert min(run["num_colors"] for run in finished) == k
+    assert all(0 <= run["found_at"] <= 2.0 for run in finished)
+
+
+def test_bipartite_graph_gets_two_colors():
+    graph = ArrayGraph.from_edges(*zip(*nx.convert_node_labels_to_integers(nx.grid_2d_graph(10, 10)).edges()))
+    colors, _ = portfolio_coloring(graph, budget=1.0, workers=2, restarts=1)
+    assert is_proper(graph, colors) and colors.max() == 1
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from array_graph import ArrayGraph
+from contraction import ContractionHierarchy
+from shortest_paths import dijkstra
+
+
+def _random_graph(seed, directed):
+    rng = np.random.default_rng(seed)
+    n, m = int(rng.integers(2, 50)), int(rng.integers(1, 150))
+    return ArrayGraph.from_edges(rng.integers(n, size=m), rng.integers(n, size=m),
+                                 rng.integers(0, 10, size=m), directed=directed)
+
+
+def _path_length(graph, path):
+    length = 0
+    for a, b in zip(path, path[1:]):
+        a, b = graph.index_of(a), graph.index_of(b)
+        nbrs = graph.neighbors_of(a)
+        k = int(np.searchsorted(nbrs, b))
+        assert k < len(nbrs) and nbrs[k] == b, "path uses a missing edge"
+        length += graph.weights[graph.offsets[a] + k]
+    return length
+
+
+@pytest.mark.parametrize("max_settled", [1, 5, 100])
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_ch_matches_dijkstra(seed, directed, max_settled, tmp_path):
+    graph = _random_graph(seed, directed)
+    path = str(tmp_path / "index.npz")
+    ContractionHierarchy.build(graph, max_settled=max_settled).save(path)
+    ch = ContractionHierarchy.load(path)
+    rng = np.random.default_rng(seed)
+    for s, t in rng.integers(graph.num_nodes, size=(20, 2)):
+        expected = dijkstra(graph, s)[t]
+        distance, nodes = ch.path(graph.node_ids[s], graph.node_ids[t])
+        assert distance == expected
+        if nodes is None:
+            assert np.isinf(expected)
+            continue
+        assert nodes[0] == graph.node_ids[s] and nodes[-1] == graph.node_ids[t]
+        assert _path_length(graph, nodes) == distance
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from array_graph import ArrayGraph
+from disk_graph import DiskGraph
+from shortest_paths import dijkstra
+from traversal import bfs_levels, dfs_preorder
+
+
+def _edge_file(tmp_path, seed):
+    rng = np.random.default_rng(seed)
+    n, m = 300, 1500
+    # Sparse ids and repeated (u, v) pairs, whose last weight must win
+    edges = np.column_stack([7 * rng.integers(n, size=m), 7 * rng.integers(n, size=m),
+                             rng.integers(1, 20, size=m)])
+    path = tmp_path / "edges.txt"
+    np.savetxt(path, edges, fmt="%d")
+    return str(path)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_external_build_matches_array_graph(tmp_path, seed, directed):
+    path = _edge_file(tmp_path, seed)
+    graph = ArrayGraph.from_file(path, columns=3, directed=directed, cache_dir=False)
+    # A tiny memory budget forces many sorted runs and merge ranges
+    disk = DiskGraph.build(path, str(tmp_path / "disk"), ("weight",), directed, memory=4096)
+    assert np.array_equal(disk.node_ids, graph.node_ids)
+    again = disk.to_array_graph()
+    for name in ("offsets", "neighbors", "weights"):
+        assert np.array_equal(getattr(again, name), getattr(graph, name))
+
+    for root in (0, graph.num_nodes // 2):
+        for got, expected in zip(disk.bfs_levels(root, batch=64), bfs_levels(graph, root)):
+            assert np.array_equal(got, expected)
+        for got, expected in zip(disk.dfs_preorder(root, block=4), dfs_preorder(graph, root)):
+            assert np.array_equal(got, expected)
+        assert np.array_equal(disk.dijkstra(root), dijkstra(graph, root))
+
+
+def test_from_array_graph_round_trip_and_page_stats(tmp_path):
+    graph = ArrayGraph.from_edges([5, 6, 7, 5], [6, 7, 8, 8], np.array([1, 2, 3, 10]))
+    disk = DiskGraph.from_array_graph(graph, str(tmp_path / "disk"))
+    reopened = DiskGraph(str(tmp_path / "disk"), max_resident=4096)
+    assert reopened.index_of(7) == 2 and reopened.degree(0) == 2
+    assert reopened.neighbors_of(0).tolist() == graph.neighbors_of(0).tolist()
+    assert reopened.dijkstra(0).tolist() == dijkstra(graph, 0).tolist()
+    stats = reopened.page_stats()
+    assert stats["neighbors"]["touches"] > 0
+    reopened.reset_page_stats()
+    assert reopened.page_stats()["neighbors"]["touches"] == 0
+    with pytest.raises(KeyError):
+        disk.index_of(9)
+
+
+def test_unsupported_version(tmp_path):
+    graph = ArrayGraph.from_edges([0], [1])
+    DiskGraph.from_array_graph(graph, str(tmp_path / "disk"))
+    header = tmp_path / "disk" / "header.json"
+    header.write_text(header.read_text().replace('"version": ', '"version": 9'))
+    with pytest.raises(ValueError):
+        DiskGraph(str(tmp_path / "disk"))
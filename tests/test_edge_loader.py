@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from edge_loader import load_edge_list
+
+
+def test_unwritable_cache_is_skipped(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("1 2 5\n2 3 7\n")
+    # A file where the cache directory should go makes makedirs fail
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    edges = load_edge_list(str(path), columns=3, cache_dir=str(blocker / "cache"))
+    assert edges.node_ids.tolist() == [1, 2, 3]
+    assert edges.weight.tolist() == [5, 7]
+
+
+def test_default_cache_next_to_input(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("1 2\n2 3\n")
+    first = load_edge_list(str(path))
+    assert os.path.exists(str(path) + ".cache/meta.json")
+    second = load_edge_list(str(path))
+    assert isinstance(second.src, np.memmap)
+    assert np.array_equal(first.src, second.src)
+
+
+@pytest.mark.parametrize("damage", ["delete", "truncate"])
+def test_damaged_cache_is_reparsed(tmp_path, damage):
+    path = tmp_path / "edges.txt"
+    path.write_text("1 2 5\n2 3 7\n4 1 2\n")
+    expected = load_edge_list(str(path), columns=3)
+    array = str(path) + ".cache/dst.npy"
+    if damage == "delete":
+        os.remove(array)
+    else:
+        with open(array, "r+b") as file:
+            file.truncate(os.path.getsize(array) - 4)
+    edges = load_edge_list(str(path), columns=3)
+    assert np.array_equal(edges.dst, expected.dst)
+    # and the cache is rewritten
+    assert isinstance(load_edge_list(str(path), columns=3).dst, np.memmap)
+
+
+def test_meta_written_last(tmp_path, monkeypatch):
+    path = tmp_path / "edges.txt"
+    path.write_text("1 2\n")
+    saved = []
+
+    def save(file, array):
+        saved.append(os.path.exists(str(path) + ".cache/meta.json"))
+        with open(file, "wb") as out:
+            np.lib.format.write_array(out, np.asanyarray(array))
+
+    monkeypatch.setattr(np, "save", save)
+    load_edge_list(str(path))
+    assert saved and not any(saved)
+    assert os.path.exists(str(path) + ".cache/meta.json")
@@ -0,0 +1,111 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from flow_engine import FlowNetwork, maximum_flow, random_flow_network
+from min_cost_flow import max_flow_min_cost
+
+
+def _random_network(seed, directed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(3, 15))
+    G = nx.gnm_random_graph(n, int(rng.integers(n, 3 * n)), seed=seed, directed=directed)
+    for u, v in G.edges():
+        # Some edges have no capacity, which means infinite
+        if rng.random() < 0.9:
+            G[u][v]["capacity"] = int(rng.integers(1, 10))
+        G[u][v]["weight"] = int(rng.integers(0, 5))
+    return G
+
+
+def _expected(G, s, t):
+    try:
+        return nx.maximum_flow_value(G, s, t)
+    except nx.NetworkXUnbounded:
+        return None
+
+
+@pytest.mark.parametrize("method", ["dinic", "push_relabel"])
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(20))
+def test_max_flow_matches_networkx(seed, directed, method):
+    G = _random_network(seed, directed)
+    s, t = 0, G.number_of_nodes() - 1
+    expected = _expected(G, s, t)
+    if expected is None:
+        with pytest.raises(ValueError):
+            maximum_flow(G, s, t, method=method)
+        return
+    value, flow_dict = maximum_flow(G, s, t, method=method)
+    assert value == expected
+    for u, out in flow_dict.items():
+        for v, f in out.items():
+            assert 0 <= f <= G[u][v].get("capacity", float("inf"))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_min_cost_flow_missing_capacity(seed):
+    G = _random_network(seed, directed=True)
+    s, t = 0, G.number_of_nodes() - 1
+    expected = _expected(G, s, t)
+    if expected is None:
+        with pytest.raises(ValueError):
+            max_flow_min_cost(G, s, t)
+        return
+    value, cost, _ = max_flow_min_cost(G, s, t)
+    assert value == expected
+    assert cost == nx.cost_of_flow(G, nx.max_flow_min_cost(G, s, t))
+
+
+def test_min_cost_flow_rejects_undirected():
+    with pytest.raises(ValueError):
+        max_flow_min_cost(nx.Graph([(0, 1, {"capacity": 1})]), 0, 1)
+
+
+def test_undirected_edge_carries_flow_both_ways():
+    G = nx.Graph()
+    G.add_edge("s", "a", capacity=3)
+    G.add_edge("b", "a", capacity=2)
+    G.add_edge("b", "t", capacity=5)
+    assert FlowNetwork.from_networkx(G).solve("s", "t") == 2
+    assert FlowNetwork.from_networkx(G).solve("t", "s") == 2
+
+
+def _check_flow(network):
+    flows = network.edge_flows()[network.alive]
+    assert (flows >= 0).all() and (flows <= network.capacity[0::2][network.alive]).all()
+    tails, heads = network.head[1::2][network.alive], network.head[0::2][network.alive]
+    n = network.num_nodes
+    balance = np.bincount(tails, flows, n) - np.bincount(heads, flows, n)
+    s, t = network.index[network.source], network.index[network.sink]
+    assert balance[s] == network.value == -balance[t]
+    balance[[s, t]] = 0
+    assert not balance.any()
+
+
+@pytest.mark.parametrize("method", ["dinic", "push_relabel"])
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_updates_match_fresh_solve(seed, method):
+    rng = np.random.default_rng(seed)
+    n = 30
+    edges = {e[:2]: e[2] for e in random_flow_network(n, 150, max_capacity=20, seed=seed)}
+    network = FlowNetwork([(u, v, c) for (u, v), c in edges.items()])
+    network.solve(0, n - 1, method)
+    for _ in range(40):
+        u, v = (int(x) for x in rng.integers(n, size=2))
+        if u == v:
+            continue
+        action = rng.integers(3)
+        if action == 0 and (u, v) in edges:
+            network.remove_edge(u, v)
+            del edges[(u, v)]
+        elif action == 1:
+            edges[(u, v)] = int(rng.integers(0, 30))
+            network.add_edge(u, v, edges[(u, v)])
+        elif (u, v) in edges:
+            edges[(u, v)] = int(rng.integers(0, 30))
+            network.update_capacity(u, v, edges[(u, v)])
+        value = network.resolve(method)
+        expected = FlowNetwork([(a, b, c) for (a, b), c in edges.items()]).solve(0, n - 1)
+        assert value == expected
+        _check_flow(network)
@@ -0,0 +1,38 @@
+import imageio.v2 as imageio
+import networkx as nx
+import pytest
+
+from custom_max_flow import custom_edmonds_karp
+from flow_render import FlowRenderer
+
+
+def _undirected():
+    G = nx.Graph()
+    G.add_edge("s", "a", capacity=3)
+    G.add_edge("b", "a", capacity=2)
+    G.add_edge("s", "b", capacity=1)
+    G.add_edge("b", "t", capacity=5)
+    return G
+
+
+def _missing_capacity():
+    G = nx.DiGraph()
+    G.add_edge("s", "a", capacity=4)
+    G.add_edge("a", "b")  # infinite
+    G.add_edge("s", "b", capacity=2)
+    G.add_edge("b", "t", capacity=5)
+    return G
+
+
+@pytest.mark.parametrize("make", [_undirected, _missing_capacity])
+def test_renders_solver_edges(make, tmp_path):
+    G = make()
+    path = str(tmp_path / "flow.gif")
+    with FlowRenderer(G, path, workers=1) as renderer:
+        value = custom_edmonds_karp(G, "s", "t", events=renderer.events)
+    assert value == nx.maximum_flow_value(G, "s", "t")
+    assert renderer.frames == len(imageio.mimread(path)) > 0
+    # Every label of G, once, and the flow into the sink adds up
+    assert len(renderer.label_edges) == G.number_of_edges()
+    flows = dict(zip(renderer.label_edges, renderer.label_flows().tolist()))
+    assert sum(f for (u, v), f in flows.items() if "t" in (u, v)) == value
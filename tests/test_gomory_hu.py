@@ -0,0 +1,33 @@
+import itertools
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from gomory_hu import GomoryHuTree
+
+
+def _random_network(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 12))
+    G = nx.gnm_random_graph(n, int(rng.integers(n - 1, 2 * n)), seed=seed)
+    for u, v in G.edges():
+        G[u][v]["capacity"] = int(rng.integers(1, 10))
+    return G
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("seed", range(15))
+def test_cuts_match_networkx(seed, workers, tmp_path):
+    G = _random_network(seed)
+    tree = GomoryHuTree.build(G, workers=workers, batch=3)
+    path = str(tmp_path / "tree.npz")
+    tree.save(path)
+    tree = GomoryHuTree.load(path)
+    for s, t in itertools.combinations(G, 2):
+        expected = nx.minimum_cut_value(G, s, t)
+        assert tree.min_cut_value(s, t) == expected
+        value, (S, T), cut_edges = tree.min_cut(s, t)
+        assert value == expected
+        assert s in S and t in T
+        assert sum(G[u][v]["capacity"] for u, v in cut_edges) == expected
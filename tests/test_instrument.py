@@ -0,0 +1,63 @@
+import io
+import json
+import pstats
+import time
+
+import instrument
+from array_graph import ArrayGraph
+from traversal import bfs_levels
+
+
+def test_off_by_default():
+    assert not instrument.enabled()
+    assert instrument.phase("x") is instrument.phase("y")  # shared no-op
+    instrument.count("edges_scanned")
+
+
+def test_nested_phases_and_counters():
+    with instrument.recording() as recorder:
+        with instrument.phase("outer"):
+            time.sleep(0.01)
+            for _ in range(2):
+                with instrument.phase("inner"):
+                    time.sleep(0.01)
+                    instrument.count("steps", 3)
+    assert not instrument.enabled()
+    calls, tottime, cumtime, callers = recorder.phases["outer"]
+    assert calls == 1 and cumtime >= tottime + recorder.phases["inner"][2] - 1e-6
+    assert recorder.phases["inner"][0] == 2 and callers == {}
+    assert recorder.phases["inner"][3]["outer"][0] == 2
+    assert recorder.counters == {"steps": 6}
+    report = json.loads(recorder.to_json())
+    assert report["phases"]["inner"]["callers"] == {"outer": 2}
+
+
+def test_recursive_phase_counts_outermost_total():
+    with instrument.recording() as recorder:
+        with instrument.phase("solve"):
+            with instrument.phase("solve"):
+                time.sleep(0.01)
+    calls, tottime, cumtime, _ = recorder.phases["solve"]
+    assert calls == 2 and abs(cumtime - tottime) < 1e-3
+
+
+def test_solvers_report_counters():
+    graph = ArrayGraph.from_edges([0, 1, 2], [1, 2, 3])
+    with instrument.recording() as recorder:
+        bfs_levels(graph, 0)
+    assert recorder.counters["edges_scanned"] == 2 * graph.num_edges
+
+
+def test_pstats_export_loads(tmp_path):
+    with instrument.recording() as recorder:
+        with instrument.phase("build"):
+            with instrument.phase("bfs"):
+                pass
+    path = str(tmp_path / "phases.prof")
+    recorder.dump_stats(path)
+    stats = pstats.Stats(path)
+    assert stats.total_calls == 2
+    assert {key[2] for key in stats.stats} == {"build", "bfs"}
+    out = io.StringIO()
+    recorder.print_stats(file=out)
+    assert "bfs" in out.getvalue()
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from array_graph import ArrayGraph
+from landmarks import LandmarkIndex
+from shortest_paths import dijkstra
+
+
+def _random_graph(seed, directed):
+    rng = np.random.default_rng(seed)
+    n, m = int(rng.integers(2, 60)), int(rng.integers(1, 200))
+    return ArrayGraph.from_edges(rng.integers(n, size=m), rng.integers(n, size=m),
+                                 rng.integers(0, 10, size=m), directed=directed)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(20))
+def test_alt_matches_dijkstra(seed, directed, tmp_path):
+    graph = _random_graph(seed, directed)
+    LandmarkIndex.build(graph, 1 + seed % 5, seed=seed).save(str(tmp_path))
+    index = LandmarkIndex.load(str(tmp_path), graph)
+    rng = np.random.default_rng(seed)
+    for s, t in rng.integers(graph.num_nodes, size=(20, 2)):
+        expected = dijkstra(graph, s)[t]
+        for active in (0, 1, 4):
+            got = index.search(graph.node_ids[s], graph.node_ids[t], active)[0]
+            assert got == expected
@@ -0,0 +1,56 @@
+import os
+
+import networkx as nx
+import numpy as np
+
+import layout
+from layout import graph_layout
+
+
+def test_user_cache_dir_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    graph_layout(nx.path_graph(6), seed=1)
+    assert os.listdir(tmp_path) == ["cache"]
+    assert len(os.listdir(layout.default_cache_dir())) == 1
+
+
+def test_no_disk_cache_when_disabled(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    graph_layout(nx.path_graph(6), seed=3, cache_dir=False)
+    assert os.listdir(tmp_path) == []
+
+
+def test_damaged_cache_file_is_recomputed(tmp_path):
+    G = nx.cycle_graph(5)
+    pos = graph_layout(G, seed=4, cache_dir=str(tmp_path))
+    (path,) = tmp_path.iterdir()
+    path.write_bytes(path.read_bytes()[:20])
+    layout._memory.clear()
+    again = graph_layout(G, seed=4, cache_dir=str(tmp_path))
+    assert all(np.array_equal(pos[node], again[node]) for node in G)
+
+
+def test_disk_cache_when_asked(tmp_path):
+    G = nx.cycle_graph(7)
+    pos = graph_layout(G, seed=2, cache_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+    layout._memory.clear()
+    again = graph_layout(G, seed=2, cache_dir=str(tmp_path))
+    assert all(np.array_equal(pos[node], again[node]) for node in G)
+
+
+def test_memory_is_bounded(monkeypatch):
+    monkeypatch.setattr(layout, "MEMORY_ENTRIES", 3)
+    layout._memory.clear()
+    G = nx.path_graph(5)
+    for seed in range(5):
+        graph_layout(G, seed=seed)
+    assert len(layout._memory) == 3
+    # A hit moves the oldest entry (seed 2) to the back, so seed 3 goes next
+    seed2, seed3, seed4 = layout._memory
+    graph_layout(G, seed=2)
+    graph_layout(G, seed=5)
+    assert seed3 not in layout._memory
+    assert list(layout._memory)[:2] == [seed4, seed2]
@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+from bench.startup import HEAVY
+
+_SOLVE = """\
+import sys
+from max_flow_min_cost_w_simplex import find_max_flow_min_cost
+edges = [("A", "B", 10, 2), ("A", "C", 5, 1), ("B", "C", 15, 1), ("C", "D", 9, 1)]
+G, flow_dict = find_max_flow_min_cost(edges, "A", "D")
+assert G is None and flow_dict["C"]["D"] == 9
+print(*sorted({name.split(".")[0] for name in sys.modules} & set(%r)))
+"""
+
+
+def test_min_cost_example_solves_without_networkx():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", _SOLVE % (HEAVY,)], cwd=root,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.split() == []
@@ -0,0 +1,66 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from max_flow_min_cost_w_simplex import find_max_flow_min_cost, flow_graph
+from min_cost_flow import max_flow_min_cost, random_cost_network
+
+
+def _random_network(seed, negative):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(3, 14))
+    G = nx.gnm_random_graph(n, int(rng.integers(n, 4 * n)), seed=seed, directed=True)
+    for u, v in G.edges():
+        G[u][v]["capacity"] = int(rng.integers(1, 10))
+        G[u][v]["weight"] = int(rng.integers(-5 if negative else 0, 10))
+    return G
+
+
+def _check_flow(G, flow_dict, s, t, value):
+    for u, out in flow_dict.items():
+        for v, f in out.items():
+            assert 0 <= f <= G[u][v]["capacity"]
+    net = {u: sum(flow_dict[u].values()) - sum(flow_dict[w].get(u, 0) for w in G.pred[u])
+           for u in G}
+    assert net[s] == value and net[t] == -value
+    assert all(net[u] == 0 for u in G if u not in (s, t))
+
+
+@pytest.mark.parametrize("method", ["ssp", "cycle_cancelling", "cost_scaling"])
+@pytest.mark.parametrize("negative", [False, True])
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_networkx(seed, negative, method):
+    G = _random_network(seed, negative)
+    s, t = 0, G.number_of_nodes() - 1
+    expected = nx.max_flow_min_cost(G, s, t)
+    value, cost, flow_dict = max_flow_min_cost(G, s, t, method=method)
+    assert value == nx.maximum_flow_value(G, s, t)
+    assert cost == nx.cost_of_flow(G, expected)
+    assert cost == nx.cost_of_flow(G, flow_dict)
+    _check_flow(G, flow_dict, s, t, value)
+
+
+@pytest.mark.parametrize("changes", [1, 5, 50])
+@pytest.mark.parametrize("seed", range(8))
+def test_warm_start_matches_cold_solve(seed, changes):
+    n = 40
+    edges = random_cost_network(n, 200, max_capacity=20, seed=seed)
+    _, _, previous = max_flow_min_cost(edges, 0, n - 1, method="cost_scaling")
+    rng = np.random.default_rng(seed)
+    for k in rng.integers(len(edges), size=changes).tolist():
+        u, v, capacity, _ = edges[k]
+        edges[k] = (u, v, capacity, int(rng.integers(1, 21)))
+    warm = max_flow_min_cost(edges, 0, n - 1, method="cost_scaling", warm_start=previous)
+    cold = max_flow_min_cost(edges, 0, n - 1, method="cost_scaling")
+    assert warm[:2] == cold[:2]
+    assert warm[:2] == max_flow_min_cost(edges, 0, n - 1, method="cycle_cancelling")[:2]
+
+
+def test_simplex_example_warm_start():
+    edges = random_cost_network(30, 120, seed=3)
+    _, previous = find_max_flow_min_cost(edges, 0, 29)
+    edges = [(u, v, c, w + (u % 3)) for u, v, c, w in edges]
+    _, warm = find_max_flow_min_cost(edges, 0, 29, warm_start=previous)
+    _, cold = find_max_flow_min_cost(edges, 0, 29, backend="network_simplex")
+    G = flow_graph(edges)
+    assert nx.cost_of_flow(G, warm) == nx.cost_of_flow(G, cold)
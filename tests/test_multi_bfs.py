@@ -0,0 +1,49 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from array_graph import ArrayGraph
+from multi_bfs import BATCH, diameter_bounds, multi_source_bfs
+from traversal import bfs_levels
+
+
+def _array_graph(G):
+    return ArrayGraph.from_edges(*zip(*G.edges()))
+
+
+def test_diameter_waits_for_whole_level():
+    # The deepest level holds more than one batch; its first batch alone
+    # would suggest a diameter of 3
+    E = [(0, 1), (0, 2), (0, 3), (0, 4), (1, 2), (1, 3), (1, 4), (4, 2), (4, 3)]
+    E += [(1, x) for x in range(5, 5 + BATCH)] + [(2, 69), (3, 70), (4, 71)]
+    assert diameter_bounds(_array_graph(nx.Graph(E)), start=0) == (4, 4)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_diameter_matches_networkx(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(5, 200))
+    G = nx.connected_watts_strogatz_graph(n, 4, float(rng.random()), seed=seed)
+    graph = _array_graph(G)
+    start = int(rng.integers(graph.num_nodes))
+    assert diameter_bounds(graph, start) == (nx.diameter(G),) * 2
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_capped_bounds_contain_diameter(seed):
+    G = nx.connected_watts_strogatz_graph(300, 4, 0.05, seed=seed)
+    lower, upper = diameter_bounds(_array_graph(G), 0, max_sources=BATCH)
+    assert lower <= nx.diameter(G) <= upper
+
+
+def test_eccentricities_match_bfs():
+    G = nx.gnm_random_graph(300, 500, seed=1)
+    graph = _array_graph(G)
+    sources = np.arange(0, graph.num_nodes, 3)
+    ecc, reached, heights = multi_source_bfs(graph, sources, heights=True)
+    for k, s in enumerate(sources.tolist()):
+        visit, level = bfs_levels(graph, s)
+        assert ecc[k] == level.max() and reached[k] == len(visit)
+        expected = np.full(graph.num_nodes, -1)
+        expected[visit] = level
+        assert (heights[k] == expected).all()
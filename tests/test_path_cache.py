@@ -0,0 +1,68 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from path_cache import ShortestPathCache
+
+
+def _weighted(seed, directed):
+    rng = np.random.default_rng(seed)
+    G = nx.gnm_random_graph(40, 120, seed=seed, directed=directed)
+    for u, v in G.edges():
+        G[u][v]["weight"] = int(rng.integers(1, 10))
+    return G
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_answers_stay_exact_under_edge_updates(seed, directed):
+    G = _weighted(seed, directed)
+    cache = ShortestPathCache(G.copy(), max_size=300)
+    rng = np.random.default_rng(seed)
+    for step in range(200):
+        s, t = (int(x) for x in rng.integers(40, size=2))
+        if step % 5 == 0:
+            u, v = (int(x) for x in rng.integers(40, size=2))
+            if u != v and G.has_edge(u, v) and rng.random() < 0.3:
+                G.remove_edge(u, v)
+                cache.remove_edge(u, v)
+            elif u != v:
+                w = int(rng.integers(1, 10))
+                G.add_edge(u, v, weight=w)
+                cache.add_edge(u, v, w)
+        expected = nx.single_source_dijkstra_path_length(G, s)
+        if step % 3 == 0:
+            assert cache.single_source(s) == expected
+        elif t in expected:
+            assert cache.distance(s, t) == expected[t]
+        else:
+            with pytest.raises(nx.NetworkXNoPath):
+                cache.distance(s, t)
+        assert cache.size <= 300
+    assert cache.hits and cache.invalidations
+
+
+def test_update_drops_only_affected_entries():
+    G = nx.Graph()
+    G.add_weighted_edges_from([(0, 1, 1), (1, 2, 1), (3, 4, 1)])
+    cache = ShortestPathCache(G)
+    cache.single_source(0)
+    cache.single_source(3)
+    cache.add_edge(1, 2, 5)  # tight edge of 0's tree only
+    assert cache.stats["invalidations"] == 1
+    assert cache.distance(3, 4) == 1 and cache.hits == 1
+    assert cache.distance(0, 2) == 6
+
+
+def test_lru_eviction_by_size():
+    G = nx.path_graph(10)
+    cache = ShortestPathCache(G, max_size=25)
+    for source in range(4):
+        cache.single_source(source)
+    assert cache.evictions == 2 and list(cache._entries) == [2, 3]
+
+
+def test_negative_weight_rejected():
+    cache = ShortestPathCache(nx.path_graph(3))
+    with pytest.raises(ValueError):
+        cache.add_edge(0, 1, -1)
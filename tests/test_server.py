@@ -0,0 +1,71 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+import server
+from array_graph import ArrayGraph
+from server import GraphServer
+
+
+def _path_graph(n):
+    return ArrayGraph.from_edges(np.arange(n - 1), np.arange(1, n))
+
+
+def _blocks(entry):
+    return [block for block, _, _ in entry[2][0][0].values()]
+
+
+def _exists(block):
+    return os.path.exists(os.path.join("/dev/shm", block))
+
+
+@pytest.fixture
+def graph_server():
+    graphs = GraphServer(workers=1)
+    yield graphs
+    graphs.close()
+
+
+def test_reload_frees_old_graph_after_its_requests(graph_server):
+    graph_server.add_graph("g", _path_graph(5))
+    old = _blocks(graph_server.graphs["g"])
+
+    async def reload_while_running():
+        request = asyncio.create_task(graph_server.handle("bfs", "g", {"start": 0}))
+        await asyncio.sleep(0)  # submitted to the pool
+        graph_server.add_graph("g", _path_graph(8))
+        assert graph_server._retired, "freed while a request still runs"
+        first = await request
+        second = await graph_server.handle("bfs", "g", {"start": 0})
+        await asyncio.sleep(0)  # let the done callbacks run
+        return first, second
+
+    first, second = asyncio.run(reload_while_running())
+    assert len(first["nodes"]) == 5 and len(second["nodes"]) == 8
+    assert graph_server._retired == []
+    if os.path.isdir("/dev/shm"):
+        assert not any(_exists(block) for block in old)
+
+
+def test_idle_graph_freed_on_reload(graph_server):
+    graph_server.add_graph("g", _path_graph(5))
+    graph_server.add_graph("g", _path_graph(6))
+    assert graph_server._retired == []
+
+
+def test_worker_drops_replaced_attachment(graph_server):
+    graph_server.add_graph("g", _path_graph(5))
+    old = graph_server.graphs["g"][2]
+    graph, _ = server._attach("g", old)
+    assert graph.num_nodes == 5
+    graph_server.add_graph("g", _path_graph(7))
+    try:
+        graph, _ = server._attach("g", graph_server.graphs["g"][2])
+        assert graph.num_nodes == 7
+        assert list(server._worker_graphs) == ["g"]
+        assert server._worker_graphs["g"][0] == server._spec_key(graph_server.graphs["g"][2])
+    finally:
+        del graph
+        server._detach("g")
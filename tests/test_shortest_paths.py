@@ -0,0 +1,46 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from array_graph import ArrayGraph
+from shortest_paths import all_pairs_shortest_paths, distance_dict
+
+
+def _random_graph(seed, directed, negative=False):
+    rng = np.random.default_rng(seed)
+    n, m = int(rng.integers(2, 60)), int(rng.integers(1, 300))
+    src, dst = rng.integers(n, size=m), rng.integers(n, size=m)
+    if negative:
+        # Edges only go to larger ids, so there is no cycle
+        src, dst = np.minimum(src, dst), np.maximum(src, dst)
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+    low = -5 if negative else 0
+    weights = rng.integers(low, 10, size=len(src))
+    return ArrayGraph.from_edges(src, dst, weights, directed=directed or negative)
+
+
+@pytest.mark.parametrize("method", ["floyd", "rows"])
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(8))
+def test_all_pairs_match_networkx(seed, directed, method):
+    graph = _random_graph(seed, directed)
+    D = all_pairs_shortest_paths(graph, method, workers=1)
+    assert D.dtype == np.float64
+    expected = dict(nx.all_pairs_dijkstra_path_length(graph.to_networkx()))
+    assert distance_dict(graph, D) == expected
+
+
+@pytest.mark.parametrize("method", ["floyd", "rows"])
+@pytest.mark.parametrize("seed", range(4))
+def test_negative_weights_match_networkx(seed, method):
+    graph = _random_graph(seed, True, negative=True)
+    D = all_pairs_shortest_paths(graph, method, workers=1)
+    expected = dict(nx.all_pairs_bellman_ford_path_length(graph.to_networkx()))
+    assert distance_dict(graph, D) == expected
+
+
+def test_rows_keep_float64_precision():
+    # 2**24 + 1 is not a float32
+    graph = ArrayGraph.from_edges([0, 1], [1, 2], np.array([2**24, 1]), directed=True)
+    assert all_pairs_shortest_paths(graph, "rows", workers=1)[0, 2] == 2**24 + 1
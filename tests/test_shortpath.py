@@ -0,0 +1,25 @@
+import networkx as nx
+import numpy as np
+
+from array_graph import ArrayGraph
+from shortpath import calculate_shortest_paths_to, read_graph_from_file
+
+
+def test_reader_feeds_bellman_kalaba(tmp_path):
+    path = tmp_path / "edges.txt"
+    np.savetxt(path, [[1, 2, 3], [2, 3, 4], [1, 3, 7], [3, 4, 1], [5, 6, 1]], fmt="%d")
+    G = read_graph_from_file(str(path), cache_dir=False)
+    distances = calculate_shortest_paths_to(G, 4)
+    assert distances == nx.single_source_dijkstra_path_length(G, 4)
+    graph = ArrayGraph.from_networkx(G)
+    again, rounds = calculate_shortest_paths_to(graph, 4, return_rounds=True)
+    assert again == distances and rounds >= 1
+
+
+def test_directed_graph_distances_to_target():
+    rng = np.random.default_rng(3)
+    G = nx.gnm_random_graph(40, 160, seed=3, directed=True)
+    for u, v in G.edges():
+        G[u][v]["weight"] = int(rng.integers(1, 10))
+    distances = calculate_shortest_paths_to(G, 0)
+    assert distances == nx.single_source_dijkstra_path_length(G.reverse(), 0)
@@ -0,0 +1,50 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from array_graph import ArrayGraph
+from traversal import bfs_levels, dfs_preorder, legacy_bfs, legacy_dfs
+
+
+def _random_graph(seed, directed):
+    rng = np.random.default_rng(seed)
+    n, m = int(rng.integers(1, 80)), int(rng.integers(0, 200))
+    return ArrayGraph.from_indexed_edges(rng.integers(n, size=m), rng.integers(n, size=m),
+                                         np.arange(n), directed=directed)
+
+
+def _adjacency(graph):
+    return {i: graph.neighbors_of(i).tolist() for i in range(graph.num_nodes)}
+
+
+def _in_order(order):
+    return sorted(order, key=order.get)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(25))
+def test_bfs_matches_legacy(seed, directed):
+    graph = _random_graph(seed, directed)
+    root = seed % graph.num_nodes
+    visit, level = bfs_levels(graph, root)
+    order, height = legacy_bfs(_adjacency(graph), root)
+    assert visit.tolist() == _in_order(order)
+    assert level.tolist() == [height[v] for v in visit.tolist()]
+    expected = nx.single_source_shortest_path_length(graph.to_networkx(), root)
+    assert dict(zip(visit.tolist(), level.tolist())) == expected
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(25))
+def test_dfs_matches_legacy(seed, directed):
+    graph = _random_graph(seed, directed)
+    root = seed % graph.num_nodes
+    visit, depth = dfs_preorder(graph, root)
+    assert visit.tolist() == _in_order(legacy_dfs(_adjacency(graph), root))
+    # networkx visits neighbors in insertion order, which is sorted here
+    G = nx.DiGraph() if directed else nx.Graph()
+    G.add_nodes_from(range(graph.num_nodes))
+    G.add_edges_from((u, v) for u, nbrs in _adjacency(graph).items() for v in nbrs)
+    assert visit.tolist() == list(nx.dfs_preorder_nodes(G, root))
+    tree = nx.dfs_tree(G, root)
+    assert depth.tolist() == [nx.shortest_path_length(tree, root, v) for v in visit.tolist()]
@@ -0,0 +1,172 @@
+import numpy as np
+
+import instrument
+
+
+def gather_ranges(offsets, frontier):
+    """Indices of the CSR rows `frontier`, concatenated in frontier order."""
+    starts = offsets[frontier]
+    counts = offsets[frontier + 1] - starts
+    total = int(counts.sum())
+    # Position of every gathered entry inside the CSR value array
+    shift = starts - (np.cumsum(counts) - counts)
+    return np.arange(total, dtype=np.int64) + np.repeat(shift, counts)
+
+
+def expand_frontier(graph, frontier):
+    """Concatenated neighbor lists of `frontier`, in frontier order."""
+    return graph.neighbors[gather_ranges(graph.offsets, frontier)]
+
+
+def bfs_levels(graph, root):
+    """Level-synchronous BFS over an ArrayGraph.
+
+    Returns (visit, level): dense node indices in visit order and the level
+    (height) of each of them. The visit order is the one a FIFO queue with
+    numerically sorted neighbors produces: inside a level, a node is
+    discovered at the first frontier position that reaches it.
+    """
+    visited = np.zeros(graph.num_nodes, dtype=bool)
+    visited[root] = True
+    frontier = np.array([root], dtype=np.int64)
+    visit = [frontier]
+    level = [np.zeros(1, dtype=np.int64)]
+
+    h = 0
+    while len(frontier):
+        candidates = expand_frontier(graph, frontier)
+        instrument.count("edges_scanned", len(candidates))
+        candidates = candidates[~visited[candidates]]
+        # Keep the first occurrence of each node, in discovery order
+        nodes, first = np.unique(candidates, return_index=True)
+        frontier = nodes[np.argsort(first, kind="stable")].astype(np.int64)
+        visited[frontier] = True
+        h += 1
+        instrument.count("queue_pushes", len(frontier))
+        visit.append(frontier)
+        level.append(np.full(len(frontier), h, dtype=np.int64))
+
+    return np.concatenate(visit), np.concatenate(level)
+
+
+def dfs_preorder(graph, root):
+    """Iterative DFS over an ArrayGraph visiting smaller neighbors first.
+
+    Every stack frame keeps an iterator over its node's neighbor list, so a
+    node is pushed at most once. Returns (visit, depth) in preorder, where
+    depth is the node's depth in the DFS tree.
+    """
+    offsets = graph.offsets.tolist()
+    neighbors = graph.neighbors
+    visited = bytearray(graph.num_nodes)
+    visited[root] = 1
+    visit = [root]
+    depth = [0]
+    stack = [iter(neighbors[offsets[root] : offsets[root + 1]].tolist())]
+
+    while stack:
+        for v in stack[-1]:
+            if not visited[v]:
+                visited[v] = 1
+                visit.append(v)
+                depth.append(len(stack))
+                stack.append(iter(neighbors[offsets[v] : offsets[v + 1]].tolist()))
+                break
+        else:
+            stack.pop()
+
+    visit = np.array(visit, dtype=np.int64)
+    if instrument.enabled():
+        # Every visited node had its whole neighbor list walked
+        scanned = graph.offsets[visit + 1] - graph.offsets[visit]
+        instrument.count("edges_scanned", int(scanned.sum()))
+        instrument.count("queue_pushes", len(visit))
+    return visit, np.array(depth, dtype=np.int64)
+
+
+def legacy_bfs(adjacency, start):
+    """The original list-queue BFS, kept as the benchmark baseline."""
+    visited = {start}
+    queue = [(start, 0)]
+    order = {start: 0}
+    height = {start: 0}
+    count = 1
+    while queue:
+        current, h = queue.pop(0)
+        for neighbor in sorted(adjacency[current]):
+            if neighbor not in visited:
+                queue.append((neighbor, h + 1))
+                visited.add(neighbor)
+                order[neighbor] = count
+                height[neighbor] = h + 1
+                count += 1
+    return order, height
+
+
+def legacy_dfs(adjacency, start):
+    """The original duplicate-push DFS, kept as the benchmark baseline."""
+    visited = set()
+    stack = [(start, 0)]
+    order = {start: 0}
+    count = 1
+    while stack:
+        current, h = stack.pop()
+        if current not in visited:
+            visited.add(current)
+            for neighbor in sorted(adjacency[current], reverse=True):
+                if neighbor not in visited:
+                    stack.append((neighbor, h + 1))
+            order[current] = count
+            count += 1
+    return order
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from array_graph import ArrayGraph
+
+    parser = argparse.ArgumentParser(description="BFS/DFS engine benchmark")
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    m = args.nodes * args.degree // 2
+    src = rng.integers(0, args.nodes, m)
+    dst = rng.integers(0, args.nodes, m)
+    graph = ArrayGraph.from_edges(src, dst)
+    root = 0
+    print(f"Graph: {graph.num_nodes} nodes, {graph.num_edges} edges")
+
+    t = time.perf_counter()
+    visit, level = bfs_levels(graph, root)
+    bfs_time = time.perf_counter() - t
+    t = time.perf_counter()
+    dfs_visit, _ = dfs_preorder(graph, root)
+    dfs_time = time.perf_counter() - t
+    print(f"engine  BFS: {bfs_time:.2f}s ({len(visit)} reached, {level[-1]} levels)")
+    print(f"engine  DFS: {dfs_time:.2f}s ({len(dfs_visit)} reached)")
+
+    if not args.skip_legacy:
+        u = graph.sources().tolist()
+        adjacency = [[] for _ in range(graph.num_nodes)]
+        for a, b in zip(u, graph.neighbors.tolist()):
+            adjacency[a].append(b)
+
+        t = time.perf_counter()
+        order, height = legacy_bfs(adjacency, root)
+        legacy_bfs_time = time.perf_counter() - t
+        assert list(order) == visit.tolist()
+        assert list(height.values()) == level.tolist()
+
+        t = time.perf_counter()
+        order = legacy_dfs(adjacency, root)
+        legacy_dfs_time = time.perf_counter() - t
+        assert list(order) == dfs_visit.tolist()
+
+        print(f"legacy  BFS: {legacy_bfs_time:.2f}s ({legacy_bfs_time / bfs_time:.1f}x slower)")
+        print(f"legacy  DFS: {legacy_dfs_time:.2f}s ({legacy_dfs_time / dfs_time:.1f}x slower)")